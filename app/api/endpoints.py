@@ -1,42 +1,153 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Header, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from typing import Optional
-import aiofiles
+import asyncio
+import json
 import os
 from pathlib import Path
 from datetime import datetime
 import logging
+import re
+import time
+import uuid
 
-from app.core.models import PDFUploadResponse, ErrorResponse
+from app.core.models import PDFUploadResponse, ErrorResponse, GraphData, KnowledgeGraphMergeResult, ResponseView
 from app.services.pdf_processor import PDFProcessor
+from app.services.graph_merger import get_knowledge_graph
+from app.services.jobs import JobAlreadyRunningError, JobCancelledError, running_jobs
+from app.services.job_queue import stream_stored_events, submit_and_wait
+from app.services.progress import job_events, format_sse
+from app.core.metrics import metrics
+from app.langgraph.llm_client import connection_stats
+from app.langgraph.model_router import routing_stats
+from app.services.scheduler import get_scheduler
+from app.services.shared_store import get_shared_store
+from app.services.storage import get_blob_store
+from app.services.deadline import deadline_stats
+from app.services.admission import AdmissionRejectedError, get_admission_controller
+from app.core.config import settings
+from app.utils.export_utils import list_exported_files, load_exported_output
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard json module
+    orjson = None
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 # Create uploads directory if it doesn't exist
-UPLOAD_DIR = Path("uploads")
+UPLOAD_DIR = Path(settings.UPLOAD_DIR)
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 # Maximum file size (e.g., 50MB)
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB in bytes
 
+# Client-provided job IDs end up in export filenames
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def validate_job_id(job_id: Optional[str]) -> None:
+    if job_id is not None and not JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid job ID (use 1-64 letters, digits, '-' or '_')"
+        )
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, for large payloads (graphs, processing
+    results) that are already plain dicts and don't need model validation.
+    """
+    
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def shape_processing_result(result: dict, view: ResponseView = ResponseView.full, include_summaries: bool = True) -> dict:
+    """
+    Select the parts of a processing result returned to the client.
+    
+    Args:
+        result: Result of PDFProcessor.process_pdf
+        view: Which sections to include (metadata is always included)
+        include_summaries: Keep the slide summaries of each topic
+    
+    Returns:
+        Processing result with only the requested sections
+    """
+    metadata = {**result['metadata'], 'export_file_path': os.path.basename(result['metadata'].get('export_file_path') or '')}
+    shaped = {'metadata': metadata}
+    if view in (ResponseView.full, ResponseView.graph):
+        shaped['graph'] = result['graph']
+    if view in (ResponseView.full, ResponseView.topics):
+        topics = result.get('topics', [])
+        if not include_summaries:
+            topics = [{key: value for key, value in topic.items() if key != 'summaries'} for topic in topics]
+        shaped['topics'] = topics
+    return shaped
+
+
 @router.post(
     "/upload-pdf",
     response_model=PDFUploadResponse,
+    response_model_exclude_none=True,
     status_code=status.HTTP_200_OK,
     summary="Upload a PDF file for processing",
     description="Upload a PDF file containing slides for processing and analysis"
 )
 async def upload_pdf(
-    file: UploadFile = File(..., description="PDF file to upload")
+    request: Request,
+    file: UploadFile = File(..., description="PDF file to upload"),
+    merge_knowledge_graph: bool = Query(False, description="Merge the resulting mind map into the cross-document knowledge graph"),
+    job_id: Optional[str] = Query(None, description="Client-chosen job ID to follow progress on /api/jobs/{job_id}/events"),
+    view: ResponseView = Query(ResponseView.full, description="Sections of the processing result to return"),
+    include_summaries: bool = Query(True, description="Include slide summaries in topics"),
+    profile: bool = Query(False, description="Profile this job (retrieve with /api/jobs/{job_id}/profile)"),
+    x_profile: Optional[str] = Header(None, description="Set to 'cpu' (or 1) to profile this job, 'memory' to also trace allocations"),
+    x_tenant_id: Optional[str] = Header(None, description="Tenant the job's LLM usage is shared fairly with"),
+    priority: str = Query("normal", pattern="^(low|normal|high)$", description="Scheduling priority of the job's LLM calls"),
+    deadline_seconds: Optional[float] = Query(None, gt=0, description="Time budget of the request; processing is degraded to meet it")
 ):
     """
     Upload a PDF file for processing.
     
     - **file**: PDF file (max 50MB)
+    - **merge_knowledge_graph**: Also merge the mind map into the knowledge graph
+    - **job_id**: Optional job ID; progress events are streamed under it while processing
+    - **view**: `full`, `graph` (graph + metadata), `topics` (topics + metadata) or `metadata`
+    - **include_summaries**: Set to false to drop the slide summaries from topics
+    - **profile** / **X-Profile** header: Record a profile of the processing (see /api/jobs/{job_id}/profile)
+    - **X-Tenant-ID** header: Tenant for fair sharing of LLM capacity between clients
+    - **priority**: `low`, `normal` or `high`
+    - **deadline_seconds**: Time budget counted from the upload. To meet it, pages may be rendered at a lower
+      resolution or sampled, topics built in parallel and cross-topic links skipped; the metadata lists the
+      degradations applied and whether the deadline was met
+    
+    Uploads go through admission control (see /api/preflight): when the server is busy the job waits its
+    turn (a `queued` progress event is sent), or is rejected with 503 and Retry-After if the predicted wait
+    is too long. PDFs over the page or cost limits are rejected with 413.
+    
+    Processing is cancelled if the client disconnects, or through /api/jobs/{job_id}/cancel.
     
     Returns processing results and file information.
     """
+    received_at = time.time()
+    validate_job_id(job_id)
+    if job_id and running_jobs.is_running(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} is already running"
+        )
+    job_id = job_id or f"session_{uuid.uuid4().hex[:8]}"
+    if x_tenant_id is not None and not JOB_ID_PATTERN.match(x_tenant_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid tenant ID (use 1-64 letters, digits, '-' or '_')"
+        )
     
     logger.info(f"=" * 80)
     logger.info(f"📥 NEW PDF UPLOAD REQUEST")
@@ -57,6 +168,7 @@ async def upload_pdf(
             detail="Invalid PDF filename"
         )
     
+    ticket = None
     try:
         # Read file content
         logger.info("Reading file content...")
@@ -77,22 +189,84 @@ async def upload_pdf(
                 detail="Empty file uploaded"
             )
         
-        # Generate unique filename
+        # Generate unique filename (a reference to the content-addressed blob)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         safe_filename = f"{timestamp}_{file.filename}"
-        file_path = UPLOAD_DIR / safe_filename
         
-        # Save file asynchronously
-        logger.info(f"Saving file to: {file_path}")
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(contents)
-        logger.info("✅ File saved successfully")
+        # Admit, queue or reject the job from its predicted size before storing anything
+        preflight_result = await run_preflight(contents)
+        shared_store = get_shared_store()
+        # Events of an earlier job with this ID are cleared before this one publishes any
+        if shared_store is not None:
+            await asyncio.to_thread(shared_store.reset_events, job_id)
+        else:
+            job_events.reset(job_id)
+        
+        async def publish_queued(decision: dict) -> None:
+            data = {"predicted_wait_seconds": decision["predicted_wait_seconds"]}
+            if shared_store is not None:
+                await asyncio.to_thread(shared_store.add_event, job_id, "queued", data)
+            else:
+                job_events.publish(job_id, "queued", data)
+        
+        try:
+            ticket = await get_admission_controller().acquire(
+                job_id, preflight_result, is_disconnected=request.is_disconnected, on_queued=publish_queued
+            )
+        except AdmissionRejectedError as e:
+            if e.reason == "server_busy":
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=str(e),
+                    headers={"Retry-After": str(int(e.retry_after or 0) + 1)}
+                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST if e.reason == "empty" else status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(e)
+            )
+        estimate = preflight_result["estimate"]
+        
+        # Save file off the event loop; identical PDFs share one stored blob
+        blob_store = get_blob_store()
+        file_path, deduplicated = await asyncio.to_thread(blob_store.put, contents, safe_filename, file.filename)
+        logger.info(f"✅ File saved as {safe_filename} -> {file_path}{' (already stored)' if deduplicated else ''}")
         
         # Process the PDF
         logger.info("🚀 Starting PDF processing with LangGraph...")
         logger.info("=" * 80)
-        processor = PDFProcessor()
-        processing_result = await processor.process_pdf(file_path)
+        profile_mode = (x_profile or "").strip().lower()
+        if shared_store is not None:
+            # Queue mode: a processing worker runs the job (the blob stays pinned while it is queued)
+            processing_result = await submit_and_wait(shared_store, job_id, {
+                "file_path": str(file_path),
+                "digest": file_path.stem,
+                "saved_filename": safe_filename,
+                "profile": profile or profile_mode in ("1", "true", "cpu"),
+                "profile_memory": profile_mode == "memory",
+                "tenant": x_tenant_id,
+                "priority": priority,
+                "deadline_seconds": deadline_seconds,
+                "deadline_started_at": received_at,
+                "admission": ticket.payload()
+            }, is_disconnected=request.is_disconnected)
+        else:
+            processor = PDFProcessor()
+            with blob_store.pinned(file_path):
+                processing_result = await running_jobs.run(
+                    job_id,
+                    processor.process_pdf(
+                        file_path,
+                        thread_id=job_id,
+                        profile=profile or profile_mode in ("1", "true", "cpu"),
+                        profile_memory=profile_mode == "memory",
+                        tenant=x_tenant_id,
+                        priority=priority,
+                        deadline_seconds=deadline_seconds,
+                        deadline_started_at=received_at
+                    ),
+                    source=safe_filename,
+                    is_disconnected=request.is_disconnected
+                )
         
         logger.info("=" * 80)
         logger.info("✅ PDF PROCESSING COMPLETE!")
@@ -100,31 +274,110 @@ async def upload_pdf(
         logger.info(f"Total edges: {processing_result['metadata']['total_edges']}")
         logger.info("=" * 80)
         
-        return PDFUploadResponse(
-            success=True,
-            message="PDF uploaded and processed successfully",
-            filename=file.filename,
-            saved_filename=safe_filename,
-            file_size=file_size,
-            file_path=str(file_path),
-            processing_result=processing_result
-        )
+        if merge_knowledge_graph:
+            # The merge (and loading the store on first use) writes files under a lock: keep it off the event loop
+            await asyncio.to_thread(
+                lambda: get_knowledge_graph().merge_graph(processing_result['graph'], source_id=processing_result['metadata']['thread_id'])
+            )
+        
+        processing_result = {**processing_result, 'metadata': {
+            **processing_result['metadata'],
+            'predicted_seconds': estimate['duration_seconds'],
+            'predicted_cost_usd': estimate['cost_usd']
+        }}
+        
+        # Shaped like PDFUploadResponse, serialized without re-validating the graph
+        return FastJSONResponse({
+            "success": True,
+            "message": "PDF uploaded and processed successfully",
+            "filename": file.filename,
+            "saved_filename": safe_filename,
+            "file_size": file_size,
+            "processing_result": shape_processing_result(processing_result, view, include_summaries)
+        })
         
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except JobCancelledError as e:
+        logger.info(f"🛑 {str(e)}")
+        if e.reason != "file_deleted":
+            get_blob_store().delete(safe_filename)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except JobAlreadyRunningError as e:
+        # Another upload took the same job ID in the meantime
+        get_blob_store().delete(safe_filename)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"❌ ERROR: {str(e)}", exc_info=True)
-        # Clean up file if it was saved
-        if 'file_path' in locals() and file_path.exists():
-            os.remove(file_path)
+        # Clean up file reference if it was saved
+        if 'file_path' in locals():
+            get_blob_store().delete(safe_filename)
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing PDF: {str(e)}"
         )
+    finally:
+        if ticket is not None:
+            get_admission_controller().release(ticket)
+        await file.close()
+
+
+async def run_preflight(contents: bytes) -> dict:
+    from app.services.preflight import InvalidPDFError, preflight
+    
+    try:
+        return await asyncio.to_thread(preflight, contents)
+    except InvalidPDFError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post(
+    "/preflight",
+    status_code=status.HTTP_200_OK,
+    summary="Analyze a PDF and estimate its processing cost and duration"
+)
+async def preflight_pdf(
+    file: UploadFile = File(..., description="PDF file to analyze"),
+    include_pages: bool = Query(False, description="Include the analysis of each page")
+):
+    """
+    Analyze a PDF without processing it (no LLM calls, a few milliseconds per page)
+    and predict what uploading it would cost.
+    
+    - **analysis**: Page count, text and image coverage, page kinds (`text`, `image`, `mixed`,
+      `blank`), duplicate pages and the vision tokens of the rendered pages
+    - **estimate**: Predicted LLM calls, tokens, cost and duration (median and 90th percentile),
+      calibrated on the call latencies, reply sizes and job durations measured so far
+    - **admission**: Whether an upload would currently be admitted, queued (with the predicted
+      wait) or rejected
+    """
+    try:
+        contents = await file.read()
+        if len(contents) > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File size exceeds maximum allowed size of {MAX_FILE_SIZE // (1024*1024)}MB"
+            )
+        result = await run_preflight(contents)
     finally:
         await file.close()
+    if not include_pages:
+        result["analysis"].pop("pages")
+    controller = get_admission_controller()
+    await controller.refresh()
+    decision = controller.decide(result)
+    return {**result, "admission": {key: value for key, value in decision.items() if key != "detail"}}
 
 
 @router.delete(
@@ -137,20 +390,268 @@ async def delete_pdf(filename: str):
     Delete a previously uploaded PDF file.
     
     - **filename**: Name of the saved file to delete
+    
+    Jobs still processing the file are cancelled.
     """
-    file_path = UPLOAD_DIR / filename
+    blob_store = get_blob_store()
+    legacy_path = UPLOAD_DIR / filename
     
-    if not file_path.exists():
+    if blob_store.resolve(filename) is None and not legacy_path.is_file():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found"
         )
     
+    cancelled_jobs = running_jobs.cancel_source(filename)
+    shared_store = get_shared_store()
+    if shared_store is not None:
+        cancelled_jobs += await asyncio.to_thread(shared_store.cancel_source, filename)
     try:
-        os.remove(file_path)
-        return {"success": True, "message": f"File {filename} deleted successfully"}
+        # The stored blob is only removed once no other filename refers to it
+        if not blob_store.delete(filename):
+            os.remove(legacy_path)
+        return {"success": True, "message": f"File {filename} deleted successfully", "cancelled_jobs": cancelled_jobs}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting file: {str(e)}"
         )
+
+
+@router.get(
+    "/knowledge-graph",
+    response_model=GraphData,
+    status_code=status.HTTP_200_OK,
+    summary="Get the cross-document knowledge graph"
+)
+async def get_knowledge_graph_data(
+    query: Optional[str] = Query(None, description="Only return the neighbourhood of nodes matching this text"),
+    depth: int = Query(1, ge=0, le=5, description="Number of hops around matched nodes")
+):
+    """
+    Get the knowledge graph merged from all processed documents.
+    
+    - **query**: Optional free text matched against node titles
+    - **depth**: Neighbourhood depth around matched nodes
+    """
+    from app.services.graph_layout import attach_layout
+    
+    def _graph_with_layout() -> dict:
+        store = get_knowledge_graph()
+        graph = store.query(query, depth=depth) if query else store.to_graph()
+        return attach_layout(graph, store.layout())
+    
+    # Laying out the whole graph is CPU-bound: keep it off the event loop
+    return FastJSONResponse(await asyncio.to_thread(_graph_with_layout))
+
+
+@router.post(
+    "/knowledge-graph/merge",
+    response_model=KnowledgeGraphMergeResult,
+    status_code=status.HTTP_200_OK,
+    summary="Merge a mind map into the knowledge graph"
+)
+async def merge_into_knowledge_graph(graph: GraphData, source_id: str = Query(..., description="Identifier of the source document")):
+    """
+    Merge an existing mind map (e.g. loaded from an export) into the knowledge graph.
+    
+    - **graph**: Mind map in the same shape as returned by the upload endpoint
+    - **source_id**: Identifier of the document the graph comes from
+    """
+    graph_dict = graph.model_dump(by_alias=True)
+    stats = await asyncio.to_thread(lambda: get_knowledge_graph().merge_graph(graph_dict, source_id=source_id))
+    return KnowledgeGraphMergeResult(source_id=source_id, **stats)
+
+
+@router.get(
+    "/get-graph/{thread_id}",
+    response_model=GraphData,
+    status_code=status.HTTP_200_OK,
+    summary="Get the mind map of a processed PDF with its layout"
+)
+async def get_graph(thread_id: str):
+    """
+    Get the mind map of a previous processing session, with precomputed node coordinates.
+    
+    - **thread_id**: Processing session ID returned in the upload metadata
+    """
+    from app.services.graph_layout import compute_layout, attach_layout
+    
+    def _load_graph() -> Optional[dict]:
+        exports = list_exported_files(thread_id=thread_id)
+        if not exports:
+            return None
+        processing_results = (load_exported_output(exports[0]) or {}).get('processing_results', {})
+        graph = processing_results.get('final_graph', {})
+        # Exports made before layouts were precomputed don't carry one
+        layout = processing_results.get('layout') or compute_layout(graph)
+        return attach_layout(graph, layout)
+    
+    graph = await asyncio.to_thread(_load_graph)
+    if graph is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Graph not found"
+        )
+    return FastJSONResponse(graph)
+
+
+@router.post(
+    "/layout",
+    response_model=GraphData,
+    status_code=status.HTTP_200_OK,
+    summary="Lay out an edited mind map"
+)
+async def layout_graph(graph: GraphData):
+    """
+    Compute node coordinates for a graph. Nodes that already carry x/y keep their
+    position (only new nodes are placed), so small edits are re-laid out incrementally.
+    
+    - **graph**: Mind map, optionally with the previous node coordinates
+    """
+    from app.services.graph_layout import compute_layout, attach_layout
+    
+    graph_dict = graph.model_dump(by_alias=True)
+    previous = {
+        node['id']: {"x": node['x'], "y": node['y']}
+        for node in graph_dict['nodes'] if node.get('x') is not None and node.get('y') is not None
+    }
+    layout = await asyncio.to_thread(compute_layout, graph_dict, previous=previous)
+    return attach_layout(graph_dict, layout)
+
+
+@router.get(
+    "/jobs/{job_id}/events",
+    status_code=status.HTTP_200_OK,
+    summary="Stream processing progress events",
+    response_class=StreamingResponse
+)
+async def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Stream a job's progress as Server-Sent Events.
+    
+    Events: `queued` (the upload waits for admission), `pages_started`, `page_summary`, `topic` (each topic as soon as the model
+    emitted it), `topics`, `graph_node` (each new node as it is emitted), `graph_delta`
+    (nodes/edges added or removed by one topic), then `completed`, `failed` or `cancelled`. Events emitted before the
+    client connected are replayed, and reconnecting clients resume after Last-Event-ID. The stream
+    of a job that has not started within a minute (e.g. an unknown job ID) ends without events.
+    
+    - **job_id**: Job ID passed to the upload endpoint
+    """
+    validate_job_id(job_id)
+    last_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    
+    shared_store = get_shared_store()
+    # In queue mode the job runs in a processing worker, which stores its events
+    messages = stream_stored_events(shared_store, job_id, last_seq=last_seq) if shared_store else job_events.subscribe(job_id, last_seq=last_seq)
+    
+    async def event_stream():
+        async for message in messages:
+            yield format_sse(message)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post(
+    "/jobs/{job_id}/cancel",
+    status_code=status.HTTP_200_OK,
+    summary="Cancel a running job"
+)
+async def cancel_job(job_id: str):
+    """
+    Cancel a running job: its pending page summaries, graph building and in-flight
+    LLM calls are aborted and their scheduler slots released. The upload request
+    of the job fails with 409 and a `cancelled` event ends its event stream.
+    
+    - **job_id**: Job ID passed to (or generated by) the upload endpoint
+    """
+    validate_job_id(job_id)
+    shared_store = get_shared_store()
+    if shared_store is not None:
+        cancelled = await asyncio.to_thread(shared_store.request_cancel, job_id)
+    else:
+        cancelled = running_jobs.cancel(job_id)
+    if not cancelled:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No running job {job_id}"
+        )
+    return {"success": True, "message": f"Job {job_id} is being cancelled"}
+
+
+@router.get(
+    "/jobs/{job_id}/profile",
+    status_code=status.HTTP_200_OK,
+    summary="Get the profile of a profiled job"
+)
+async def get_job_profile(
+    job_id: str,
+    format: str = Query("json", pattern="^(json|folded)$", description="'json' report or 'folded' CPU stacks for flamegraph tools")
+):
+    """
+    Get the profile recorded for a job uploaded with profiling enabled: time per
+    pipeline step (spans), sampled CPU stacks and, if requested, allocation statistics.
+    
+    - **job_id**: Job (thread) ID of the processing session
+    """
+    from app.services.profiling import find_profile, folded_stacks_text
+    
+    validate_job_id(job_id)
+    path = find_profile(job_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profile found for this job"
+        )
+    with open(path, 'rb') as f:
+        body = f.read()
+    if format == "folded":
+        return PlainTextResponse(folded_stacks_text(json.loads(body)))
+    return Response(content=body, media_type="application/json")
+
+
+@router.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    summary="Get service metrics"
+)
+async def get_metrics():
+    """
+    Get in-process service metrics (counters, gauges and timings), including
+    LLM call latencies, connection reuse of the LLM connection pool, queue waits
+    per tenant (`llm_queue_wait_seconds`), the scheduler's current state and
+    model routing statistics (calls per model, fallback rate) and running jobs.
+    Work saved by cancellations is counted in `jobs_cancelled`, `pages_cancelled`,
+    `graph_steps_cancelled` and `llm_calls_cancelled`, admission decisions in
+    `admission_decisions`.
+    """
+    snapshot = metrics.snapshot()
+    snapshot["llm_connections"] = connection_stats()
+    snapshot["llm_scheduler"] = get_scheduler().snapshot()
+    snapshot["llm_routing"] = routing_stats()
+    snapshot["running_jobs"] = running_jobs.snapshot()
+    snapshot["deadlines"] = deadline_stats()
+    snapshot["admission"] = get_admission_controller().snapshot()
+    shared_store = get_shared_store()
+    if shared_store is not None:
+        snapshot["job_queue"] = await asyncio.to_thread(shared_store.queue_stats)
+        snapshot["job_queue"]["llm_slots_in_use"] = await asyncio.to_thread(shared_store.slots_in_use)
+    return snapshot
+
+
+@router.get(
+    "/storage",
+    status_code=status.HTTP_200_OK,
+    summary="Get storage usage"
+)
+async def get_storage_usage():
+    """
+    Get disk usage of uploads (deduplicated blobs and their references) and exported outputs.
+    """
+    from app.services.storage import create_janitor
+    
+    return await asyncio.to_thread(create_janitor().report_usage)
@@ -0,0 +1,122 @@
+import gzip
+from typing import Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+# Preferred first
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Streams are passed through untouched (compressing would buffer them)
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml", "application/xml")
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows a content coding (q=0 means refused).
+    """
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() in (coding, "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str] = SUPPORTED_ENCODINGS) -> Optional[str]:
+    """
+    Pick the preferred content coding accepted by the client, or None for identity.
+    """
+    for coding in available:
+        if accepts_encoding(accept_encoding, coding):
+            return coding
+    return None
+
+
+def compress_body(body: bytes, coding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compress a body with gzip or brotli. Defaults favour speed, for on-the-fly use.
+    """
+    if coding == "br":
+        return brotli.compress(body, quality=4 if level is None else level)
+    return gzip.compress(body, compresslevel=6 if level is None else level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete responses with gzip or brotli, negotiated
+    from Accept-Encoding. Streaming responses (more than one body message), event
+    streams and responses that already carry a Content-Encoding are passed through.
+    """
+
+    def __init__(self, app, path_prefix: str = "/", minimum_size: int = MIN_COMPRESS_SIZE):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        coding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                response_headers = dict(message.get("headers") or [])
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in response_headers
+                    or content_type.startswith(UNCOMPRESSED_TYPES)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if start_message is not None:
+                start, start_message = start_message, None
+                if message.get("more_body", False) or len(body) < self.minimum_size:
+                    # Streaming or too small: send as is
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressed = compress_body(body, coding)
+                response_headers = [
+                    (name, value) for name, value in start.get("headers", [])
+                    if name.lower() not in (b"content-length", b"vary")
+                ]
+                vary = dict(start.get("headers", [])).get(b"vary")
+                response_headers += [
+                    (b"content-encoding", coding.encode()),
+                    (b"content-length", str(len(compressed)).encode()),
+                    (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+                ]
+                await send({**start, "headers": response_headers})
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -1,19 +1,98 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # API Settings
     API_TITLE: str = "Agentic Mindmap API"
     API_VERSION: str = "1.0.0"
+    EVENT_LOOP_LAG_INTERVAL_SECONDS: float = 0.25  # 0 disables event loop lag monitoring
+    JOB_DISCONNECT_POLL_SECONDS: float = 1.0  # How often running uploads check whether their client is still connected
     
     # File Upload Settings
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
     UPLOAD_DIR: str = "uploads"
+    OUTPUT_DIR: str = "output"
+    
+    # Storage Lifecycle Settings (None disables a limit; the janitor only runs when one is set.
+    # Exports in output/ are served by /api/get-graph, expiring them removes those graphs)
+    STORAGE_JANITOR_INTERVAL_SECONDS: float = 300
+    UPLOAD_TTL_SECONDS: Optional[float] = None
+    UPLOAD_QUOTA_BYTES: Optional[int] = None
+    OUTPUT_TTL_SECONDS: Optional[float] = None
+    OUTPUT_QUOTA_BYTES: Optional[int] = None
+    EXPORT_FORMAT: str = "mmx"  # "mmx" (section-indexed, sections readable independently) or "json"
+    EXPORT_PRETTY_JSON: bool = False  # Indented exports are ~30% larger (json format only)
+    
+    # Deployment Settings ("inline": uploads are processed by the API process; "queue": API workers
+    # enqueue them for processing workers started with `python -m app.worker`)
+    PROCESSING_MODE: str = "inline"
+    SHARED_STATE_PATH: str = "data/shared_state.sqlite3"  # Queue, events, caches and LLM budget (queue mode)
+    WORKER_CONCURRENCY: int = 2  # Jobs processed at once by each processing worker
+    JOB_LEASE_SECONDS: float = 30.0  # A running job is retried by another worker when its lease expires
+    JOB_HEARTBEAT_SECONDS: float = 2.0  # Lease renewal (and cancellation check) interval
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_QUEUE_POLL_SECONDS: float = 0.25
+    JOB_RETENTION_SECONDS: float = 24 * 3600  # Finished jobs, cached results and checkpoints
+    LLM_GLOBAL_CONCURRENCY: Optional[int] = None  # Concurrent LLM calls across all processing workers
     
     # PDF Processing Settings
     PDF_DPI: int = 300
     PDF_MAX_PAGES: Optional[int] = None
     
+    # LLM Client Settings
+    LLM_MODEL: str = "gpt-4o"
+    LLM_MAX_TOKENS: int = 4095
+    OPENAI_BASE_URL: Optional[str] = None  # e.g. a local OpenAI-compatible mock server
+    LLM_POOL_SIZE: int = 32  # Max (and keep-alive) connections per process
+    LLM_KEEPALIVE_SECONDS: float = 60.0
+    LLM_HTTP2: bool = False  # Requires the 'h2' package
+    LLM_CONNECT_TIMEOUT: float = 10.0
+    LLM_POOL_TIMEOUT: float = 30.0  # Max wait for a free pooled connection
+    LLM_CALL_TIMEOUT: float = 120.0  # Per-call timeout
+    LLM_MAX_RETRIES: int = 2
+    LLM_WARM_CONNECTIONS: int = 4  # Connections opened at startup (at most LLM_POOL_SIZE)
+    LLM_STRUCTURED_OUTPUT: bool = True  # Schema-constrained JSON for topic and graph replies (json_schema response format)
+    LLM_STREAM_OUTPUT: bool = True  # Stream topic and graph replies and parse them as they arrive
+    
+    # Model Routing Settings (simple calls go to a cheaper model, escalated on invalid output)
+    LLM_SMALL_MODEL: Optional[str] = None  # e.g. "gpt-4o-mini"; None sends every call to LLM_MODEL
+    LLM_ROUTING_THRESHOLD: float = 0.35  # Calls scoring below this complexity (0-1) use the small model
+    
+    # LLM Scheduling Settings (fair sharing of model calls between jobs and tenants)
+    LLM_MAX_CONCURRENCY: Optional[int] = None  # Concurrent calls per process (defaults to LLM_POOL_SIZE)
+    LLM_MAX_JOB_SHARE: float = 0.5  # Share of the capacity one job holds while others wait
+    LLM_TENANT_WEIGHTS: Dict[str, float] = {}  # e.g. {"team-a": 2} (JSON in the environment)
+    
+    # Graph Builder Prompt Settings
+    GRAPH_PROMPT_COMPACT: bool = True  # Compact graph + additions-only replies instead of full JSON round-trips
+    GRAPH_PROMPT_TOKEN_BUDGET: int = 6000  # Max tokens of an enrichment prompt
+    
+    # Preflight and Admission Settings (uploads are estimated before processing, then admitted, queued or rejected)
+    LLM_INPUT_COST_PER_MTOK: float = 2.50  # USD per million input tokens of LLM_MODEL
+    LLM_OUTPUT_COST_PER_MTOK: float = 10.00  # USD per million output tokens of LLM_MODEL
+    ADMISSION_MAX_INFLIGHT_CALLS: Optional[int] = None  # Predicted LLM calls of admitted jobs (defaults to 8x the scheduler capacity, or 8x LLM_GLOBAL_CONCURRENCY in queue mode)
+    ADMISSION_MAX_WAIT_SECONDS: float = 120.0  # Uploads predicted to wait longer for admission are rejected
+    ADMISSION_MAX_COST_USD: Optional[float] = None  # Uploads predicted to cost more are rejected
+    
+    # Deadline Settings (uploads with deadline_seconds degrade their processing to meet it)
+    DEADLINE_SAFETY_MARGIN: float = 0.2  # Share of the remaining time kept in reserve when planning
+    DEADLINE_DEFAULT_CALL_SECONDS: float = 6.0  # Assumed LLM call latency until calls have been measured
+    DEADLINE_RENDER_SCALE: float = 0.6  # Page render scale under reduced resolution (1 = 72 DPI), sent as low-detail images
+    DEADLINE_MIN_PAGES: int = 4  # Page sampling keeps at least this many pages
+    
+    # Pipelining Settings (topics and graph built while pages are still being summarized)
+    PIPELINE_PROGRESSIVE: bool = False  # Segment topics as ordered page summaries arrive and build each closed topic right away
+    PROGRESSIVE_SEGMENT_PAGES: int = 4  # New in-order summaries that trigger a segmentation call
+    PROGRESSIVE_MAX_TOPIC_PAGES: int = 12  # An open topic this long is closed even without a clear boundary
+    
+    # Knowledge Graph Settings (cross-document merging)
+    KNOWLEDGE_GRAPH_PATH: str = "output/knowledge_graph.jsonl"
+    KNOWLEDGE_GRAPH_DEDUP_THRESHOLD: float = 0.8
+    KNOWLEDGE_GRAPH_LINK_THRESHOLD: float = 0.5
+    
+    # Profiling Settings (opt-in per job)
+    PROFILE_SAMPLE_INTERVAL_SECONDS: float = 0.005
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
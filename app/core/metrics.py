@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# Samples kept per timing series to compute percentiles
+TIMING_WINDOW = 1000
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, object]) -> _Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_key(key: _Key) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class MetricsRegistry:
+    """
+    Minimal thread-safe, in-process metrics registry: counters, gauges and timings
+    (count/sum/max plus percentiles over a sliding window of recent samples).
+    Series are identified by a name and optional labels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[_Key, float] = defaultdict(float)
+        self._gauges: Dict[_Key, float] = {}
+        self._timings: Dict[_Key, dict] = {}
+        self._observers: List[Callable[[str, float, Dict[str, str]], None]] = []
+
+    def add_observer(self, observer: Callable[[str, float, Dict[str, str]], None]) -> None:
+        """
+        Also pass every timing sample to `observer(name, value, labels)`, e.g. to
+        share samples with other processes.
+        """
+        self._observers.append(observer)
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        with self._lock:
+            self._counters[_key(name, labels)] += value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            timing = self._timings.get(_key(name, labels))
+            if timing is None:
+                timing = self._timings[_key(name, labels)] = {
+                    "count": 0, "sum": 0.0, "max": 0.0, "samples": deque(maxlen=TIMING_WINDOW)
+                }
+            timing["count"] += 1
+            timing["sum"] += value
+            timing["max"] = max(timing["max"], value)
+            timing["samples"].append(value)
+        for observer in self._observers:
+            observer(name, value, {k: str(v) for k, v in labels.items()})
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0.0)
+
+    def timing_percentile(self, name: str, q: float, **labels) -> Optional[float]:
+        """
+        Percentile q (0-1) of the recent samples of a timing, None if it has none.
+        """
+        with self._lock:
+            timing = self._timings.get(_key(name, labels))
+            if not timing or not timing["samples"]:
+                return None
+            return _percentile(sorted(timing["samples"]), q)
+
+    def snapshot(self) -> dict:
+        """
+        Return all series as a JSON-serializable dict.
+        """
+        with self._lock:
+            timings = {}
+            for key, timing in self._timings.items():
+                samples: Deque[float] = timing["samples"]
+                ordered = sorted(samples)
+                timings[_format_key(key)] = {
+                    "count": timing["count"],
+                    "avg": round(timing["sum"] / timing["count"], 6),
+                    "p50": round(_percentile(ordered, 0.50), 6),
+                    "p95": round(_percentile(ordered, 0.95), 6),
+                    "p99": round(_percentile(ordered, 0.99), 6),
+                    "max": round(timing["max"], 6),
+                }
+            return {
+                "counters": {_format_key(k): v for k, v in sorted(self._counters.items())},
+                "gauges": {_format_key(k): v for k, v in sorted(self._gauges.items())},
+                "timings": dict(sorted(timings.items())),
+            }
+
+
+metrics = MetricsRegistry()
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """
+    Measure how late the event loop wakes up from a sleep (time during which it was
+    blocked by synchronous work) and record it as `event_loop_lag_seconds`.
+    """
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        metrics.observe("event_loop_lag_seconds", max(0.0, time.perf_counter() - started - interval))
@@ -1,11 +1,14 @@
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+from enum import Enum
 
 class GraphNode(BaseModel):
     id: str = Field(..., description="Node ID")
     title: str = Field(..., description="Node title")
     type: str = Field(..., description="Node type (central or subnode)")
+    x: Optional[float] = Field(None, description="Precomputed layout x coordinate")
+    y: Optional[float] = Field(None, description="Precomputed layout y coordinate")
 
 class GraphEdge(BaseModel):
     id: str = Field(..., description="Edge ID")
@@ -26,17 +29,30 @@ class ProcessingMetadata(BaseModel):
     total_topics: int = Field(..., description="Total topics identified")
     total_nodes: int = Field(..., description="Total nodes in graph")
     total_edges: int = Field(..., description="Total edges in graph")
-    export_file_path: str = Field(default="", description="Path to exported detailed results")
+    export_file_path: str = Field(default="", description="Filename of the exported detailed results")
+    deadline_seconds: Optional[float] = Field(None, description="Time budget requested for the job")
+    elapsed_seconds: Optional[float] = Field(None, description="Processing time against the deadline")
+    deadline_met: Optional[bool] = Field(None, description="Whether processing finished within the deadline")
+    degradations: Optional[List[str]] = Field(None, description="Degradations applied to meet the deadline")
+    degradation_details: Optional[Dict[str, Dict[str, Any]]] = Field(None, description="Parameters of the degradations (e.g. pages sampled)")
+    predicted_seconds: Optional[float] = Field(None, description="Processing duration predicted by the preflight estimate")
+    predicted_cost_usd: Optional[float] = Field(None, description="LLM cost predicted by the preflight estimate")
 
 class TopicInfo(BaseModel):
     topic_title: str = Field(..., description="Topic title")
     slide_numbers: List[int] = Field(..., description="Slide numbers for this topic")
-    summaries: List[str] = Field(..., description="Summaries of slides in this topic")
+    summaries: Optional[List[str]] = Field(None, description="Summaries of slides in this topic (omitted when not requested)")
+
+class ResponseView(str, Enum):
+    full = "full"          # graph, metadata and topics
+    graph = "graph"        # graph and metadata
+    topics = "topics"      # topics and metadata
+    metadata = "metadata"  # metadata only
 
 class PDFProcessingResult(BaseModel):
-    graph: GraphData = Field(..., description="Mind map graph data")
+    graph: Optional[GraphData] = Field(None, description="Mind map graph data (omitted by the topics and metadata views)")
     metadata: ProcessingMetadata = Field(..., description="Processing metadata")
-    topics: List[TopicInfo] = Field(default_factory=list, description="Topic information")
+    topics: Optional[List[TopicInfo]] = Field(None, description="Topic information (omitted by the graph and metadata views)")
 
 class PDFUploadResponse(BaseModel):
     success: bool = Field(..., description="Whether the upload was successful")
@@ -44,8 +60,14 @@ class PDFUploadResponse(BaseModel):
     filename: str = Field(..., description="Original filename")
     saved_filename: str = Field(..., description="Saved filename with timestamp")
     file_size: int = Field(..., description="File size in bytes")
-    file_path: str = Field(..., description="Path where file is saved")
     processing_result: Optional[PDFProcessingResult] = Field(None, description="Results from PDF processing")
 
+class KnowledgeGraphMergeResult(BaseModel):
+    source_id: str = Field(..., description="Identifier of the merged document")
+    nodes_added: int = Field(..., description="Nodes added to the knowledge graph")
+    nodes_deduplicated: int = Field(..., description="Nodes matched to existing knowledge graph nodes")
+    edges_added: int = Field(..., description="Edges added from the document's graph")
+    cross_links_added: int = Field(..., description="Cross-document links created")
+
 class ErrorResponse(BaseModel):
     detail: str = Field(..., description="Error message")
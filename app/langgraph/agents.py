@@ -1,34 +1,43 @@
 from app.langgraph.user_state import userState
 from langchain_core.messages import HumanMessage,  SystemMessage
 from langgraph.graph import StateGraph, END
-from app.langgraph.prompts import systemPrompt_PagesSummary, messagePrompt_PagesSummary, systemPrompt_TopicExtraction, messagePrompt_TopicExtraction, systemPrompt_GraphBuilder, messagePrompt_GraphBuilder_Initial, messagePrompt_GraphBuilder_Enrichment
+from app.langgraph.prompts import systemPrompt_PagesSummary, messagePrompt_PagesSummary, systemPrompt_TopicExtraction, messagePrompt_TopicExtraction, systemPrompt_GraphBuilder, systemPrompt_GraphBuilder_Incremental, messagePrompt_GraphBuilder_Initial, messagePrompt_GraphBuilder_Enrichment, messagePrompt_GraphBuilder_CrossLinks
+from app.langgraph.prompt_budget import build_enrichment_prompt, apply_graph_additions, compact_graph, count_tokens
+from app.core.config import settings
+from app.core.metrics import metrics
 from langsmith import trace
 import logging
-from langchain_openai import ChatOpenAI
-from app.langgraph.functions import pdf_page_to_base64, number_of_pages_in_pdf
+from app.langgraph.functions import pdf_page_to_base64, number_of_pages_in_pdf, page_features
+from app.langgraph.llm_client import get_chat_model
+from app.langgraph.model_router import invoke_routed, page_complexity_score, prompt_complexity_score
+from app.langgraph.topic_segmentation import TopicSegmenter
+from app.langgraph.structured_output import JSONItemStream, extract_json_text, graph_response_format, topics_response_format
+from app.services.graph_layout import compute_layout
+from app.services.progress import job_events, graph_delta
+from app.utils.export_format import EXTENSION, write_sectioned_export
+from app.services.profiling import profile_span
+from app.services.scheduler import expedite, get_scheduler
+from app.services.deadline import current_deadline, estimated_call_seconds, plan_pages
+from app.services.shared_store import content_key, get_shared_store
 import asyncio
 import json
 import os
 from datetime import datetime
+from functools import lru_cache
 
 
-model_4o = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0,
-    max_tokens=4095,
-    tags=["mindmap"]
-)
-
 logger = logging.getLogger(__name__)
 
-def save_final_system_output(state: dict, output_dir: str = "output") -> str:
+
+def save_final_system_output(state: dict, output_dir: str = settings.OUTPUT_DIR) -> str:
     """
-    Save the complete final output of the system to a JSON file.
+    Save the complete final output of the system to a file (section-indexed .mmx,
+    or JSON if EXPORT_FORMAT is "json").
     This includes all processing results: page summaries, topics, and the final graph.
     
     Args:
         state: Complete user state with all processing results
-        output_dir: Directory to save the file (default: "output")
+        output_dir: Directory to save the file (default: settings.OUTPUT_DIR)
     
     Returns:
         str: Path to the saved file
@@ -40,7 +49,8 @@ def save_final_system_output(state: dict, output_dir: str = "output") -> str:
         # Generate filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         thread_id = state.get('thread_id', 'unknown')
-        filename = f"system_output_{thread_id}_{timestamp}.json"
+        extension = ".json" if settings.EXPORT_FORMAT == "json" else EXTENSION
+        filename = f"system_output_{thread_id}_{timestamp}{extension}"
         filepath = os.path.join(output_dir, filename)
         
         # Prepare the complete system output
@@ -52,7 +62,8 @@ def save_final_system_output(state: dict, output_dir: str = "output") -> str:
                 "total_pages": state.get('nb_pages', 0),
                 "total_topics": state.get('nb_topics', 0),
                 "graph_nodes": len(state.get('graph', {}).get('nodes', [])),
-                "graph_edges": len(state.get('graph', {}).get('edges', []))
+                "graph_edges": len(state.get('graph', {}).get('edges', [])),
+                "prompt_token_stats": state.get('prompt_token_stats', [])
             },
             "processing_results": {
                 "page_summaries": state.get('page_summaries', []),
@@ -61,13 +72,19 @@ def save_final_system_output(state: dict, output_dir: str = "output") -> str:
                     "topic_details": state.get('pages_topics', [])
                 },
                 "final_graph": state.get('graph', {}),
+                "layout": state.get('layout', {}),
                 "graph_building_complete": state.get('graph_building_complete', False)
             }
         }
         
-        # Save to JSON file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(system_output, f, indent=2, ensure_ascii=False)
+        if extension == EXTENSION:
+            write_sectioned_export(system_output, filepath)
+        else:
+            with open(filepath, 'w', encoding='utf-8') as f:
+                if settings.EXPORT_PRETTY_JSON:
+                    json.dump(system_output, f, indent=2, ensure_ascii=False)
+                else:
+                    json.dump(system_output, f, separators=(',', ':'), ensure_ascii=False)
         
         logger.info(f"Complete system output saved to: {filepath}")
         return filepath
@@ -76,33 +93,100 @@ def save_final_system_output(state: dict, output_dir: str = "output") -> str:
         logger.error(f"Error saving system output to JSON: {str(e)}")
         return None
 
-builder = StateGraph(userState)
+def _parse_json_object(response_text: str):
+    try:
+        result = json.loads(extract_json_text(response_text))
+    except json.JSONDecodeError:
+        return None
+    return result if isinstance(result, dict) else None
+
+
+def is_valid_summary(response_text: str) -> bool:
+    return len(response_text.strip()) >= 20
+
+
+def is_valid_topics(response_text: str) -> bool:
+    result = _parse_json_object(response_text)
+    topics = result.get('topics') if result else None
+    return bool(topics) and isinstance(topics, list) and all(
+        isinstance(t, dict) and t.get('topic_title') and isinstance(t.get('slide_numbers'), list) and isinstance(t.get('summaries'), list)
+        for t in topics
+    )
+
+
+def merge_partial_graph(graph: dict, partial: dict) -> dict:
+    """
+    Add the nodes and edges recovered from a cut-off full-graph reply to the
+    current graph, so nodes missing from the reply are not lost. Edges pointing
+    to nodes that were never emitted are dropped.
+    """
+    nodes = {n['id']: n for n in graph.get('nodes', [])}
+    for node in partial.get('nodes', []):
+        if isinstance(node, dict) and node.get('id') and node.get('title'):
+            nodes.setdefault(node['id'], node)
+    edges = {e['id']: e for e in graph.get('edges', [])}
+    for edge in partial.get('edges', []):
+        if isinstance(edge, dict) and edge.get('id') and edge.get('from') in nodes and edge.get('to') in nodes:
+            edges.setdefault(edge['id'], edge)
+    return {"nodes": list(nodes.values()), "edges": list(edges.values())}
+
+
+def is_valid_graph(response_text: str) -> bool:
+    result = _parse_json_object(response_text)
+    return bool(result) and isinstance(result.get('nodes'), list) and isinstance(result.get('edges', []), list) and all(
+        isinstance(n, dict) and n.get('id') and n.get('title') for n in result['nodes']
+    )
 
 # Helper function for processing individual pages asynchronously
-async def process_single_page(pdf_path: str, page_num: int) -> dict:
+async def process_single_page(pdf_path: str, page_num: int, job_id: str = None, checkpoint_key: str = None, low_res: bool = False) -> dict:
     """
     Process a single page asynchronously.
     Returns a dictionary with page_number and summary.
+    Publishes a "page_summary" progress event for job_id when done.
+    With a checkpoint_key (queue mode), summaries are saved to and reused from the shared store.
+    With low_res (deadline degradation), the page is rendered at DEADLINE_RENDER_SCALE and sent as a low-detail image.
     """
+    store = get_shared_store() if checkpoint_key else None
     try:
         logger.info(f"Processing page {page_num}")
         
-        # Convert page to base64
-        base64_image = pdf_page_to_base64(pdf_path, page_num)
+        if store is not None:
+            summary = await asyncio.to_thread(store.page_summary, checkpoint_key, page_num)
+            if summary is not None:
+                metrics.increment("page_checkpoint_hits")
+                page_summary = {"page_number": page_num, "summary": summary}
+                job_events.publish(job_id, "page_summary", page_summary)
+                return page_summary
         
-        # Prepare content for the model
-        content = []
-        content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}})
+        # The complexity score only matters when simple slides can go to the small model
+        score = 1.0
+        if settings.LLM_SMALL_MODEL:
+            with profile_span("page_features", page=page_num):
+                score = page_complexity_score(await asyncio.to_thread(page_features, pdf_path, page_num))
         
-        # Create messages
-        messages = [
-            SystemMessage(content=systemPrompt_PagesSummary()),
-            HumanMessage(content=content), 
-            HumanMessage(content=messagePrompt_PagesSummary())
-        ]
+        async def build_messages():
+            # Convert page to base64 (in a thread, once the call has its scheduler slot)
+            with profile_span("render_page", page=page_num):
+                base64_image = await asyncio.to_thread(
+                    pdf_page_to_base64, pdf_path, page_num, settings.DEADLINE_RENDER_SCALE if low_res else 1
+                )
+            
+            # Prepare content for the model
+            content = []
+            image_url = {"url": f"data:image/jpeg;base64,{base64_image}"}
+            if low_res:
+                image_url["detail"] = "low"
+            content.append({"type": "image_url", "image_url": image_url})
+            
+            # Create messages
+            return [
+                SystemMessage(content=systemPrompt_PagesSummary()),
+                HumanMessage(content=content), 
+                HumanMessage(content=messagePrompt_PagesSummary())
+            ]
         
-        # Get model response asynchronously
-        response = await model_4o.ainvoke(messages)
+        # Get model response asynchronously (simple slides go to the small model when routing is enabled)
+        response = await invoke_routed(build_messages, "page_summary", score, validate=is_valid_summary)
         
         page_summary = {
             "page_number": page_num,
@@ -110,8 +194,15 @@ async def process_single_page(pdf_path: str, page_num: int) -> dict:
         }
         
         logger.info(f"Successfully processed page {page_num}")
+        if store is not None and not low_res:
+            await asyncio.to_thread(store.store_page_summary, checkpoint_key, page_num, response.content)
+        job_events.publish(job_id, "page_summary", page_summary)
         return page_summary
         
+    except asyncio.CancelledError:
+        # Job cancelled: this page's render and model call are skipped
+        metrics.increment("pages_cancelled")
+        raise
     except Exception as e:
         logger.error(f"Error processing page {page_num}: {str(e)}")
         return {
@@ -121,7 +212,7 @@ async def process_single_page(pdf_path: str, page_num: int) -> dict:
 
 # Nodes Definitions
 async def get_Pages_Summary(state:userState)->userState: 
-    with trace(name="get_PagesPdf"):
+    with trace(name="get_PagesPdf"), profile_span("node.get_pages_summary"):
         logger.info("Node: get_PagesPdf")
         '''
         Process all pages from the PDF and generate summaries.
@@ -137,11 +228,18 @@ async def get_Pages_Summary(state:userState)->userState:
         
         pages = state['nb_pages']
         logger.info(f"Starting parallel processing of {pages} pages")
+        job_events.publish(state['thread_id'], "pages_started", {"total_pages": pages})
+        
+        # Pages already summarized by an earlier attempt of this job are reused (queue mode)
+        checkpoint_key = await asyncio.to_thread(content_key, state['path']) if get_shared_store() else None
+        
+        # Under a deadline, pages may be rendered at a lower resolution or sampled
+        page_numbers, low_res = plan_pages(pages, get_scheduler().capacity)
         
         # Create tasks for all pages to process them in parallel
         tasks = []
-        for page_num in range(1, pages + 1):
-            task = process_single_page(state['path'], page_num)
+        for page_num in page_numbers:
+            task = process_single_page(state['path'], page_num, state['thread_id'], checkpoint_key, low_res)
             tasks.append(task)
         
         # Process all pages in parallel using asyncio.gather
@@ -152,9 +250,9 @@ async def get_Pages_Summary(state:userState)->userState:
             valid_summaries = []
             for i, result in enumerate(page_summaries):
                 if isinstance(result, Exception):
-                    logger.error(f"Page {i+1} failed with exception: {str(result)}")
+                    logger.error(f"Page {page_numbers[i]} failed with exception: {str(result)}")
                     valid_summaries.append({
-                        "page_number": i + 1,
+                        "page_number": page_numbers[i],
                         "summary": f"Error processing page: {str(result)}"
                     })
                 else:
@@ -174,7 +272,7 @@ async def get_Pages_Summary(state:userState)->userState:
 
 # New Node: Extract Topics from All Summaries
 async def extract_Topics_From_Summaries(state: userState) -> userState:
-    with trace(name="extract_Topics"):
+    with trace(name="extract_Topics"), profile_span("node.extract_topics"):
         logger.info("Node: extract_Topics_From_Summaries")
         
         try:
@@ -201,19 +299,33 @@ async def extract_Topics_From_Summaries(state: userState) -> userState:
             
             # Get LLM response
             logger.info(f"Sending {len(page_summaries)} summaries to LLM for topic extraction")
-            response = await model_4o.ainvoke(messages)
+            score = prompt_complexity_score(count_tokens(summaries_text))
+            # Each topic is published as soon as it is complete in the streamed reply
+            stream = JSONItemStream(on_item=lambda key, item: job_events.publish(state['thread_id'], "topic", {
+                'topic_title': item.get('topic_title'), 'slide_numbers': item.get('slide_numbers', [])
+            }) if key == 'topics' else None)
+            response = await invoke_routed(
+                messages, "topics", score,
+                validate=is_valid_topics,
+                response_format=topics_response_format() if settings.LLM_STRUCTURED_OUTPUT else None,
+                stream=stream
+            )
             
-            # Parse the JSON response
+            # Parse the JSON response (a cut-off reply keeps the topics completed before the cut)
             try:
-                # Extract JSON from response (handle potential markdown code blocks)
-                response_text = response.content.strip()
-                if response_text.startswith("```json"):
-                    response_text = response_text.split("```json")[1].split("```")[0].strip()
-                elif response_text.startswith("```"):
-                    response_text = response_text.split("```")[1].split("```")[0].strip()
-                
-                result = json.loads(response_text)
+                with profile_span("parse_json", step="topics"):
+                    result = stream.parse(response.content, "topics")
                 topics_data = result.get('topics', [])
+                if stream.recovered:
+                    # Slides of the topics lost in the cut-off are kept together instead of dropped
+                    covered = {n for topic in topics_data for n in topic.get('slide_numbers', [])}
+                    remaining = [ps for ps in page_summaries if ps['page_number'] not in covered]
+                    if remaining:
+                        topics_data.append({
+                            'topic_title': "Other Content",
+                            'slide_numbers': [ps['page_number'] for ps in remaining],
+                            'summaries': [ps['summary'] for ps in remaining]
+                        })
                 
                 # Extract topic names
                 name_topics = [topic['topic_title'] for topic in topics_data]
@@ -238,6 +350,9 @@ async def extract_Topics_From_Summaries(state: userState) -> userState:
                 state['nb_topics'] = len(name_topics)
                 
                 logger.info(f"Successfully extracted {len(name_topics)} topics: {name_topics}")
+                job_events.publish(state['thread_id'], "topics", {
+                    "topics": [{'topic_title': t['topic_title'], 'slide_numbers': t['slide_numbers']} for t in pages_topics]
+                })
                 
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse JSON response: {str(e)}")
@@ -250,6 +365,9 @@ async def extract_Topics_From_Summaries(state: userState) -> userState:
                     'summaries': [ps['summary'] for ps in page_summaries]
                 }]
                 state['nb_topics'] = 1
+                job_events.publish(state['thread_id'], "topics", {
+                    "topics": [{'topic_title': "Main Content", 'slide_numbers': state['pages_topics'][0]['slide_numbers']}]
+                })
                 
         except Exception as e:
             logger.error(f"Error in topic extraction: {str(e)}")
@@ -257,9 +375,182 @@ async def extract_Topics_From_Summaries(state: userState) -> userState:
             
     return state
 
+async def add_topic_to_graph(state: userState, i: int, topic: dict, id_map: dict = None, nb_topics: int = None) -> dict:
+    """
+    Graph building step for one topic: create the initial graph (first topic) or
+    enrich state['graph'] with the topic, and publish the resulting graph_delta.
+    nb_topics is None while the number of topics is not known yet (progressive pipeline).
+    
+    Returns:
+        The ID map of the compact prompt, passed to the next step
+    """
+    topic_title = topic['topic_title']
+    topic_summaries = topic['summaries']
+    
+    logger.info(f"Processing topic {i + 1}/{nb_topics or '?'}: {topic_title}")
+    logger.info(f"Current graph has {len(state['graph'].get('nodes', []))} nodes and {len(state['graph'].get('edges', []))} edges")
+    
+    # Prepare messages for the LLM
+    if i == 0:
+        # First topic - create initial graph
+        logger.info("Creating initial graph for first topic")
+        messages = [
+            SystemMessage(content=systemPrompt_GraphBuilder()),
+            HumanMessage(content=messagePrompt_GraphBuilder_Initial(topic_title, topic_summaries))
+        ]
+    elif settings.GRAPH_PROMPT_COMPACT:
+        # Subsequent topics - send a token-budgeted compact graph, get back only the additions
+        logger.info(f"Enriching existing graph with topic: {topic_title} (compact prompt)")
+        prompt, id_map, token_stats = build_enrichment_prompt(
+            topic_title, topic_summaries, state['graph'], settings.GRAPH_PROMPT_TOKEN_BUDGET
+        )
+        state['prompt_token_stats'].append({"topic_index": i + 1, **token_stats})
+        logger.info(
+            f"Enrichment prompt tokens: {token_stats['full_prompt_tokens']} (full JSON) -> "
+            f"{token_stats['prompt_tokens']} (compact, {token_stats['nodes_included']}/{token_stats['nodes_total']} nodes)"
+        )
+        messages = [
+            SystemMessage(content=systemPrompt_GraphBuilder_Incremental()),
+            HumanMessage(content=prompt)
+        ]
+    else:
+        # Subsequent topics - enrich existing graph
+        logger.info(f"Enriching existing graph with topic: {topic_title}")
+        prompt = messagePrompt_GraphBuilder_Enrichment(topic_title, topic_summaries, state['graph'])
+        prompt_tokens = count_tokens(prompt)
+        state['prompt_token_stats'].append({
+            "topic_index": i + 1,
+            "full_prompt_tokens": prompt_tokens,
+            "prompt_tokens": prompt_tokens,
+            "nodes_total": len(state['graph'].get('nodes', [])),
+            "nodes_included": len(state['graph'].get('nodes', []))
+        })
+        messages = [
+            SystemMessage(content=systemPrompt_GraphBuilder()),
+            HumanMessage(content=prompt)
+        ]
+    
+    # Get LLM response (small initial graphs and enrichments go to the small model when routing is enabled)
+    score = prompt_complexity_score(sum(count_tokens(m.content) for m in messages[1:]))
+    # New nodes are published as soon as they are complete in the streamed reply
+    stream = JSONItemStream(on_item=lambda key, item, i=i, topic_title=topic_title: job_events.publish(state['thread_id'], "graph_node", {
+        'topic_index': i + 1, 'topic_title': topic_title, 'title': item.get('title'), 'type': item.get('type')
+    }) if key == 'nodes' else None)
+    response = await invoke_routed(
+        messages, "graph", score,
+        validate=is_valid_graph,
+        response_format=graph_response_format() if settings.LLM_STRUCTURED_OUTPUT else None,
+        stream=stream
+    )
+    
+    # Parse the JSON response
+    try:
+        with profile_span("parse_json", step="graph", topic_index=i + 1):
+            updated_graph = stream.parse(response.content, "graph")
+        if i > 0 and settings.GRAPH_PROMPT_COMPACT:
+            updated_graph = apply_graph_additions(state['graph'], updated_graph, id_map)
+        elif stream.recovered:
+            updated_graph = merge_partial_graph(state['graph'], updated_graph)
+        
+        # Stream only what changed since the previous step
+        job_events.publish(state['thread_id'], "graph_delta", {
+            "topic_index": i + 1,
+            "total_topics": nb_topics,
+            "topic_title": topic_title,
+            **graph_delta(state['graph'], updated_graph)
+        })
+        
+        # Update the graph with the new enriched version
+        state['graph'] = updated_graph
+        
+        logger.info(f"Successfully processed topic {i + 1}: {topic_title}")
+        logger.info(f"Updated graph now has {len(updated_graph.get('nodes', []))} nodes and {len(updated_graph.get('edges', []))} edges")
+        
+        # Log the sequential progress
+        if i == 0:
+            logger.info("✅ Initial graph created")
+        else:
+            logger.info(f"✅ Graph enriched with topic {i + 1}")
+        
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON response for topic {topic_title}: {str(e)}")
+        logger.error(f"Response was: {response.content}")
+    return id_map
+
+
+async def _add_cross_links(state: userState, nb_topics: int) -> None:
+    # One call linking the central nodes of topics built separately
+    deadline = current_deadline()
+    if deadline is not None and deadline.budget() < estimated_call_seconds():
+        deadline.degrade("skipped_cross_links")
+        return
+    central_ids = {n['id'] for n in state['graph'].get('nodes', []) if n.get('type') == 'central'}
+    if len(central_ids) < 2:
+        return
+    graph_text, id_map = compact_graph(state['graph'], central_ids)
+    messages = [
+        SystemMessage(content=systemPrompt_GraphBuilder_Incremental()),
+        HumanMessage(content=messagePrompt_GraphBuilder_CrossLinks(graph_text))
+    ]
+    response = await invoke_routed(
+        messages, "graph", prompt_complexity_score(count_tokens(graph_text)),
+        validate=is_valid_graph,
+        response_format=graph_response_format() if settings.LLM_STRUCTURED_OUTPUT else None
+    )
+    result = _parse_json_object(response.content)
+    if result is None:
+        logger.error(f"Invalid cross-link reply: {response.content[:200]}")
+        return
+    updated_graph = apply_graph_additions(state['graph'], {"nodes": [], "edges": result.get('edges', [])}, id_map)
+    job_events.publish(state['thread_id'], "graph_delta", {
+        "topic_index": nb_topics,
+        "total_topics": nb_topics,
+        "topic_title": None,
+        **graph_delta(state['graph'], updated_graph)
+    })
+    state['graph'] = updated_graph
+
+async def build_parallel_graph(state: userState, pages_topics: list) -> None:
+    """
+    Deadline degradation of the sequential graph building: the subgraph of each
+    topic is generated concurrently from the initial-graph prompt and merged, then
+    topics are linked by one cross-link call (skipped if the deadline leaves no
+    time for it).
+    """
+    nb_topics = len(pages_topics)
+    
+    async def topic_graph(topic: dict):
+        messages = [
+            SystemMessage(content=systemPrompt_GraphBuilder()),
+            HumanMessage(content=messagePrompt_GraphBuilder_Initial(topic['topic_title'], topic['summaries']))
+        ]
+        response = await invoke_routed(
+            messages, "graph", prompt_complexity_score(count_tokens(messages[1].content)),
+            validate=is_valid_graph,
+            response_format=graph_response_format() if settings.LLM_STRUCTURED_OUTPUT else None
+        )
+        return _parse_json_object(response.content)
+    
+    logger.info(f"Building the graphs of {nb_topics} topics in parallel")
+    results = await asyncio.gather(*[topic_graph(topic) for topic in pages_topics], return_exceptions=True)
+    for i, (topic, result) in enumerate(zip(pages_topics, results)):
+        if isinstance(result, BaseException) or result is None:
+            logger.error(f"Failed to build the graph of topic {topic['topic_title']}: {result}")
+            continue
+        # Subgraphs reuse the same IDs: merged nodes get fresh ones
+        updated_graph = apply_graph_additions(state['graph'], result, {})
+        job_events.publish(state['thread_id'], "graph_delta", {
+            "topic_index": i + 1,
+            "total_topics": nb_topics,
+            "topic_title": topic['topic_title'],
+            **graph_delta(state['graph'], updated_graph)
+        })
+        state['graph'] = updated_graph
+    await _add_cross_links(state, nb_topics)
+
 # Graph Builder Agent - Processes ALL topics sequentially in n iterations
 async def build_mind_map_graph(state: userState) -> userState:
-    with trace(name="build_mind_map_graph"):
+    with trace(name="build_mind_map_graph"), profile_span("node.build_graph"):
         logger.info("Node: build_mind_map_graph - Processing ALL topics sequentially")
         
         try:
@@ -275,62 +566,25 @@ async def build_mind_map_graph(state: userState) -> userState:
             
             # Initialize empty graph
             state['graph'] = {"nodes": [], "edges": []}
+            state['prompt_token_stats'] = []
+            id_map = None
             logger.info(f"Starting sequential graph building with {nb_topics} topics")
             
+            # Not enough time left for one call per topic in sequence: build the topics in parallel
+            deadline = current_deadline()
+            if deadline is not None and (deadline.applied("parallel_graph") or nb_topics * estimated_call_seconds() > deadline.budget()):
+                deadline.degrade("parallel_graph")
+                await build_parallel_graph(state, pages_topics)
+                pages_topics = []
+            
             # Process each topic sequentially (n iterations)
             for i, topic in enumerate(pages_topics):
-                topic_title = topic['topic_title']
-                topic_summaries = topic['summaries']
-                
-                logger.info(f"Processing topic {i + 1}/{nb_topics}: {topic_title}")
-                logger.info(f"Current graph has {len(state['graph'].get('nodes', []))} nodes and {len(state['graph'].get('edges', []))} edges")
-                
-                # Prepare messages for the LLM
-                if i == 0:
-                    # First topic - create initial graph
-                    logger.info("Creating initial graph for first topic")
-                    messages = [
-                        SystemMessage(content=systemPrompt_GraphBuilder()),
-                        HumanMessage(content=messagePrompt_GraphBuilder_Initial(topic_title, topic_summaries))
-                    ]
-                else:
-                    # Subsequent topics - enrich existing graph
-                    logger.info(f"Enriching existing graph with topic: {topic_title}")
-                    messages = [
-                        SystemMessage(content=systemPrompt_GraphBuilder()),
-                        HumanMessage(content=messagePrompt_GraphBuilder_Enrichment(topic_title, topic_summaries, state['graph']))
-                    ]
-                
-                # Get LLM response
-                response = await model_4o.ainvoke(messages)
-                
-                # Parse the JSON response
                 try:
-                    response_text = response.content.strip()
-                    if response_text.startswith("```json"):
-                        response_text = response_text.split("```json")[1].split("```")[0].strip()
-                    elif response_text.startswith("```"):
-                        response_text = response_text.split("```")[1].split("```")[0].strip()
-                    
-                    updated_graph = json.loads(response_text)
-                    
-                    # Update the graph with the new enriched version
-                    state['graph'] = updated_graph
-                    
-                    logger.info(f"Successfully processed topic {i + 1}: {topic_title}")
-                    logger.info(f"Updated graph now has {len(updated_graph.get('nodes', []))} nodes and {len(updated_graph.get('edges', []))} edges")
-                    
-                    # Log the sequential progress
-                    if i == 0:
-                        logger.info("✅ Initial graph created")
-                    else:
-                        logger.info(f"✅ Graph enriched with topic {i + 1}")
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse JSON response for topic {topic_title}: {str(e)}")
-                    logger.error(f"Response was: {response.content}")
-                    # Continue with next topic even if this one failed
-                    continue
+                    id_map = await add_topic_to_graph(state, i, topic, id_map, nb_topics)
+                except asyncio.CancelledError:
+                    # Job cancelled: this and the remaining topics are not built
+                    metrics.increment("graph_steps_cancelled", nb_topics - i)
+                    raise
             
             # Mark graph building as complete
             state['graph_building_complete'] = True
@@ -342,6 +596,102 @@ async def build_mind_map_graph(state: userState) -> userState:
             
     return state
 
+async def _build_closed_topics(state: userState, closed_topics: asyncio.Queue) -> None:
+    # Graph building side of the progressive pipeline: topics are built as they are closed (None ends)
+    state['graph'] = {"nodes": [], "edges": []}
+    state['prompt_token_stats'] = []
+    id_map = None
+    i = 0
+    while True:
+        topic = await closed_topics.get()
+        if topic is None:
+            break
+        try:
+            with expedite():
+                id_map = await add_topic_to_graph(state, i, topic, id_map)
+        except asyncio.CancelledError:
+            metrics.increment("graph_steps_cancelled", 1 + closed_topics.qsize())
+            raise
+        except Exception as e:
+            # Same as the staged pipeline: keep the graph built so far
+            logger.error(f"Error in progressive graph building: {str(e)}")
+            break
+        i += 1
+
+# Progressive pipeline - summaries, topic segmentation and graph building overlap
+async def progressive_pipeline(state: userState) -> userState:
+    with trace(name="progressive_pipeline"), profile_span("node.progressive_pipeline"):
+        logger.info("Node: progressive_pipeline")
+        '''
+        Same result as get_pages_summary -> extract_topics -> build_graph, without the
+        barriers between them: summaries are segmented into topics as they arrive in
+        slide order, and each closed topic is added to the graph right away.
+        Topics are runs of consecutive slides.
+        '''
+        state['nb_pages'] = number_of_pages_in_pdf(state['path'])
+
+        if state['nb_pages'] <= 0: 
+            logger.error("Error: The ppt file is empty or does not exist.")
+            raise ValueError("The ppt file is empty or does not exist.")
+        
+        pages = state['nb_pages']
+        thread_id = state['thread_id']
+        logger.info(f"Starting progressive processing of {pages} pages")
+        job_events.publish(thread_id, "pages_started", {"total_pages": pages})
+        checkpoint_key = await asyncio.to_thread(content_key, state['path']) if get_shared_store() else None
+        # Graph steps overlap the summaries here, so a deadline is met by rendering and sampling pages only
+        page_numbers, low_res = plan_pages(pages, get_scheduler().capacity, graph_overlaps=True)
+        
+        page_tasks = [
+            asyncio.ensure_future(process_single_page(state['path'], page_num, thread_id, checkpoint_key, low_res))
+            for page_num in page_numbers
+        ]
+        closed_topics: asyncio.Queue = asyncio.Queue()
+        graph_task = asyncio.ensure_future(_build_closed_topics(state, closed_topics))
+        segmenter = TopicSegmenter()
+        pages_topics = []
+        
+        def close(topics: list) -> None:
+            for topic in topics:
+                pages_topics.append(topic)
+                job_events.publish(thread_id, "topic", {'topic_title': topic['topic_title'], 'slide_numbers': topic['slide_numbers']})
+                closed_topics.put_nowait(topic)
+        
+        try:
+            # Summaries complete in any order, the segmenter receives them in slide order
+            received = {}
+            next_index = 0
+            for page_task in asyncio.as_completed(page_tasks):
+                page_summary = await page_task
+                received[page_summary['page_number']] = page_summary
+                while next_index < len(page_numbers) and page_numbers[next_index] in received:
+                    segmenter.add(received[page_numbers[next_index]])
+                    next_index += 1
+                if segmenter.ready():
+                    with profile_span("segment_topics"), expedite():
+                        close(await segmenter.segment())
+            with profile_span("segment_topics"), expedite():
+                close(await segmenter.segment(final=True))
+            closed_topics.put_nowait(None)
+            
+            state['page_summaries'] = [received[n] for n in sorted(received)]
+            state['pages_topics'] = pages_topics
+            state['name_topics'] = [topic['topic_title'] for topic in pages_topics]
+            state['nb_topics'] = len(pages_topics)
+            logger.info(f"Segmented {len(page_numbers)} pages into {len(pages_topics)} topics with {segmenter.calls} calls")
+            job_events.publish(thread_id, "topics", {
+                "topics": [{'topic_title': t['topic_title'], 'slide_numbers': t['slide_numbers']} for t in pages_topics]
+            })
+            
+            await graph_task
+        finally:
+            for task in page_tasks + [graph_task]:
+                task.cancel()
+        
+        state['graph_building_complete'] = True
+        logger.info(f"✅ Progressive processing completed! Final graph has {len(state['graph'].get('nodes', []))} nodes and {len(state['graph'].get('edges', []))} edges")
+    return state
+
 # Note: Removed should_continue_graph_building function since we now use fixed n iterations
 
 # Export final system output
@@ -350,12 +700,17 @@ async def export_final_output(state: userState) -> userState:
     Export and save the complete final output of the system to a JSON file.
     This includes all processing results: page summaries, topics, and the final graph.
     """
-    with trace(name="export_final_output"):
+    with trace(name="export_final_output"), profile_span("node.export_output"):
         logger.info("Node: export_final_output")
         
         try:
+            # Precompute node coordinates once so clients don't lay out the graph themselves
+            with profile_span("layout"):
+                state['layout'] = await asyncio.to_thread(compute_layout, state.get('graph', {}))
+            
             # Save the complete system output
-            saved_path = save_final_system_output(state)
+            with profile_span("save_export"):
+                saved_path = save_final_system_output(state)
             
             if saved_path:
                 state['export_file_path'] = saved_path
@@ -368,20 +723,41 @@ async def export_final_output(state: userState) -> userState:
             
     return state
 
-# Add the agents to the StateGraph
-builder.add_node("get_pages_summary", get_Pages_Summary)
-builder.add_node("extract_topics", extract_Topics_From_Summaries)
-builder.add_node("build_graph", build_mind_map_graph)
-builder.add_node("export_output", export_final_output)
+@lru_cache(maxsize=1)
+def get_graph():
+    """
+    Build and compile the LangGraph workflow on first use.
+    """
+    builder = StateGraph(userState)
+    builder.add_node("export_output", export_final_output)
+    builder.add_edge("export_output", END)
 
-# Set the entry point
-builder.set_entry_point("get_pages_summary")
+    if settings.PIPELINE_PROGRESSIVE:
+        # A single node overlapping summarization, topic segmentation and graph building
+        builder.add_node("progressive_pipeline", progressive_pipeline)
+        builder.set_entry_point("progressive_pipeline")
+        builder.add_edge("progressive_pipeline", "export_output")
+        return builder.compile()
 
-# Add edges to create the flow (no conditional logic needed - fixed n iterations)
-builder.add_edge("get_pages_summary", "extract_topics")
-builder.add_edge("extract_topics", "build_graph")
-builder.add_edge("build_graph", "export_output")
-builder.add_edge("export_output", END)
+    # Add the agents to the StateGraph
+    builder.add_node("get_pages_summary", get_Pages_Summary)
+    builder.add_node("extract_topics", extract_Topics_From_Summaries)
+    builder.add_node("build_graph", build_mind_map_graph)
 
-# Compile the graph
-graph = builder.compile()
\ No newline at end of file
+    # Set the entry point
+    builder.set_entry_point("get_pages_summary")
+
+    # Add edges to create the flow (no conditional logic needed - fixed n iterations)
+    builder.add_edge("get_pages_summary", "extract_topics")
+    builder.add_edge("extract_topics", "build_graph")
+    builder.add_edge("build_graph", "export_output")
+
+    # Compile the graph
+    return builder.compile()
+
+def warm_up() -> None:
+    """
+    Create the model client and compile the workflow ahead of the first request.
+    """
+    get_chat_model()
+    get_graph()
@@ -11,7 +11,19 @@ def pdf_page_to_base64(pdf_path: str, page_number: int, scale_factor: float = 1)
     """
     Convert a given PDF page into a base64-encoded string representing the image.
     """
-    pdf_document = fitz.open(pdf_path)
-    page = pdf_document.load_page(page_number - 1) 
-    pix = page.get_pixmap(matrix=fitz.Matrix(scale_factor, scale_factor)) 
-    return base64.b64encode(pix.tobytes("png")).decode("utf-8")
\ No newline at end of file
+    with fitz.open(pdf_path) as pdf_document:
+        page = pdf_document.load_page(page_number - 1) 
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale_factor, scale_factor)) 
+        return base64.b64encode(pix.tobytes("png")).decode("utf-8")
+
+def page_features(pdf_path: str, page_number: int) -> dict:
+    """
+    Get cheap complexity features of a PDF page: amount of text, embedded images and vector drawings.
+    """
+    with fitz.open(pdf_path) as pdf_document:
+        page = pdf_document.load_page(page_number - 1)
+        return {
+            "text_chars": len(page.get_text("text").strip()),
+            "images": len(page.get_images()),
+            "drawings": len(page.get_drawings())
+        }
@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Optional, Union
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.profiling import profile_span
+from app.services.deadline import current_deadline, estimated_call_seconds
+from app.services.scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Optional limit on concurrent model calls shared with other processes (see set_call_budget)
+_call_budget = None
+_budget_executor: Optional[ThreadPoolExecutor] = None
+# Longest a budget wait goes on after its call was cancelled
+BUDGET_POLL_SECONDS = 0.25
+
+
+async def _trace_connection(event_name: str, info: dict) -> None:
+    """
+    httpcore trace callback: counts requests sent and new TCP connections opened,
+    which gives the connection reuse ratio of the pool.
+    """
+    if event_name.endswith("send_request_headers.started"):
+        metrics.increment("llm_http_requests")
+    elif event_name == "connection.connect_tcp.complete":
+        metrics.increment("llm_http_connections_opened")
+
+
+async def _attach_trace(request: httpx.Request) -> None:
+    request.extensions["trace"] = _trace_connection
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared async HTTP client for all model calls of this process, with an
+    explicitly sized keep-alive connection pool.
+    """
+    http2 = settings.LLM_HTTP2
+    if http2 and not _http2_available():
+        logger.warning("LLM_HTTP2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.LLM_POOL_SIZE,
+            max_keepalive_connections=settings.LLM_POOL_SIZE,
+            keepalive_expiry=settings.LLM_KEEPALIVE_SECONDS
+        ),
+        timeout=httpx.Timeout(
+            settings.LLM_CALL_TIMEOUT,
+            connect=settings.LLM_CONNECT_TIMEOUT,
+            pool=settings.LLM_POOL_TIMEOUT
+        ),
+        event_hooks={"request": [_attach_trace]}
+    )
+
+
+def create_chat_model(model: str, **kwargs):
+    """
+    Create a chat model that sends its requests through the shared connection pool.
+    """
+    # Imported here to keep langchain out of the application's startup path
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,
+        temperature=0,
+        max_tokens=settings.LLM_MAX_TOKENS,
+        tags=["mindmap"],
+        base_url=settings.OPENAI_BASE_URL,
+        http_async_client=get_http_client(),
+        timeout=settings.LLM_CALL_TIMEOUT,
+        max_retries=settings.LLM_MAX_RETRIES,
+        **kwargs
+    )
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model_name: Optional[str] = None):
+    """
+    Shared chat model of this process (one per model name), created on first use.
+    
+    Args:
+        model_name: Model to use (defaults to LLM_MODEL)
+    """
+    return create_chat_model(model_name or settings.LLM_MODEL)
+
+
+def set_call_budget(budget) -> None:
+    """
+    Share a limit on concurrent model calls across processes, e.g. a
+    multiprocessing semaphore held by the parent of a worker pool. Every call
+    acquires one slot of the budget for its duration.
+    
+    Args:
+        budget: Object with acquire(block, timeout) returning whether a slot was
+            taken, and release() (None to remove the limit)
+    """
+    global _call_budget, _budget_executor
+    _call_budget = budget
+    if budget is not None and _budget_executor is None:
+        # Waiting for a slot blocks a thread; keep those off the default executor
+        _budget_executor = ThreadPoolExecutor(max_workers=settings.LLM_POOL_SIZE, thread_name_prefix="llm-budget")
+
+
+def _wait_for_call_budget(budget, cancelled: threading.Event) -> bool:
+    # Short timeouts so a cancelled waiter stops waiting (and polling) promptly
+    while not cancelled.is_set():
+        if budget.acquire(True, BUDGET_POLL_SECONDS):
+            return True
+    return False
+
+
+async def _acquire_call_budget(budget) -> None:
+    started = time.perf_counter()
+    cancelled = threading.Event()
+    future = _budget_executor.submit(_wait_for_call_budget, budget, cancelled)
+    try:
+        await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        cancelled.set()
+        # The thread may still take a slot before it sees the flag: hand it back. The
+        # callback is on the thread's own future, which is not cancelled once running
+        future.add_done_callback(lambda f: budget.release() if not f.cancelled() and f.exception() is None and f.result() else None)
+        raise
+    metrics.observe("llm_budget_wait_seconds", time.perf_counter() - started)
+
+
+def _call_timeout(timeout: Optional[float]) -> float:
+    # Under a deadline a call (with its retries) may not outlast the job's budget, but gets at least one typical call's time
+    timeout = timeout or settings.LLM_CALL_TIMEOUT
+    deadline = current_deadline()
+    if deadline is not None:
+        timeout = min(timeout, max(deadline.remaining(), estimated_call_seconds()))
+    return timeout
+
+
+async def _stream_response(model, messages: List, on_chunk: Callable[[str], None], **kwargs):
+    response = None
+    async for chunk in model.astream(messages, **kwargs):
+        if chunk.content:
+            on_chunk(chunk.content)
+        response = chunk if response is None else response + chunk
+    return response
+
+
+async def invoke_llm(
+    messages: Union[List, Callable[[], Awaitable[List]]],
+    model=None,
+    timeout: Optional[float] = None,
+    response_format: Optional[dict] = None,
+    on_chunk: Optional[Callable[[str], None]] = None
+):
+    """
+    Call a chat model with a per-call timeout and record latency and error metrics.
+    The call waits for a slot of the fair scheduler, attributed to the current job.
+    Cancelling the caller aborts the request and frees the slot right away.
+
+    Args:
+        messages: Messages to send, or a coroutine function building them. It is
+            awaited once the slot is taken, so costly inputs (page renders) are
+            bounded by the scheduler and skipped when the call is cancelled
+        model: Model to call (defaults to the shared model)
+        timeout: Per-call timeout in seconds (defaults to LLM_CALL_TIMEOUT, capped by the job's deadline)
+        response_format: Response format of the request (e.g. a json_schema format)
+        on_chunk: Receives the reply text as it is generated (streamed when
+            LLM_STREAM_OUTPUT is enabled, otherwise in one piece at the end)
+
+    Returns:
+        The model response message
+    """
+    model = model or get_chat_model()
+    scheduler = get_scheduler()
+    with profile_span("llm_queue_wait"):
+        try:
+            slot = await scheduler.acquire()
+        except asyncio.CancelledError:
+            metrics.increment("llm_calls_cancelled", stage="queued")
+            raise
+    try:
+        if callable(messages):
+            messages = await messages()
+        budget = _call_budget
+        if budget is not None:
+            with profile_span("llm_budget_wait"):
+                await _acquire_call_budget(budget)
+        started = time.perf_counter()
+        kwargs = {"response_format": response_format} if response_format else {}
+        if on_chunk is not None and settings.LLM_STREAM_OUTPUT:
+            call = _stream_response(model, messages, on_chunk, **kwargs)
+        else:
+            call = model.ainvoke(messages, **kwargs)
+        try:
+            with profile_span("llm_call", model=model.model_name):
+                response = await asyncio.wait_for(call, _call_timeout(timeout))
+        except asyncio.TimeoutError:
+            metrics.increment("llm_call_timeouts", model=model.model_name)
+            raise
+        except asyncio.CancelledError:
+            metrics.increment("llm_calls_cancelled", stage="in_flight")
+            raise
+        except Exception:
+            metrics.increment("llm_call_errors", model=model.model_name)
+            raise
+        finally:
+            if budget is not None:
+                budget.release()
+    finally:
+        scheduler.release(slot)
+    metrics.observe("llm_call_seconds", time.perf_counter() - started, model=model.model_name)
+    if on_chunk is not None and not settings.LLM_STREAM_OUTPUT:
+        on_chunk(response.content)
+    return response
+
+
+async def warm_up_connections(count: Optional[int] = None) -> int:
+    """
+    Open connections to the model API ahead of the first burst of calls by sending
+    concurrent lightweight requests (GET /models) through the shared pool.
+
+    Args:
+        count: Number of connections to open (defaults to LLM_WARM_CONNECTIONS),
+            at most LLM_POOL_SIZE
+
+    Returns:
+        Number of warm-up requests that succeeded
+    """
+    count = min(settings.LLM_WARM_CONNECTIONS if count is None else count, settings.LLM_POOL_SIZE)
+    if count <= 0:
+        return 0
+
+    base_url = (settings.OPENAI_BASE_URL or "https://api.openai.com/v1").rstrip("/")
+    headers = {"Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY', '')}"}
+    client = get_http_client()
+    results = await asyncio.gather(
+        *[client.get(f"{base_url}/models", headers=headers) for _ in range(count)],
+        return_exceptions=True
+    )
+    succeeded = sum(1 for r in results if isinstance(r, httpx.Response) and r.status_code < 500)
+    if succeeded < count:
+        logger.warning(f"Only {succeeded}/{count} LLM connections could be warmed up")
+    else:
+        logger.info(f"Warmed up {succeeded} LLM connections")
+    return succeeded
+
+
+def connection_stats() -> dict:
+    """
+    Connection reuse statistics of the shared pool.
+    """
+    requests_sent = metrics.counter_value("llm_http_requests")
+    opened = metrics.counter_value("llm_http_connections_opened")
+    return {
+        "requests": int(requests_sent),
+        "connections_opened": int(opened),
+        "reuse_ratio": round(1 - opened / requests_sent, 4) if requests_sent else None,
+    }
+
+
+async def close_http_client() -> None:
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
+        get_chat_model.cache_clear()
@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.langgraph.llm_client import get_chat_model, invoke_llm
+from app.langgraph.prompt_budget import count_tokens
+from app.services.deadline import current_deadline, estimated_call_seconds
+
+logger = logging.getLogger(__name__)
+
+# Inputs at or above these sizes score as fully complex
+PAGE_TEXT_CHARS_REFERENCE = 1500
+PAGE_IMAGES_REFERENCE = 4
+PAGE_DRAWINGS_REFERENCE = 200
+PROMPT_TOKENS_REFERENCE = 4000
+
+_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+_routed = {"small": 0, "escalated": 0}
+
+
+def page_complexity_score(features: dict) -> float:
+    """
+    Complexity (0-1) of a slide for the vision summary call. Figures, photos and
+    vector diagrams weigh more than text, which small models read reliably.
+
+    Args:
+        features: Page features from page_features()
+    """
+    visual = max(
+        features.get("images", 0) / PAGE_IMAGES_REFERENCE,
+        features.get("drawings", 0) / PAGE_DRAWINGS_REFERENCE
+    )
+    text = features.get("text_chars", 0) / PAGE_TEXT_CHARS_REFERENCE
+    return round(min(1.0, 0.6 * min(1.0, visual) + 0.4 * min(1.0, text)), 3)
+
+
+def prompt_complexity_score(prompt_tokens: int, reference: int = PROMPT_TOKENS_REFERENCE) -> float:
+    """
+    Complexity (0-1) of a text-only call from the size of its prompt.
+    """
+    return round(min(1.0, prompt_tokens / reference), 3)
+
+
+def choose_model(score: float) -> str:
+    """
+    Model for a call of the given complexity: the small model below
+    LLM_ROUTING_THRESHOLD (when one is configured), LLM_MODEL otherwise.
+    """
+    if settings.LLM_SMALL_MODEL and score < settings.LLM_ROUTING_THRESHOLD:
+        return settings.LLM_SMALL_MODEL
+    return settings.LLM_MODEL
+
+
+def _record(model_name: str, kind: str, seconds: float) -> None:
+    metrics.increment("llm_routed_calls", model=model_name, kind=kind)
+    with _lock:
+        _stats[model_name]["calls"] += 1
+        _stats[model_name]["seconds"] += seconds
+
+
+def _built_once(build: Callable[[], Awaitable[List]]) -> Callable[[], Awaitable[List]]:
+    built = []
+
+    async def messages() -> List:
+        if not built:
+            built.append(await build())
+        return built[0]
+
+    return messages
+
+
+async def _timed_call(messages: List, model_name: str, kind: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await invoke_llm(messages, model=get_chat_model(model_name), **kwargs)
+    finally:
+        _record(model_name, kind, time.perf_counter() - started)
+    # Reply sizes per call type, for the preflight cost estimates (streamed replies carry no usage)
+    usage = getattr(response, "usage_metadata", None) or {}
+    metrics.observe("llm_output_tokens", usage.get("output_tokens") or count_tokens(response.content), kind=kind)
+    return response
+
+
+async def invoke_routed(
+    messages: Union[List, Callable[[], Awaitable[List]]],
+    kind: str,
+    score: float,
+    validate: Optional[Callable[[str], bool]] = None,
+    response_format: Optional[dict] = None,
+    stream=None
+):
+    """
+    Call the model chosen for the complexity score. A call sent to the small model
+    is retried on LLM_MODEL when it fails or its output does not pass `validate`.
+
+    Args:
+        messages: Messages to send, or a coroutine function building them once a
+            scheduler slot is taken (see invoke_llm). An escalated call reuses them
+        kind: Call type, used as metrics label ("page_summary", "topics", "graph")
+        score: Complexity of the call (0-1)
+        validate: Check of the response text (e.g. that it parses as the expected JSON)
+        response_format: Response format of the request (e.g. a json_schema format)
+        stream: Incremental parser fed with the reply text (a JSONItemStream).
+            Items of a small-model reply are held until the reply is accepted,
+            and dropped if the call is escalated
+
+    Returns:
+        The model response message
+    """
+    kwargs = {"response_format": response_format, "on_chunk": stream.feed if stream is not None else None}
+    if callable(messages):
+        messages = _built_once(messages)
+    model_name = choose_model(score)
+    if model_name == settings.LLM_MODEL:
+        return await _timed_call(messages, model_name, kind, **kwargs)
+
+    with _lock:
+        _routed["small"] += 1
+    if stream is not None:
+        stream.hold()
+    try:
+        response = await _timed_call(messages, model_name, kind, **kwargs)
+        if validate is None or validate(response.content):
+            if stream is not None:
+                stream.release()
+            return response
+        reason = "invalid_output"
+        deadline = current_deadline()
+        if deadline is not None and deadline.budget() < estimated_call_seconds():
+            # No time left for a second call: callers handle invalid output like any other
+            deadline.degrade("skipped_escalation")
+            if stream is not None:
+                stream.release()
+            return response
+    except Exception as e:
+        logger.warning(f"{kind} call on {model_name} failed, escalating to {settings.LLM_MODEL}: {str(e)}")
+        reason = "error"
+
+    metrics.increment("llm_route_escalations", kind=kind, reason=reason)
+    with _lock:
+        _routed["escalated"] += 1
+    logger.info(f"Escalating {kind} call (score {score}) from {model_name} to {settings.LLM_MODEL}: {reason}")
+    if stream is not None:
+        stream.reset()
+    return await _timed_call(messages, settings.LLM_MODEL, kind, **kwargs)
+
+
+def routing_stats() -> dict:
+    """
+    Calls and average latency per model, and the share of small-model calls that
+    had to be escalated to LLM_MODEL.
+    """
+    with _lock:
+        models = {
+            name: {"calls": int(s["calls"]), "avg_seconds": round(s["seconds"] / s["calls"], 4) if s["calls"] else None}
+            for name, s in _stats.items()
+        }
+        small, escalated = _routed["small"], _routed["escalated"]
+    return {
+        "small_model": settings.LLM_SMALL_MODEL,
+        "threshold": settings.LLM_ROUTING_THRESHOLD,
+        "models": models,
+        "small_model_calls": small,
+        "escalations": escalated,
+        "fallback_rate": round(escalated / small, 4) if small else None,
+    }
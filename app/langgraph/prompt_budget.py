@@ -0,0 +1,240 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.langgraph.prompts import messagePrompt_GraphBuilder_Enrichment, messagePrompt_GraphBuilder_CompactEnrichment
+from app.services.graph_merger import title_tokens
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=8)
+def _encoder(model: str):
+    """
+    Load the tiktoken encoder for a model once. Returns None if tiktoken or its
+    encoding files are unavailable (e.g. offline without a cached BPE file).
+    """
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable for {model}, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """
+    Count the tokens of a text locally (estimated if no tokenizer is available).
+    """
+    encoder = _encoder(model)
+    if encoder is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def compact_graph(graph: dict, node_ids: Optional[Set[str]] = None) -> Tuple[str, Dict[str, str]]:
+    """
+    Serialize a graph as compact adjacency lines with short IDs, titles only:
+
+        n1 [C] Large Language Models -> n2 (includes), n3 (uses)
+        n2 [S] Transformer Architecture
+
+    Args:
+        graph: Graph dict with "nodes" and "edges"
+        node_ids: Only serialize these nodes (and edges between them)
+
+    Returns:
+        Tuple of (compact text, mapping short ID -> original node ID)
+    """
+    nodes = [n for n in graph.get('nodes', []) if node_ids is None or n.get('id') in node_ids]
+    short_ids = {node['id']: f"n{i}" for i, node in enumerate(nodes, 1)}
+
+    adjacency: Dict[str, List[str]] = {}
+    for edge in graph.get('edges', []):
+        source, target = short_ids.get(edge.get('from')), short_ids.get(edge.get('to'))
+        if source and target:
+            adjacency.setdefault(source, []).append(f"{target} ({edge.get('label', '')})")
+
+    lines = []
+    for node in nodes:
+        short_id = short_ids[node['id']]
+        kind = "C" if node.get('type') == 'central' else "S"
+        line = f"{short_id} [{kind}] {node.get('title', '')}"
+        if short_id in adjacency:
+            line += " -> " + ", ".join(adjacency[short_id])
+        lines.append(line)
+
+    return "\n".join(lines), {short: original for original, short in short_ids.items()}
+
+
+def relevant_nodes(graph: dict, topic_title: str, topic_summaries: list) -> List[str]:
+    """
+    Rank graph nodes by lexical overlap with a topic's title and summaries.
+    Central nodes come first so the new topic can always be attached to the map.
+
+    Returns:
+        Node IDs ordered by decreasing relevance
+    """
+    topic_tokens = title_tokens(topic_title) | title_tokens(" ".join(topic_summaries))
+    scored = []
+    for node in graph.get('nodes', []):
+        tokens = title_tokens(node.get('title', ''))
+        overlap = len(tokens & topic_tokens) / len(tokens) if tokens else 0.0
+        scored.append((node.get('type') != 'central', -overlap, node['id']))
+    scored.sort()
+    return [node_id for _, _, node_id in scored]
+
+
+def _select_nodes(graph: dict, ranked: List[str], budget: int, model: str) -> List[str]:
+    """
+    Take nodes in relevance order while their rendered lines fit in `budget` tokens.
+    A node costs its own line with its edges to the nodes already taken, plus the
+    edge references it adds to their lines. Central nodes are always taken.
+    """
+    nodes = {n['id']: n for n in graph.get('nodes', [])}
+    outgoing: Dict[str, List[Tuple[str, str]]] = {}
+    incoming: Dict[str, List[Tuple[str, str]]] = {}
+    for edge in graph.get('edges', []):
+        source, target = edge.get('from'), edge.get('to')
+        if source in nodes and target in nodes:
+            outgoing.setdefault(source, []).append((target, edge.get('label', '')))
+            incoming.setdefault(target, []).append((source, edge.get('label', '')))
+
+    # Short IDs are assigned once the selection is known: cost every one at the widest
+    short_id = f"n{len(nodes)}"
+    selected: List[str] = []
+    taken: Set[str] = set()
+    for node_id in ranked:
+        node = nodes[node_id]
+        kind = "C" if node.get('type') == 'central' else "S"
+        line = f"{short_id} [{kind}] {node.get('title', '')}"
+        references = [f"{short_id} ({label})" for target, label in outgoing.get(node_id, []) if target in taken or target == node_id]
+        if references:
+            line += " -> " + ", ".join(references)
+        cost = count_tokens(line + "\n", model)
+        for source, label in incoming.get(node_id, []):
+            if source in taken:
+                cost += count_tokens(f", {short_id} ({label})", model)
+        if cost > budget and node.get('type') != 'central':
+            break
+        selected.append(node_id)
+        taken.add(node_id)
+        budget -= cost
+    return selected
+
+
+def build_enrichment_prompt(
+    topic_title: str,
+    topic_summaries: list,
+    graph: dict,
+    token_budget: int,
+    model: str = "gpt-4o"
+) -> Tuple[str, Dict[str, str], Dict[str, int]]:
+    """
+    Build a token-budgeted enrichment prompt with a compact view of the existing graph.
+    When the compact graph does not fit in the budget, only the nodes most relevant
+    to the new topic (and the edges between them) are included. Central nodes are
+    always included, so the new topic can be attached, even if the prompt then
+    exceeds the budget.
+
+    Args:
+        topic_title: Title of the topic being added
+        topic_summaries: Slide summaries of the topic
+        graph: Current graph
+        token_budget: Maximum prompt tokens
+        model: Model name used for token counting
+
+    Returns:
+        Tuple of (prompt, short ID -> node ID mapping, token statistics). The
+        statistics compare the legacy full-JSON prompt with the budgeted one.
+    """
+    full_tokens = count_tokens(messagePrompt_GraphBuilder_Enrichment(topic_title, topic_summaries, graph), model)
+
+    graph_text, id_map = compact_graph(graph)
+    prompt = messagePrompt_GraphBuilder_CompactEnrichment(topic_title, topic_summaries, graph_text)
+    prompt_tokens = count_tokens(prompt, model)
+    included = len(id_map)
+
+    if prompt_tokens > token_budget:
+        base_tokens = count_tokens(messagePrompt_GraphBuilder_CompactEnrichment(topic_title, topic_summaries, ""), model)
+        ranked = relevant_nodes(graph, topic_title, topic_summaries)
+        selected = _select_nodes(graph, ranked, token_budget - base_tokens, model)
+        central = sum(1 for n in graph.get('nodes', []) if n.get('type') == 'central')
+
+        def render(node_ids: List[str]) -> Tuple[str, Dict[str, str], int]:
+            text, mapping = compact_graph(graph, set(node_ids))
+            rendered = messagePrompt_GraphBuilder_CompactEnrichment(topic_title, topic_summaries, text)
+            return rendered, mapping, count_tokens(rendered, model)
+
+        prompt, id_map, prompt_tokens = render(selected)
+        # Line costs are counted piecewise: trim the least relevant nodes if the whole prompt is still over
+        while prompt_tokens > token_budget and len(selected) > central:
+            excess = (prompt_tokens - token_budget) / max(1, prompt_tokens - base_tokens)
+            drop = max(1, int(len(selected) * excess))
+            selected = selected[:max(central, len(selected) - drop)]
+            prompt, id_map, prompt_tokens = render(selected)
+        if prompt_tokens > token_budget:
+            logger.warning(f"Enrichment prompt for '{topic_title}' exceeds its budget ({prompt_tokens} > {token_budget} tokens) with only the central nodes")
+        included = len(id_map)
+
+    stats = {
+        "full_prompt_tokens": full_tokens,
+        "prompt_tokens": prompt_tokens,
+        "nodes_total": len(graph.get('nodes', [])),
+        "nodes_included": included,
+    }
+    return prompt, id_map, stats
+
+
+def apply_graph_additions(graph: dict, additions: dict, id_map: Dict[str, str]) -> dict:
+    """
+    Merge the nodes/edges returned for a compact enrichment prompt into the graph.
+    References to short IDs of existing nodes are mapped back to their original IDs,
+    and new nodes get fresh IDs so they cannot collide with existing ones.
+
+    Args:
+        graph: Current graph
+        additions: Model output with "nodes" and "edges" to add
+        id_map: Short ID -> original node ID mapping used in the prompt
+
+    Returns:
+        The updated graph (a new dict)
+    """
+    nodes = list(graph.get('nodes', []))
+    edges = list(graph.get('edges', []))
+    existing_ids = {n['id'] for n in nodes}
+    existing_edge_ids = {e['id'] for e in edges}
+
+    next_node = len(nodes) + 1
+    new_ids: Dict[str, str] = {}
+    for node in additions.get('nodes', []):
+        ref = node.get('id')
+        if not ref or ref in id_map or not node.get('title'):
+            continue
+        while f"node_{next_node}" in existing_ids:
+            next_node += 1
+        node_id = f"node_{next_node}"
+        existing_ids.add(node_id)
+        new_ids[ref] = node_id
+        nodes.append({"id": node_id, "title": node['title'], "type": node.get('type', 'subnode')})
+
+    next_edge = len(edges) + 1
+    for edge in additions.get('edges', []):
+        source = new_ids.get(edge.get('from')) or id_map.get(edge.get('from'))
+        target = new_ids.get(edge.get('to')) or id_map.get(edge.get('to'))
+        if not source or not target or source == target:
+            continue
+        while f"edge_{next_edge}" in existing_edge_ids:
+            next_edge += 1
+        edge_id = f"edge_{next_edge}"
+        existing_edge_ids.add(edge_id)
+        edges.append({"id": edge_id, "from": source, "to": target, "label": edge.get('label', '')})
+
+    return {"nodes": nodes, "edges": edges}
@@ -85,6 +85,37 @@ def messagePrompt_TopicExtraction()->str:
 
     """
 
+def messagePrompt_TopicSegmentation(open_topic_title: str = None, final: bool = False)->str:
+    continuation = (
+        f'The first slides above may continue the topic "{open_topic_title}" started earlier: keep this exact title for them if they belong to it.'
+        if open_topic_title else ""
+    )
+    ending = (
+        "These are the last slides of the presentation."
+        if final else
+        "More slides follow: the last topic may continue in them, so do not split the last slides into a new topic unless they clearly start one."
+    )
+    return f"""
+    The slide summaries above are CONSECUTIVE slides of a presentation that is still being processed.
+    Split them into topics of consecutive slides, in slide order. Start a new topic only where the slides clearly move to a different theme.
+    {continuation}
+    {ending}
+    
+    You must return your analysis in a structured JSON format with the following structure (no summaries):
+        {{
+            "topics": [
+                {{
+                    "topic_title": "Title of Topic 1",
+                    "slide_numbers": [5, 6, 7]
+                }},
+                {{
+                    "topic_title": "Title of Topic 2",
+                    "slide_numbers": [8, 9]
+                }}
+            ]
+        }}
+    """
+
 def systemPrompt_GraphBuilder()->str:
     return """
     You are an expert at creating mind maps from topic content using a SEQUENTIAL ENRICHMENT approach.
@@ -200,3 +231,74 @@ def messagePrompt_GraphBuilder_Enrichment(topic_title: str, topic_summaries: lis
     
     Remember: This is sequential enrichment - build upon what exists, don't replace it!
     """
+
+def systemPrompt_GraphBuilder_Incremental()->str:
+    return """
+    You are an expert at creating mind maps from topic content using a SEQUENTIAL ENRICHMENT approach.
+    The existing mind map is given in a compact form and you only return what must be ADDED to it.
+    
+    Compact mind map format (one node per line):
+        n1 [C] Title of a central topic -> n2 (includes), n3 (uses)
+        n2 [S] Title of a subnode
+    - "n1" is the node ID, [C] marks a central node and [S] a subnode
+    - "-> n2 (includes)" is an edge from n1 to n2 labelled "includes"
+    - The map may only show the existing nodes most relevant to the new topic
+    
+    For each new topic, you need to:
+    1. Create a central node for the main topic (type: "central")
+    2. Create nodes for its key subtopics and concepts (type: "subnode")
+    3. Connect the new nodes with meaningful, labelled edges
+    4. Find meaningful connections between the new topic and existing nodes
+    
+    CRITICAL GUIDELINES:
+    - MAKE SURE THERE ARE AT MOST 5 SUBNODES FOR EACH CENTRAL NODE (the most important ones)
+    - Return ONLY the new nodes and the new edges, never repeat existing nodes or edges
+    - Refer to existing nodes by their exact ID (e.g. "n3"), give new nodes IDs starting with "new_"
+    - Keep node titles concise and descriptive (2-5 words)
+    - Keep edge labels simple and clear (1-3 words)
+    - ALWAYS include the "type" field for each node: "central" or "subnode"
+    """
+
+def messagePrompt_GraphBuilder_CrossLinks(compact_graph: str) -> str:
+    return f"""
+    CROSS-TOPIC LINKS: The topics of the mind map below were built separately and are not connected yet.
+    
+    Mind map topics (compact form):
+    {compact_graph}
+    
+    Add edges between related topics, using their exact IDs (e.g. "n1"). Only connect topics with a
+    meaningful relationship, at most one edge per pair. Do not add nodes.
+    
+    Return ONLY the new edges in JSON format:
+    {{
+        "nodes": [],
+        "edges": [
+            {{"id": "new_edge_1", "from": "n1", "to": "n2", "label": "relates to"}}
+        ]
+    }}
+    """
+
+def messagePrompt_GraphBuilder_CompactEnrichment(topic_title: str, topic_summaries: list, compact_graph: str) -> str:
+    return f"""
+    SEQUENTIAL GRAPH ENRICHMENT: Add the following new topic to the existing mind map.
+    
+    New Topic to Add: {topic_title}
+    
+    New topic content summaries:
+    {chr(10).join([f"- {summary}" for summary in topic_summaries])}
+    
+    Existing mind map (compact form):
+    {compact_graph}
+    
+    Return ONLY the new nodes and edges in JSON format:
+    {{
+        "nodes": [
+            {{"id": "new_1", "title": "{topic_title}", "type": "central"}},
+            {{"id": "new_2", "title": "New Subtopic 1", "type": "subnode"}}
+        ],
+        "edges": [
+            {{"id": "new_edge_1", "from": "new_1", "to": "new_2", "label": "includes"}},
+            {{"id": "new_edge_2", "from": "n1", "to": "new_1", "label": "relates to"}}
+        ]
+    }}
+    """
@@ -0,0 +1,223 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel, Field
+
+from app.core.metrics import metrics
+from app.core.models import GraphData, TopicInfo
+
+logger = logging.getLogger(__name__)
+
+# Fields of the API models that the model must not produce (computed by the pipeline)
+EXCLUDED_FIELDS: Dict[str, Set[str]] = {"GraphNode": {"x", "y"}}
+
+
+class TopicsOutput(BaseModel):
+    topics: List[TopicInfo] = Field(..., description="Main topics of the presentation, in slide order")
+
+
+class TopicSegment(BaseModel):
+    topic_title: str = Field(..., description="Topic title")
+    slide_numbers: List[int] = Field(..., description="Consecutive slide numbers of this topic")
+
+
+class TopicSegmentsOutput(BaseModel):
+    topics: List[TopicSegment] = Field(..., description="Topics of the slides, in slide order")
+
+
+def extract_json_text(response_text: str) -> str:
+    """
+    Strip a markdown code fence around a JSON reply, if any.
+    """
+    response_text = response_text.strip()
+    if response_text.startswith("```json"):
+        response_text = response_text.split("```json")[1].split("```")[0].strip()
+    elif response_text.startswith("```"):
+        response_text = response_text.split("```")[1].split("```")[0].strip()
+    return response_text
+
+
+def _strict(schema: dict, definitions: dict, name: Optional[str] = None) -> dict:
+    if "$ref" in schema:
+        ref_name = schema["$ref"].rsplit("/", 1)[-1]
+        return _strict(definitions[ref_name], definitions, ref_name)
+    if "anyOf" in schema:
+        # Optional[X]: strict schemas list every field as required, so keep X itself
+        variants = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        if len(variants) == 1:
+            return _strict({**variants[0], **{k: v for k, v in schema.items() if k == "description"}}, definitions)
+        return {"anyOf": [_strict(s, definitions) for s in variants]}
+
+    result = {key: value for key, value in schema.items() if key not in ("title", "default", "$defs")}
+    if schema.get("type") == "object" and "properties" in schema:
+        excluded = EXCLUDED_FIELDS.get(name or schema.get("title"), set())
+        properties = {
+            key: _strict(value, definitions)
+            for key, value in schema["properties"].items() if key not in excluded
+        }
+        result.update(properties=properties, required=list(properties), additionalProperties=False)
+    elif schema.get("type") == "array" and "items" in schema:
+        result["items"] = _strict(schema["items"], definitions)
+    return result
+
+
+def strict_json_schema(model: Type[BaseModel]) -> dict:
+    """
+    JSON schema of a pydantic model in the form accepted by strict structured
+    outputs: references inlined, every property required, no additional properties.
+    """
+    schema = model.model_json_schema(by_alias=True)
+    return _strict(schema, schema.get("$defs", {}), model.__name__)
+
+
+@lru_cache(maxsize=None)
+def _response_format(model: Type[BaseModel]) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model.__name__, "strict": True, "schema": strict_json_schema(model)}
+    }
+
+
+def topics_response_format() -> dict:
+    return _response_format(TopicsOutput)
+
+
+def topic_segments_response_format() -> dict:
+    return _response_format(TopicSegmentsOutput)
+
+
+def graph_response_format() -> dict:
+    return _response_format(GraphData)
+
+
+class JSONItemStream:
+    """
+    Incremental parser of a streamed JSON object reply. Each element of the
+    object's top-level arrays (`topics`, `nodes`, `edges`...) is decoded and
+    reported through `on_item` as soon as its closing bracket arrives, so callers
+    can use it before the reply is complete and keep it if the reply is cut off.
+
+    Feed it the text chunks of the reply with `feed`. While a reply may still be
+    rejected (`hold`), elements are kept until `release` instead of reported.
+    After a retry (`reset`), held elements are dropped and elements already
+    reported are not reported again.
+    """
+
+    def __init__(self, on_item: Optional[Callable[[str, dict], None]] = None):
+        self.on_item = on_item
+        self.recovered = False
+        self._reported: Set[str] = set()
+        self.reset()
+
+    def hold(self) -> None:
+        self._held = []
+
+    def release(self) -> None:
+        held, self._held = self._held or [], None
+        for key, item in held:
+            self._emit(key, item)
+
+    def reset(self) -> None:
+        self._held: Optional[List[Tuple[str, dict]]] = None
+        self.text = ""
+        self.items: Dict[str, List[dict]] = {}
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._expecting_key = False
+        self._key: Optional[str] = None
+        self._array_key: Optional[str] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> None:
+        self.text += chunk
+        text = self.text
+        for pos in range(self._pos, len(text)):
+            char = text[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expecting_key:
+                        self._key = json.loads(text[self._string_start:pos + 1])
+                continue
+            if self._depth == 0:
+                # Anything before the object (e.g. a code fence) is skipped
+                if char == "{":
+                    self._depth = 1
+                    self._expecting_key = True
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char in "{[":
+                if self._depth == 1 and char == "[":
+                    self._array_key = self._key
+                elif self._depth == 2 and self._array_key is not None:
+                    self._item_start = pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._item_start is not None:
+                    self._report(text[self._item_start:pos + 1])
+                    self._item_start = None
+                elif self._depth == 1:
+                    self._array_key = None
+            elif self._depth == 1:
+                if char == ",":
+                    self._expecting_key = True
+                elif char == ":":
+                    self._expecting_key = False
+        self._pos = len(text)
+
+    def _report(self, item_text: str) -> None:
+        try:
+            item = json.loads(item_text)
+        except json.JSONDecodeError:
+            return
+        self.items.setdefault(self._array_key, []).append(item)
+        if self._held is not None:
+            self._held.append((self._array_key, item))
+        else:
+            self._emit(self._array_key, item)
+
+    def _emit(self, key: str, item: dict) -> None:
+        fingerprint = f"{key}:{json.dumps(item, sort_keys=True)}"
+        if self.on_item is not None and fingerprint not in self._reported:
+            self._reported.add(fingerprint)
+            try:
+                self.on_item(key, item)
+            except Exception as e:
+                logger.warning(f"Streamed item handler failed: {str(e)}")
+
+    def parse(self, response_text: str, step: str) -> dict:
+        """
+        Parse the complete reply. If it is not valid JSON (e.g. truncated), fall
+        back to the complete array elements streamed so far and set `recovered`.
+
+        Raises:
+            json.JSONDecodeError: The reply is invalid and no element could be recovered
+        """
+        self.recovered = False
+        try:
+            result = json.loads(extract_json_text(response_text))
+            if isinstance(result, dict):
+                return result
+            raise json.JSONDecodeError("Reply is not a JSON object", response_text, 0)
+        except json.JSONDecodeError:
+            metrics.increment("llm_json_parse_failures", step=step)
+            if not self.text and response_text:
+                self.feed(response_text)
+            if not any(self.items.values()):
+                raise
+            metrics.increment("llm_json_recovered", step=step)
+            logger.warning(f"Invalid {step} JSON reply, keeping the {sum(map(len, self.items.values()))} complete items streamed")
+            self.recovered = True
+            return {key: list(items) for key, items in self.items.items()}
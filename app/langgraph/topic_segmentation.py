@@ -0,0 +1,120 @@
+import json
+import logging
+from typing import List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.langgraph.model_router import invoke_routed, prompt_complexity_score
+from app.langgraph.prompt_budget import count_tokens
+from app.langgraph.prompts import systemPrompt_TopicExtraction, messagePrompt_TopicSegmentation
+from app.langgraph.structured_output import extract_json_text, topic_segments_response_format
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_segments(response_text: str) -> Optional[list]:
+    try:
+        result = json.loads(extract_json_text(response_text))
+    except json.JSONDecodeError:
+        return None
+    topics = result.get('topics') if isinstance(result, dict) else None
+    if not topics or not isinstance(topics, list):
+        return None
+    return [
+        t for t in topics
+        if isinstance(t, dict) and t.get('topic_title') and isinstance(t.get('slide_numbers'), list)
+    ] or None
+
+
+def is_valid_segments(response_text: str) -> bool:
+    return _parse_segments(response_text) is not None
+
+
+class TopicSegmenter:
+    """
+    Incremental topic segmentation of page summaries received in slide order
+    (progressive pipeline). Topics are runs of consecutive slides.
+
+    Summaries are added with `add`; `segment` asks the model to split the slides
+    of the open topic and those received since into topics. Every topic but the
+    last is closed, since later slides started a new one; the last stays open, as
+    the next slides may continue it, unless it reached PROGRESSIVE_MAX_TOPIC_PAGES.
+    A final call closes everything.
+    """
+
+    def __init__(self):
+        self.pending: List[dict] = []  # Summaries of the open topic and of the slides after it
+        self.open_title: Optional[str] = None
+        self.new_pages = 0
+        self.calls = 0
+
+    def add(self, page_summary: dict) -> None:
+        self.pending.append(page_summary)
+        self.new_pages += 1
+
+    def ready(self) -> bool:
+        return self.new_pages >= settings.PROGRESSIVE_SEGMENT_PAGES
+
+    async def _assign(self, final: bool) -> dict:
+        # Slide number -> topic title, as segmented by the model
+        summaries_text = ""
+        for page_summary in self.pending:
+            summaries_text += f"\n\nSlide {page_summary['page_number']}:\n{page_summary['summary']}"
+        messages = [
+            SystemMessage(content=systemPrompt_TopicExtraction()),
+            HumanMessage(content=summaries_text),
+            HumanMessage(content=messagePrompt_TopicSegmentation(self.open_title, final))
+        ]
+        self.calls += 1
+        response = await invoke_routed(
+            messages, "topic_segments", prompt_complexity_score(count_tokens(summaries_text)),
+            validate=is_valid_segments,
+            response_format=topic_segments_response_format() if settings.LLM_STRUCTURED_OUTPUT else None
+        )
+        topics = _parse_segments(response.content)
+        if topics is None:
+            metrics.increment("llm_json_parse_failures", step="topic_segments")
+            logger.error(f"Invalid topic segmentation reply, keeping slides together: {response.content[:200]}")
+            return {}
+        assigned = {}
+        for topic in topics:
+            for number in topic['slide_numbers']:
+                assigned.setdefault(number, topic['topic_title'])
+        return assigned
+
+    async def segment(self, final: bool = False) -> List[dict]:
+        """
+        Segment the pending slides.
+
+        Args:
+            final: No slides follow, close every topic
+
+        Returns:
+            The topics closed by this call, in slide order (topic_title, slide_numbers, summaries)
+        """
+        self.new_pages = 0
+        if not self.pending:
+            return []
+        assigned = await self._assign(final)
+
+        # Runs of consecutive slides with the same title; unassigned slides stay with the previous one
+        first, last = self.pending[0]['page_number'], self.pending[-1]['page_number']
+        runs: List[dict] = []
+        for page_summary in self.pending:
+            title = assigned.get(page_summary['page_number']) or (runs[-1]['topic_title'] if runs else None)
+            title = title or self.open_title or f"Slides {first}-{last}"
+            if not runs or runs[-1]['topic_title'] != title:
+                runs.append({'topic_title': title, 'slide_numbers': [], 'summaries': []})
+            runs[-1]['slide_numbers'].append(page_summary['page_number'])
+            runs[-1]['summaries'].append(page_summary['summary'])
+
+        if not final and len(runs[-1]['slide_numbers']) < settings.PROGRESSIVE_MAX_TOPIC_PAGES:
+            open_run = runs.pop()
+            self.pending = self.pending[-len(open_run['slide_numbers']):]
+            self.open_title = open_run['topic_title']
+        else:
+            self.pending = []
+            self.open_title = None
+        return runs
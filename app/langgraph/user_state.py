@@ -15,4 +15,6 @@ class userState(TypedDict):
 
     graph: dict[str, list[dict[str,str]]] # str: nodes, edges, the list is a dict with keys id, title, .... and values their corresponding values
     graph_building_complete: bool # Flag to indicate if all topics have been processed
+    prompt_token_stats: list[dict[str, int]] # per enrichment step: full-JSON vs budgeted prompt tokens
+    layout: dict[str, dict[str, float]] # node id -> precomputed {"x", "y"} coordinates of the final graph
     export_file_path: str # Path to the exported JSON file containing the complete system output
\ No newline at end of file
@@ -1,15 +1,71 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse
 from app.api import endpoints
+from app.langgraph.llm_client import warm_up_connections, close_http_client
+from app.services.storage import create_janitor
+from app.services.static_assets import AssetManifest
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import monitor_event_loop_lag
+from app.core.config import settings
+from contextlib import asynccontextmanager
+import asyncio
+import logging
 import os
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+
+async def warm_up_pipeline(app: FastAPI) -> None:
+    """
+    Import and initialize the heavy processing components (langchain, langgraph,
+    PyMuPDF, the model client and the compiled workflow) off the event loop, so
+    /health answers immediately and /ready flips once everything is loaded.
+    """
+    def _load():
+        from app.langgraph.agents import warm_up
+        warm_up()
+    
+    try:
+        await asyncio.to_thread(_load)
+        await warm_up_connections()
+        app.state.ready = True
+        logger.info("Processing pipeline initialized, service is ready")
+    except Exception as e:
+        app.state.startup_error = str(e)
+        logger.error(f"Failed to initialize processing pipeline: {str(e)}", exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.startup_error = None
+    warm_up_task = asyncio.create_task(warm_up_pipeline(app))
+    background_tasks = [warm_up_task]
+    janitor = create_janitor()
+    storage_limits = (settings.UPLOAD_TTL_SECONDS, settings.UPLOAD_QUOTA_BYTES, settings.OUTPUT_TTL_SECONDS, settings.OUTPUT_QUOTA_BYTES)
+    if any(limit is not None for limit in storage_limits):
+        background_tasks.append(asyncio.create_task(janitor.run_forever(settings.STORAGE_JANITOR_INTERVAL_SECONDS)))
+    else:
+        # Uploads saved before the blob store are deduplicated even without limits
+        background_tasks.append(asyncio.create_task(janitor.migrate()))
+    if settings.EVENT_LOOP_LAG_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(monitor_event_loop_lag(settings.EVENT_LOOP_LAG_INTERVAL_SECONDS)))
+    if spa_assets is not None:
+        # Compressed variants are added as they are built; identity responses work meanwhile
+        background_tasks.append(asyncio.create_task(asyncio.to_thread(spa_assets.compress)))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await close_http_client()
+
+
 app = FastAPI(
     title="Agentic Mindmap API",
     description="API for processing PDF slides and creating mindmaps",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -21,33 +77,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for API responses (the frontend is served precompressed)
+app.add_middleware(CompressionMiddleware, path_prefix="/api")
+
 # Include API routers
 app.include_router(endpoints.router, prefix="/api", tags=["PDF Processing"])
 
 @app.get("/health")
 async def health_check():
+    # Liveness: the process is up and serving requests
     return {"status": "healthy"}
 
-# Mount static files and serve frontend (for production/Docker)
+@app.get("/ready")
+async def readiness_check():
+    # Readiness: the processing pipeline is loaded and uploads can be handled
+    if getattr(app.state, "ready", False):
+        return {"status": "ready"}
+    body = {"status": "starting"}
+    if getattr(app.state, "startup_error", None):
+        body = {"status": "error", "detail": app.state.startup_error}
+    return JSONResponse(status_code=503, content=body)
+
+# Serve the built frontend from memory (for production/Docker)
 frontend_dist = Path(__file__).parent.parent / "frontend" / "dist"
-if frontend_dist.exists():
-    # Mount assets directory
-    app.mount("/assets", StaticFiles(directory=str(frontend_dist / "assets")), name="assets")
-    
+spa_assets = AssetManifest(frontend_dist) if frontend_dist.exists() else None
+if spa_assets is not None:
     # Catch-all route to serve the SPA
     @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
+    async def serve_spa(full_path: str, request: Request):
         # Skip API routes
         if full_path.startswith("api/"):
             return {"message": "API endpoint not found"}
         
-        # Serve specific file if it exists
-        file_path = frontend_dist / full_path
-        if file_path.is_file():
-            return FileResponse(file_path)
-        
-        # Default to index.html for SPA routing
-        return FileResponse(frontend_dist / "index.html")
+        # Serve specific file if it exists, default to index.html for SPA routing
+        asset = spa_assets.get(full_path)
+        if asset is None:
+            # Missing bundles (e.g. stale URLs after a redeploy) are not SPA routes
+            if full_path.startswith("assets/"):
+                return JSONResponse(status_code=404, content={"detail": "Not Found"})
+            asset = spa_assets.get("index.html")
+        return spa_assets.response(asset, request)
 else:
     @app.get("/")
     async def root():
@@ -0,0 +1,243 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.jobs import JobCancelledError
+from app.services.scheduler import get_scheduler
+from app.services.shared_store import get_shared_store
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejectedError(Exception):
+    """
+    Raised by AdmissionController.acquire when a job is not admitted.
+    """
+
+    def __init__(self, reason: str, detail: str, retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    def __init__(self, job_id: str, calls: int, seconds: float):
+        self.job_id = job_id
+        self.calls = calls
+        self.seconds = seconds
+        self.admitted_at = 0.0
+        self.admitted: Optional[asyncio.Future] = None
+
+    def payload(self) -> dict:
+        # Stored with a queued job, for the admission control of other API processes
+        return {"llm_calls": self.calls, "predicted_seconds": self.seconds, "admitted_at": self.admitted_at}
+
+
+class AdmissionController:
+    """
+    Admission control of uploads from their preflight estimate, so overload
+    queues or rejects new jobs instead of slowing down the jobs already running.
+
+    Admitted jobs hold their predicted LLM calls until they finish. A job is
+    admitted while the held calls stay under `max_inflight_calls` (a job larger
+    than the limit is admitted alone), otherwise it waits in FIFO order if the
+    jobs ahead of it are predicted to finish within `max_wait_seconds` (from their
+    estimated durations), and is rejected otherwise. Jobs over the page or cost
+    limits are always rejected.
+
+    In queue mode (with a shared `store`), the held calls are those of the jobs
+    queued or running in the shared store, admitted by any API process, and the
+    default limit follows LLM_GLOBAL_CONCURRENCY. `refresh` reads them; jobs
+    waiting for admission re-check every JOB_DISCONNECT_POLL_SECONDS, since jobs
+    of other processes end without notice.
+    """
+
+    def __init__(self, max_inflight_calls: Optional[int] = None, max_wait_seconds: float = 120.0, store=None):
+        self._max_inflight_calls = max_inflight_calls
+        self.max_wait_seconds = max_wait_seconds
+        self.store = store
+        self._admitted: List[_Ticket] = []
+        self._queue: Deque[_Ticket] = deque()
+        self._shared: List[dict] = []
+
+    @property
+    def max_inflight_calls(self) -> int:
+        if self._max_inflight_calls:
+            return self._max_inflight_calls
+        if self.store is not None and settings.LLM_GLOBAL_CONCURRENCY:
+            return 8 * settings.LLM_GLOBAL_CONCURRENCY
+        return 8 * get_scheduler().capacity
+
+    async def refresh(self) -> None:
+        """
+        Read the admitted jobs of all API processes from the shared store (queue mode).
+        """
+        if self.store is not None:
+            self._shared = await asyncio.to_thread(self.store.admitted_jobs)
+
+    def _load(self) -> Dict[str, Tuple[float, int]]:
+        # Predicted end (wall clock) and calls of each admitted job; jobs running past their estimate end now
+        now = time.time()
+        load = {job["id"]: (max(now, job["admitted_at"] + job["seconds"]), job["calls"]) for job in self._shared}
+        for t in self._admitted:
+            load.setdefault(t.job_id, (max(now, t.admitted_at + t.seconds), t.calls))
+        return load
+
+    @property
+    def inflight_calls(self) -> int:
+        return sum(held for _, held in self._load().values())
+
+    def _fits(self, calls: int, inflight_calls: int, running: int) -> bool:
+        return running == 0 or inflight_calls + calls <= self.max_inflight_calls
+
+    def predicted_wait(self, calls: int) -> float:
+        """
+        Seconds until a job of `calls` predicted calls would be admitted, replaying
+        the queue: running jobs end at their estimated duration, and each queued job
+        starts once enough calls are released.
+        """
+        ends = list(self._load().values())
+        inflight_calls = sum(held for _, held in ends)
+        if not self._queue and self._fits(calls, inflight_calls, len(ends)):
+            return 0.0
+        now = time.time()
+        heapq.heapify(ends)
+        clock = now
+        for waiting_calls, seconds in [(t.calls, t.seconds) for t in self._queue] + [(calls, 0.0)]:
+            while not self._fits(waiting_calls, inflight_calls, len(ends)):
+                end, ended_calls = heapq.heappop(ends)
+                clock = max(clock, end)
+                inflight_calls -= ended_calls
+            heapq.heappush(ends, (clock + seconds, waiting_calls))
+            inflight_calls += waiting_calls
+        return clock - now
+
+    def decide(self, preflight: dict) -> dict:
+        """
+        Decision for a job with this preflight (without reserving anything):
+        "admit", "queue" or "reject", with the reason and predicted wait.
+        """
+        analysis, estimate = preflight["analysis"], preflight["estimate"]
+        if settings.PDF_MAX_PAGES and analysis["total_pages"] > settings.PDF_MAX_PAGES:
+            return {"decision": "reject", "reason": "too_many_pages",
+                    "detail": f"The PDF has {analysis['total_pages']} pages, the limit is {settings.PDF_MAX_PAGES}"}
+        if settings.ADMISSION_MAX_COST_USD is not None and estimate["cost_usd"] > settings.ADMISSION_MAX_COST_USD:
+            return {"decision": "reject", "reason": "too_expensive",
+                    "detail": f"Predicted cost ${estimate['cost_usd']} exceeds the limit of ${settings.ADMISSION_MAX_COST_USD}"}
+        if analysis["total_pages"] == 0:
+            return {"decision": "reject", "reason": "empty", "detail": "The PDF has no pages"}
+
+        wait = self.predicted_wait(estimate["llm_calls"])
+        if wait == 0:
+            return {"decision": "admit", "reason": None, "predicted_wait_seconds": 0.0}
+        if wait <= self.max_wait_seconds:
+            return {"decision": "queue", "reason": "server_busy", "predicted_wait_seconds": round(wait, 1)}
+        return {"decision": "reject", "reason": "server_busy", "predicted_wait_seconds": round(wait, 1),
+                "detail": f"Server busy: predicted wait of {wait:.0f}s exceeds {self.max_wait_seconds:.0f}s"}
+
+    async def acquire(
+        self,
+        job_id: str,
+        preflight: dict,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        on_queued: Optional[Callable[[dict], Awaitable[None]]] = None
+    ) -> _Ticket:
+        """
+        Admit a job, waiting for its turn if it was queued. Release the returned
+        ticket when the job ends. In queue mode, pass `ticket.payload()` with the
+        job to the shared queue so other API processes count it.
+
+        Args:
+            job_id: Job the ticket is for
+            preflight: Result of preflight() for the job's PDF
+            is_disconnected: Checked while queued; the job leaves the queue if the client is gone
+            on_queued: Called with the decision when the job has to wait
+
+        Raises:
+            AdmissionRejectedError: The job is rejected
+            JobCancelledError: The client disconnected while the job was queued
+        """
+        await self.refresh()
+        decision = self.decide(preflight)
+        metrics.increment("admission_decisions", decision=decision["decision"], reason=decision["reason"] or "")
+        if decision["decision"] == "reject":
+            logger.info(f"Rejecting job {job_id}: {decision['detail']}")
+            raise AdmissionRejectedError(decision["reason"], decision["detail"], decision.get("predicted_wait_seconds"))
+
+        ticket = _Ticket(job_id, preflight["estimate"]["llm_calls"], preflight["estimate"]["duration_p90_seconds"])
+        if decision["decision"] == "admit":
+            self._admit(ticket)
+            return ticket
+
+        logger.info(f"Queueing job {job_id} ({ticket.calls} predicted calls, ~{decision['predicted_wait_seconds']}s wait)")
+        ticket.admitted = asyncio.get_running_loop().create_future()
+        self._queue.append(ticket)
+        try:
+            if on_queued is not None:
+                await on_queued(decision)
+            while True:
+                done, _ = await asyncio.wait({ticket.admitted}, timeout=settings.JOB_DISCONNECT_POLL_SECONDS)
+                if done:
+                    return ticket
+                if self.store is not None:
+                    await self.refresh()
+                    self._admit_waiting()
+                    if ticket.admitted.done():
+                        return ticket
+                if is_disconnected and await is_disconnected():
+                    logger.info(f"Client of queued job {job_id} disconnected")
+                    raise JobCancelledError(job_id, "client_disconnected")
+        except BaseException:
+            if ticket.admitted.done():
+                self.release(ticket)
+            else:
+                self._queue.remove(ticket)
+                ticket.admitted.cancel()
+            raise
+
+    def _admit(self, ticket: _Ticket) -> None:
+        ticket.admitted_at = time.time()
+        self._admitted.append(ticket)
+        metrics.set_gauge("admission_inflight_calls", self.inflight_calls)
+
+    def _admit_waiting(self) -> None:
+        while self._queue:
+            load = self._load()
+            if not self._fits(self._queue[0].calls, sum(held for _, held in load.values()), len(load)):
+                return
+            waiting = self._queue.popleft()
+            self._admit(waiting)
+            waiting.admitted.set_result(None)
+
+    def release(self, ticket: _Ticket) -> None:
+        self._admitted.remove(ticket)
+        # The job is no longer counted even if the last refresh still saw it running
+        self._shared = [job for job in self._shared if job["id"] != ticket.job_id]
+        metrics.set_gauge("admission_inflight_calls", self.inflight_calls)
+        self._admit_waiting()
+
+    def snapshot(self) -> dict:
+        load = self._load()
+        return {
+            "inflight_calls": sum(held for _, held in load.values()),
+            "max_inflight_calls": self.max_inflight_calls,
+            "running_jobs": len(load),
+            "queued_jobs": [{"job_id": t.job_id, "llm_calls": t.calls} for t in self._queue],
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            settings.ADMISSION_MAX_INFLIGHT_CALLS, settings.ADMISSION_MAX_WAIT_SECONDS, store=get_shared_store()
+        )
+    return _controller
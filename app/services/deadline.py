@@ -0,0 +1,201 @@
+import logging
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Degradations, in the order the planner applies them
+DEGRADATIONS = ("parallel_graph", "reduced_resolution", "sampled_pages", "skipped_cross_links", "skipped_escalation")
+
+# Estimated latency of a low-detail vision call relative to a full-resolution one
+LOW_RES_CALL_FACTOR = 0.8
+# Slides per topic assumed before topics are known
+PAGES_PER_TOPIC = 4
+
+
+class JobDeadline:
+    """
+    Time budget of a job. Stages check the remaining time and degrade their work
+    to meet it; the degradations applied are reported in the result metadata.
+
+    The budget starts at `started_at` (wall clock, so it can be carried over to a
+    processing worker with the time spent queued).
+    """
+
+    def __init__(self, seconds: float, started_at: Optional[float] = None):
+        self.seconds = seconds
+        self.started_at = started_at if started_at is not None else time.time()
+        self.degradations: List[str] = []
+        self.details: Dict[str, dict] = {}
+
+    def elapsed(self) -> float:
+        return time.time() - self.started_at
+
+    def remaining(self) -> float:
+        return self.seconds - self.elapsed()
+
+    def budget(self) -> float:
+        """
+        Remaining time the stages may plan to use (keeps DEADLINE_SAFETY_MARGIN in reserve).
+        """
+        return max(0.0, self.remaining() * (1 - settings.DEADLINE_SAFETY_MARGIN))
+
+    def applied(self, degradation: str) -> bool:
+        return degradation in self.degradations
+
+    def degrade(self, degradation: str, **details) -> None:
+        if degradation not in self.degradations:
+            self.degradations.append(degradation)
+            metrics.increment("deadline_degradations", degradation=degradation)
+            logger.info(f"Deadline of {self.seconds}s ({self.remaining():.1f}s left): applying {degradation} {details or ''}")
+        if details:
+            self.details[degradation] = details
+
+    def summary(self) -> dict:
+        return {
+            "deadline_seconds": self.seconds,
+            "elapsed_seconds": round(self.elapsed(), 2),
+            "deadline_met": self.elapsed() <= self.seconds,
+            "degradations": list(self.degradations),
+            "degradation_details": dict(self.details),
+        }
+
+
+_deadline: ContextVar[Optional[JobDeadline]] = ContextVar("job_deadline", default=None)
+
+
+@contextmanager
+def job_deadline(seconds: Optional[float], started_at: Optional[float] = None) -> Iterator[Optional[JobDeadline]]:
+    """
+    Give the work done inside the block (and the tasks it starts) a time budget.
+    Without seconds, processing is not bounded and yields None.
+    """
+    if not seconds:
+        yield None
+        return
+    deadline = JobDeadline(seconds, started_at)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[JobDeadline]:
+    return _deadline.get()
+
+
+def estimated_call_seconds() -> float:
+    """
+    Expected duration of one LLM call: the 75th percentile of recent calls to
+    LLM_MODEL, or DEADLINE_DEFAULT_CALL_SECONDS before any was measured.
+    """
+    measured = metrics.timing_percentile("llm_call_seconds", 0.75, model=settings.LLM_MODEL)
+    return measured if measured is not None else settings.DEADLINE_DEFAULT_CALL_SECONDS
+
+
+def sample_pages(nb_pages: int, count: int) -> List[int]:
+    """
+    `count` page numbers spread evenly over the deck, first and last page included.
+    """
+    if count >= nb_pages:
+        return list(range(1, nb_pages + 1))
+    if count <= 1:
+        return [1]
+    return sorted({round(1 + k * (nb_pages - 1) / (count - 1)) for k in range(count)})
+
+
+def estimate_seconds(
+    nb_pages: int,
+    concurrency: int,
+    call: float,
+    low_res: bool = False,
+    parallel: bool = False,
+    graph_overlaps: bool = False
+) -> float:
+    """
+    Expected duration of the pipeline for a deck, from the latency of one LLM call:
+    page summaries in waves of `concurrency` calls, then topic extraction and the
+    graph (one call per topic in sequence, or parallel calls and a cross-link call).
+    With graph_overlaps (progressive pipeline), sequential graph steps start once
+    the first topic is segmented, in parallel with the summaries.
+    """
+    concurrency = max(1, concurrency)
+    summaries = math.ceil(nb_pages / concurrency) * call * (LOW_RES_CALL_FACTOR if low_res else 1)
+    topics = max(1, math.ceil(nb_pages / PAGES_PER_TOPIC))
+    if graph_overlaps:
+        return max(summaries, (2 + topics) * call) + call
+    if parallel:
+        return summaries + call + math.ceil(topics / concurrency) * call + call
+    return summaries + call + topics * call
+
+
+def plan_pages(nb_pages: int, concurrency: int, graph_overlaps: bool = False) -> Tuple[List[int], bool]:
+    """
+    Plan the page summaries of a job against its deadline, degrading in order:
+    parallel graph building, reduced page resolution, then page sampling.
+
+    Args:
+        nb_pages: Pages in the deck
+        concurrency: LLM calls that can run at once
+        graph_overlaps: Graph steps run while pages are summarized (progressive pipeline)
+
+    Returns:
+        Tuple of (page numbers to summarize, render at reduced resolution)
+    """
+    pages = list(range(1, nb_pages + 1))
+    deadline = current_deadline()
+    if deadline is None:
+        return pages, False
+
+    call = estimated_call_seconds()
+    budget = deadline.budget()
+
+    def duration(count: int, low_res: bool, parallel: bool) -> float:
+        return estimate_seconds(count, concurrency, call, low_res, parallel, graph_overlaps)
+
+    if duration(nb_pages, False, False) <= budget:
+        return pages, False
+    if not graph_overlaps:
+        deadline.degrade("parallel_graph")
+        if duration(nb_pages, False, True) <= budget:
+            return pages, False
+    deadline.degrade("reduced_resolution")
+    count = nb_pages
+    while count > settings.DEADLINE_MIN_PAGES and duration(count, True, True) > budget:
+        count -= 1
+    if count < nb_pages:
+        deadline.degrade("sampled_pages", pages=count, total_pages=nb_pages)
+        pages = sample_pages(nb_pages, count)
+    return pages, True
+
+
+def record_outcome(deadline: Optional[JobDeadline], completed: bool = True) -> None:
+    """
+    Count a finished job with a deadline as met or missed (failed jobs miss it).
+    """
+    if deadline is None:
+        return
+    met = completed and deadline.elapsed() <= deadline.seconds
+    metrics.increment("deadline_jobs", outcome="met" if met else "missed")
+    metrics.observe("deadline_budget_used", deadline.elapsed() / deadline.seconds)
+
+
+def deadline_stats() -> dict:
+    """
+    Jobs with a deadline, the share that met it and how often each degradation was applied.
+    """
+    met = metrics.counter_value("deadline_jobs", outcome="met")
+    missed = metrics.counter_value("deadline_jobs", outcome="missed")
+    return {
+        "jobs": int(met + missed),
+        "met": int(met),
+        "hit_rate": round(met / (met + missed), 4) if met + missed else None,
+        "degradations": {name: int(metrics.counter_value("deadline_degradations", degradation=name)) for name in DEGRADATIONS},
+    }
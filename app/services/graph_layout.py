@@ -0,0 +1,242 @@
+import logging
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ideal edge length in pixels (the unit used by the React Flow canvas)
+IDEAL_EDGE_LENGTH = 220.0
+# Central nodes are heavier so they act as hubs and move less than their subnodes
+CENTRAL_MASS = 3.0
+# Rows of the pairwise repulsion matrix computed at once (bounds memory to ~chunk * n)
+REPULSION_CHUNK = 512
+
+
+def _parent_of(graph: dict, central_ids: set) -> Dict[str, str]:
+    """
+    Map every subnode to the first central node it is connected to.
+    """
+    parents = {}
+    for edge in graph.get('edges', []):
+        source, target = edge.get('from'), edge.get('to')
+        if source in central_ids and target not in central_ids:
+            parents.setdefault(target, source)
+        elif target in central_ids and source not in central_ids:
+            parents.setdefault(source, target)
+    return parents
+
+
+def radial_layout(graph: dict, edge_length: float = IDEAL_EDGE_LENGTH) -> Dict[str, Dict[str, float]]:
+    """
+    Place central nodes on a ring and their subnodes on a small ring around them.
+    Used as the starting point of the force-directed refinement.
+
+    Args:
+        graph: Graph dict with "nodes" and "edges"
+        edge_length: Distance between a central node and its subnodes
+
+    Returns:
+        Dict mapping node ID to {"x": ..., "y": ...}
+    """
+    nodes = graph.get('nodes', [])
+    centrals = [n['id'] for n in nodes if n.get('type') == 'central']
+    central_ids = set(centrals)
+    parents = _parent_of(graph, central_ids)
+
+    positions: Dict[str, Dict[str, float]] = {}
+    ring_radius = 0.0 if len(centrals) <= 1 else max(
+        edge_length * 1.5, len(centrals) * edge_length * 1.6 / (2 * math.pi)
+    )
+    for i, node_id in enumerate(centrals):
+        angle = 2 * math.pi * i / max(len(centrals), 1)
+        positions[node_id] = {"x": ring_radius * math.cos(angle), "y": ring_radius * math.sin(angle)}
+
+    children: Dict[str, List[str]] = {c: [] for c in centrals}
+    orphans = []
+    for node in nodes:
+        if node['id'] in central_ids:
+            continue
+        parent = parents.get(node['id'])
+        if parent:
+            children[parent].append(node['id'])
+        else:
+            orphans.append(node['id'])
+
+    for parent, kids in children.items():
+        px, py = positions[parent]['x'], positions[parent]['y']
+        # Fan the subnodes out away from the centre of the map
+        base_angle = math.atan2(py, px) if (px or py) else 0.0
+        spread = math.pi if ring_radius else 2 * math.pi
+        for j, kid in enumerate(kids):
+            offset = (j + 0.5) / len(kids) - 0.5
+            angle = base_angle + offset * spread
+            positions[kid] = {"x": px + edge_length * math.cos(angle), "y": py + edge_length * math.sin(angle)}
+
+    outer_radius = ring_radius + 2 * edge_length
+    for j, node_id in enumerate(orphans):
+        angle = 2 * math.pi * j / len(orphans)
+        positions[node_id] = {"x": outer_radius * math.cos(angle), "y": outer_radius * math.sin(angle)}
+
+    return positions
+
+
+def _repulsion(pos: np.ndarray, k2: float) -> np.ndarray:
+    """
+    Sum of pairwise repulsive forces (k^2 / d) for every node, vectorized in row chunks.
+    """
+    xs, ys = pos[:, 0], pos[:, 1]
+    disp = np.empty_like(pos)
+    for start in range(0, pos.shape[0], REPULSION_CHUNK):
+        end = start + REPULSION_CHUNK
+        dx = xs[start:end, None] - xs[None, :]
+        dy = ys[start:end, None] - ys[None, :]
+        scale = dx * dx + dy * dy
+        np.maximum(scale, 1e-2, out=scale)
+        np.divide(k2, scale, out=scale)
+        disp[start:end, 0] = (scale * dx).sum(axis=1)
+        disp[start:end, 1] = (scale * dy).sum(axis=1)
+    return disp
+
+
+def force_directed(
+    pos: np.ndarray,
+    edges: np.ndarray,
+    mass: np.ndarray,
+    mobility: np.ndarray,
+    iterations: int,
+    temperature: float,
+    edge_length: float = IDEAL_EDGE_LENGTH,
+    gravity: float = 0.02
+) -> np.ndarray:
+    """
+    Fruchterman-Reingold refinement of node positions.
+
+    Args:
+        pos: (n, 2) initial positions
+        edges: (m, 2) node index pairs
+        mass: (n,) node masses, heavier nodes move less
+        mobility: (n,) per-node multiplier on the step (0 pins a node)
+        iterations: Number of iterations
+        temperature: Maximum displacement of the first iteration (cools linearly)
+        edge_length: Ideal edge length
+        gravity: Pull towards the origin keeping disconnected parts together
+
+    Returns:
+        (n, 2) refined positions
+    """
+    pos = pos.astype(float, copy=True)
+    k2 = edge_length * edge_length
+    for step in range(iterations):
+        disp = _repulsion(pos, k2)
+        if len(edges):
+            delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            dist = np.linalg.norm(delta, axis=1, keepdims=True)
+            force = delta * (dist / edge_length)
+            np.add.at(disp, edges[:, 0], -force)
+            np.add.at(disp, edges[:, 1], force)
+        disp -= gravity * pos
+        disp /= mass[:, None]
+
+        length = np.linalg.norm(disp, axis=1, keepdims=True)
+        np.maximum(length, 1e-9, out=length)
+        t = temperature * (1 - step / iterations)
+        pos += disp / length * np.minimum(length, t) * mobility[:, None]
+    return pos
+
+
+def compute_layout(
+    graph: dict,
+    previous: Optional[Dict[str, Dict[str, float]]] = None,
+    iterations: int = 80,
+    edge_length: float = IDEAL_EDGE_LENGTH
+) -> Dict[str, Dict[str, float]]:
+    """
+    Compute node coordinates for a mind map graph.
+
+    Without previous positions the layout starts from a radial arrangement (central
+    nodes as hubs, subnodes around them) and is refined with a force-directed pass.
+    With previous positions only the new nodes move freely: known nodes start where
+    they were and are damped, and fewer, cooler iterations are run, so small edits
+    do not reshuffle the map.
+
+    Args:
+        graph: Graph dict with "nodes" and "edges"
+        previous: Optional previous layout (node ID -> {"x", "y"})
+        iterations: Iterations of a full layout
+        edge_length: Ideal edge length in pixels
+
+    Returns:
+        Dict mapping node ID to {"x": ..., "y": ...}
+    """
+    nodes = graph.get('nodes', [])
+    if not nodes:
+        return {}
+
+    ids = [n['id'] for n in nodes]
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    edge_pairs = [
+        (index[e['from']], index[e['to']])
+        for e in graph.get('edges', [])
+        if e.get('from') in index and e.get('to') in index and e['from'] != e['to']
+    ]
+    edges = np.array(edge_pairs, dtype=int).reshape(-1, 2)
+    mass = np.array([CENTRAL_MASS if n.get('type') == 'central' else 1.0 for n in nodes])
+
+    initial = radial_layout(graph, edge_length)
+    pos = np.array([[initial[i]['x'], initial[i]['y']] for i in ids], dtype=float)
+    mobility = np.ones(len(ids))
+
+    previous = previous or {}
+    known = np.array([node_id in previous for node_id in ids])
+    if known.any():
+        for i, node_id in enumerate(ids):
+            if known[i]:
+                pos[i] = (previous[node_id]['x'], previous[node_id]['y'])
+        # Start new nodes next to their already placed neighbours
+        placed_neighbours: Dict[int, List[int]] = {}
+        for a, b in edge_pairs:
+            if known[b] and not known[a]:
+                placed_neighbours.setdefault(a, []).append(b)
+            if known[a] and not known[b]:
+                placed_neighbours.setdefault(b, []).append(a)
+        rng = np.random.default_rng(len(ids))
+        for i, placed in placed_neighbours.items():
+            pos[i] = pos[placed].mean(axis=0) + rng.normal(0, edge_length / 4, 2)
+        mobility[known] = 0.1
+        new_fraction = float((~known).sum()) / len(ids)
+        iterations = max(10, int(iterations * min(1.0, new_fraction * 2)))
+        temperature = edge_length * 0.5
+    else:
+        temperature = edge_length
+
+    pos = force_directed(pos, edges, mass, mobility, iterations, temperature, edge_length)
+    if not known.any():
+        # Keep the previous frame of reference on incremental runs
+        pos -= pos.mean(axis=0)
+
+    return {node_id: {"x": round(float(x), 1), "y": round(float(y), 1)} for node_id, (x, y) in zip(ids, pos)}
+
+
+def attach_layout(graph: dict, layout: Dict[str, Dict[str, float]]) -> dict:
+    """
+    Return a copy of the graph whose nodes carry their "x"/"y" coordinates.
+    """
+    nodes = []
+    for node in graph.get('nodes', []):
+        position = layout.get(node.get('id'))
+        nodes.append({**node, **position} if position else dict(node))
+    return {"nodes": nodes, "edges": list(graph.get('edges', []))}
+
+
+def layout_of(graph: dict) -> Dict[str, Dict[str, float]]:
+    """
+    Node positions of a graph returned by attach_layout, computed with
+    compute_layout when its nodes carry none.
+    """
+    layout = {
+        node['id']: {"x": node['x'], "y": node['y']}
+        for node in graph.get('nodes', []) if 'x' in node and 'y' in node
+    }
+    return layout or compute_layout(graph)
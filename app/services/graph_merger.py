@@ -0,0 +1,438 @@
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process uses the journal
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Postings scanned per token when looking for cross-document links, so linking
+# a node costs the same however many nodes share its most common words
+LINK_MAX_POSTINGS = 500
+
+# Words that carry no meaning for matching node titles; keeping them out of the
+# inverted index keeps the posting lists short.
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "in", "into", "is",
+    "of", "on", "or", "the", "to", "vs", "with", "its", "their", "how", "what",
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a node title for exact-match deduplication.
+    Lowercases, drops punctuation and collapses whitespace.
+    """
+    return " ".join(_TOKEN_PATTERN.findall((title or "").lower()))
+
+
+def title_tokens(title: str) -> Set[str]:
+    """
+    Split a title into the set of meaningful tokens used by the inverted index.
+    A trailing plural "s" is stripped so "Transformers" matches "Transformer".
+    """
+    tokens = set()
+    for token in _TOKEN_PATTERN.findall((title or "").lower()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.add(token)
+    return tokens
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """
+    Jaccard similarity between two token sets.
+    """
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class KnowledgeGraphStore:
+    """
+    Persistent knowledge graph that merges mind maps from many documents.
+
+    Nodes are deduplicated by normalized title, then by token similarity using an
+    inverted token index, so merging a document only touches the nodes that share
+    tokens with it. Nodes of different documents that are similar but not equal are
+    connected with cross-document edges.
+
+    The store is persisted as an append-only JSONL journal: every merge appends
+    only the records it created or changed, so persisting is also proportional to
+    the size of the merged document. Several processes can share the journal: a
+    merge holds an exclusive lock on it and first replays the records other
+    processes appended, so node and edge IDs are never issued twice, and queries
+    replay them too.
+    """
+
+    def __init__(
+        self,
+        journal_path: Optional[str] = None,
+        dedup_threshold: float = 0.8,
+        link_threshold: float = 0.5,
+        max_links_per_node: int = 2
+    ):
+        self.journal_path = journal_path
+        self.dedup_threshold = dedup_threshold
+        self.link_threshold = link_threshold
+        self.max_links_per_node = max_links_per_node
+
+        self.nodes: Dict[str, dict] = {}
+        self.edges: Dict[str, dict] = {}
+        self.documents: Dict[str, dict] = {}
+
+        self._title_index: Dict[str, str] = {}
+        self._token_index: Dict[str, Set[str]] = defaultdict(set)
+        self._node_tokens: Dict[str, Set[str]] = {}
+        self._edge_keys: Set[Tuple[str, str, str]] = set()
+        self._adjacency: Dict[str, Set[str]] = defaultdict(set)
+        self._next_node = 1
+        self._next_edge = 1
+        # Merges run in worker threads; queries take the lock too so they never see a partial merge
+        self._lock = threading.RLock()
+        self._layout: Dict[str, Dict[str, float]] = {}
+        self._layout_dirty = True
+        # Bytes of the journal already replayed
+        self._journal_offset = 0
+
+        if journal_path and os.path.exists(journal_path):
+            with self._journal_locked(exclusive=False):
+                self._catch_up()
+            logger.info(f"Loaded knowledge graph: {len(self.nodes)} nodes, {len(self.edges)} edges, {len(self.documents)} documents")
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def _index_node(self, node: dict) -> None:
+        node_id = node['id']
+        self.nodes[node_id] = node
+        if node_id.startswith('kg_'):
+            self._next_node = max(self._next_node, int(node_id[3:]) + 1)
+        self._title_index.setdefault(normalize_title(node['title']), node_id)
+        tokens = title_tokens(node['title'])
+        self._node_tokens[node_id] = tokens
+        for token in tokens:
+            self._token_index[token].add(node_id)
+
+    def _index_edge(self, edge: dict) -> None:
+        self.edges[edge['id']] = edge
+        if edge['id'].startswith('kge_'):
+            self._next_edge = max(self._next_edge, int(edge['id'][4:]) + 1)
+        self._edge_keys.add((edge['from'], edge['to'], edge.get('label', '').lower()))
+        self._adjacency[edge['from']].add(edge['to'])
+        self._adjacency[edge['to']].add(edge['from'])
+
+    @contextmanager
+    def _journal_locked(self, exclusive: bool) -> Iterator[None]:
+        """
+        Hold a lock on the journal shared with the other processes using it.
+        """
+        if not self.journal_path or fcntl is None:
+            yield
+            return
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _catch_up(self) -> None:
+        """
+        Replay the journal records appended since the last replay (by this or
+        other processes) to update the graph and its indexes.
+        """
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._journal_offset)
+            data = f.read()
+        # A line still being written is replayed once complete
+        data = data[:data.rfind(b"\n") + 1]
+        if not data:
+            return
+        self._journal_offset += len(data)
+        for line in data.decode('utf-8').splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            kind = record.pop('kind')
+            if kind == 'node':
+                if record['id'] in self.nodes:
+                    # Upsert of an existing node (e.g. type promotion or new source)
+                    self.nodes[record['id']].update(record)
+                else:
+                    self._index_node(record)
+            elif kind == 'edge':
+                if record['id'] not in self.edges:
+                    self._index_edge(record)
+            elif kind == 'document':
+                self.documents[record['source_id']] = record
+        self._layout_dirty = True
+
+    def _sync(self) -> None:
+        # Called with self._lock held
+        if self.journal_path:
+            with self._journal_locked(exclusive=False):
+                self._catch_up()
+
+    def _append_journal(self, records: List[dict]) -> None:
+        # Called with the journal locked and replayed, so the records follow everything replayed
+        if not self.journal_path or not records:
+            return
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, 'ab') as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode('utf-8'))
+            self._journal_offset = f.tell()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def find_similar(self, title: str, limit: Optional[int] = 5) -> List[Tuple[str, float]]:
+        """
+        Find existing nodes whose title is similar to the given title.
+
+        Args:
+            title: Title to look up
+            limit: Maximum number of matches (None for all)
+
+        Returns:
+            List of (node_id, similarity) sorted by decreasing similarity
+        """
+        tokens = title_tokens(title)
+        candidates: Set[str] = set()
+        for token in tokens:
+            candidates |= self._token_index.get(token, set())
+
+        scored = []
+        for node_id in candidates:
+            score = jaccard(tokens, self._node_tokens[node_id])
+            if score > 0:
+                scored.append((node_id, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit] if limit is not None else scored
+
+    def _match_node(self, title: str) -> Optional[str]:
+        exact = self._title_index.get(normalize_title(title))
+        if exact:
+            return exact
+        matches = self.find_similar(title, limit=1)
+        if matches and matches[0][1] >= self.dedup_threshold:
+            return matches[0][0]
+        return None
+
+    # ------------------------------------------------------------------
+    # Merge
+    # ------------------------------------------------------------------
+    def merge_graph(self, graph: dict, source_id: str) -> Dict[str, int]:
+        """
+        Merge a document's mind map into the knowledge graph.
+
+        Args:
+            graph: Graph dict with "nodes" and "edges" (GraphData shape)
+            source_id: Identifier of the document (e.g. the thread ID)
+
+        Returns:
+            Dict with counts of added/deduplicated nodes and added edges/links
+        """
+        with self._lock, self._journal_locked(exclusive=True):
+            # IDs are allocated after the records of other processes are replayed
+            self._catch_up()
+            stats = {"nodes_added": 0, "nodes_deduplicated": 0, "edges_added": 0, "cross_links_added": 0}
+            journal: List[dict] = []
+            local_to_global: Dict[str, str] = {}
+            new_node_ids: List[str] = []
+
+            for node in graph.get('nodes', []):
+                title = node.get('title', '').strip()
+                if not title or 'id' not in node:
+                    continue
+                node_type = node.get('type', 'subnode')
+                match = self._match_node(title)
+
+                if match:
+                    existing = self.nodes[match]
+                    changed = False
+                    if source_id not in existing['sources']:
+                        existing['sources'].append(source_id)
+                        changed = True
+                    if node_type == 'central' and existing['type'] != 'central':
+                        existing['type'] = 'central'
+                        changed = True
+                    if changed:
+                        journal.append({"kind": "node", **existing})
+                    local_to_global[node['id']] = match
+                    stats['nodes_deduplicated'] += 1
+                    continue
+
+                node_id = f"kg_{self._next_node}"
+                self._next_node += 1
+                new_node = {"id": node_id, "title": title, "type": node_type, "sources": [source_id]}
+                self._index_node(new_node)
+                journal.append({"kind": "node", **new_node})
+                local_to_global[node['id']] = node_id
+                new_node_ids.append(node_id)
+                stats['nodes_added'] += 1
+
+            for edge in graph.get('edges', []):
+                source = local_to_global.get(edge.get('from'))
+                target = local_to_global.get(edge.get('to'))
+                label = edge.get('label', '')
+                if self._add_edge(source, target, label, journal):
+                    stats['edges_added'] += 1
+
+            # Cross-document links: only the newly created nodes are looked up
+            for node_id in new_node_ids:
+                for other_id in self._link_candidates(node_id, source_id):
+                    if self._add_edge(node_id, other_id, "relates to", journal):
+                        stats['cross_links_added'] += 1
+
+            document = {"kind": "document", "source_id": source_id, **stats}
+            self.documents[source_id] = {k: v for k, v in document.items() if k != 'kind'}
+            journal.append(document)
+            self._append_journal(journal)
+            self._layout_dirty = True
+
+            logger.info(
+                f"Merged {source_id} into knowledge graph: {stats['nodes_added']} new nodes, "
+                f"{stats['nodes_deduplicated']} deduplicated, {stats['edges_added']} edges, "
+                f"{stats['cross_links_added']} cross-links"
+            )
+            return stats
+
+    def _link_candidates(self, node_id: str, source_id: str) -> List[str]:
+        """
+        Nodes of other documents to link a new node to: the `max_links_per_node`
+        most similar ones above `link_threshold`. A node that similar shares at
+        least one of the new node's rarest tokens, so only their postings are
+        scanned, at most LINK_MAX_POSTINGS each.
+        """
+        tokens = self._node_tokens[node_id]
+        rarest = sorted(tokens, key=lambda token: (len(self._token_index[token]), token))
+        prefix = rarest[:len(tokens) - math.ceil(self.link_threshold * len(tokens)) + 1]
+
+        seen: Set[str] = {node_id}
+        scored = []
+        for token in prefix:
+            for other_id in islice(self._token_index[token], LINK_MAX_POSTINGS):
+                if other_id in seen:
+                    continue
+                seen.add(other_id)
+                if source_id in self.nodes[other_id]['sources']:
+                    continue
+                score = jaccard(tokens, self._node_tokens[other_id])
+                if score >= self.link_threshold:
+                    scored.append((other_id, score))
+        best = heapq.nsmallest(self.max_links_per_node, scored, key=lambda item: (-item[1], item[0]))
+        return [other_id for other_id, _ in best]
+
+    def _add_edge(self, source: Optional[str], target: Optional[str], label: str, journal: List[dict]) -> bool:
+        if not source or not target or source == target:
+            return False
+        key = (source, target, label.lower())
+        if key in self._edge_keys or (target, source, label.lower()) in self._edge_keys:
+            return False
+        edge = {"id": f"kge_{self._next_edge}", "from": source, "to": target, "label": label}
+        self._next_edge += 1
+        self._index_edge(edge)
+        journal.append({"kind": "edge", **edge})
+        return True
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def to_graph(self, node_ids: Optional[Set[str]] = None) -> dict:
+        """
+        Return the graph (or the part induced by node_ids) in GraphData shape.
+        """
+        with self._lock:
+            self._sync()
+            if node_ids is None:
+                node_ids = set(self.nodes)
+            nodes = [
+                {"id": n['id'], "title": n['title'], "type": n['type']}
+                for n in self.nodes.values() if n['id'] in node_ids
+            ]
+            edges = [
+                {"id": e['id'], "from": e['from'], "to": e['to'], "label": e['label']}
+                for e in self.edges.values() if e['from'] in node_ids and e['to'] in node_ids
+            ]
+            return {"nodes": nodes, "edges": edges}
+
+    def layout(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return node coordinates for the whole knowledge graph.
+        After a merge the layout is recomputed incrementally from the previous positions.
+        """
+        from app.services.graph_layout import compute_layout
+
+        with self._lock:
+            self._sync()
+            if self._layout_dirty:
+                self._layout = compute_layout(self.to_graph(), previous=self._layout)
+                self._layout_dirty = False
+            return self._layout
+
+    def query(self, text: str, depth: int = 1, limit: int = 10) -> dict:
+        """
+        Return the neighbourhood of the nodes matching a free-text query.
+
+        Args:
+            text: Query text matched against node titles
+            depth: Number of hops to expand around the matched nodes
+            limit: Maximum number of seed nodes
+
+        Returns:
+            Graph dict in GraphData shape
+        """
+        with self._lock:
+            self._sync()
+            seeds = {node_id for node_id, _ in self.find_similar(text, limit=limit)}
+            selected = set(seeds)
+            frontier = set(seeds)
+            for _ in range(max(depth, 0)):
+                frontier = {n for node_id in frontier for n in self._adjacency.get(node_id, ())} - selected
+                selected |= frontier
+            return self.to_graph(selected)
+
+
+_store: Optional[KnowledgeGraphStore] = None
+_store_lock = threading.Lock()
+
+
+def get_knowledge_graph() -> KnowledgeGraphStore:
+    """
+    Return the process-wide knowledge graph store, loading it on first use.
+    """
+    global _store
+    # Called from worker threads: two first calls must not each load a store
+    with _store_lock:
+        if _store is None:
+            from app.core.config import settings
+            _store = KnowledgeGraphStore(
+                journal_path=settings.KNOWLEDGE_GRAPH_PATH,
+                dedup_threshold=settings.KNOWLEDGE_GRAPH_DEDUP_THRESHOLD,
+                link_threshold=settings.KNOWLEDGE_GRAPH_LINK_THRESHOLD
+            )
+    return _store
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.graph_layout import layout_of
+from app.services.jobs import JobCancelledError, running_jobs
+from app.services.preflight import CALIBRATION_SERIES
+from app.services.progress import TERMINAL_EVENTS, job_events
+from app.services.shared_store import SharedStore, content_key
+from app.utils.export_utils import alias_export
+
+logger = logging.getLogger(__name__)
+
+
+async def submit_and_wait(
+    store: SharedStore,
+    job_id: str,
+    payload: dict,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+) -> dict:
+    """
+    Enqueue a job for the processing workers and wait for its result (API side
+    of queue mode). The job is cancelled if the client disconnects or the
+    caller is cancelled.
+
+    Raises:
+        JobAlreadyRunningError: A job with this ID is queued or running
+        JobCancelledError: The job was cancelled
+        RuntimeError: Processing failed
+    """
+    await asyncio.to_thread(store.enqueue, job_id, payload)
+    metrics.increment("jobs_enqueued")
+    last_disconnect_check = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(settings.JOB_QUEUE_POLL_SECONDS)
+            job = await asyncio.to_thread(store.job, job_id)
+            if job is None:
+                raise RuntimeError(f"Job {job_id} disappeared from the queue")
+            if job["status"] == "done":
+                return job["result"]
+            if job["status"] == "failed":
+                raise RuntimeError(job["error"] or "Processing failed")
+            if job["status"] == "cancelled":
+                raise JobCancelledError(job_id, job["cancel_reason"] or job["error"] or "aborted")
+            if is_disconnected and time.monotonic() - last_disconnect_check >= settings.JOB_DISCONNECT_POLL_SECONDS:
+                last_disconnect_check = time.monotonic()
+                if await is_disconnected():
+                    logger.info(f"Client of job {job_id} disconnected")
+                    await asyncio.to_thread(store.request_cancel, job_id, "client_disconnected")
+    except asyncio.CancelledError:
+        await asyncio.to_thread(store.request_cancel, job_id, "caller_cancelled")
+        raise
+
+
+async def stream_stored_events(
+    store: SharedStore,
+    job_id: str,
+    last_seq: int = 0,
+    heartbeat: float = 15.0,
+    start_timeout: float = 60.0
+) -> AsyncIterator[Optional[dict]]:
+    """
+    Same as JobEventBroker.subscribe, for jobs processed by another process:
+    polls the events stored by the processing worker.
+    """
+    idle_since = subscribed_at = time.monotonic()
+    started = False
+    while True:
+        messages = await asyncio.to_thread(store.events, job_id, last_seq)
+        started = started or bool(messages) or last_seq > 0
+        if not started and time.monotonic() - subscribed_at >= start_timeout:
+            return
+        for message in messages:
+            last_seq = message['seq']
+            yield message
+            if message['event'] in TERMINAL_EVENTS:
+                return
+        if messages:
+            idle_since = time.monotonic()
+        elif time.monotonic() - idle_since >= heartbeat:
+            idle_since = time.monotonic()
+            yield None
+        await asyncio.sleep(settings.JOB_QUEUE_POLL_SECONDS)
+
+
+class ProcessingWorker:
+    """
+    Processing side of queue mode: claims jobs from the shared store and runs up
+    to `concurrency` of them at once through the regular pipeline. Leases are
+    renewed while a job runs; a cancellation requested through the store is
+    picked up at the next renewal.
+
+    Progress events are written to the store by a single writer task, in
+    batches, so publishing never blocks the event loop on the store's lock.
+    The calibration samples measured while processing (see preflight) are
+    written when a job ends, for the estimates of the API workers.
+    """
+
+    def __init__(self, store: SharedStore, concurrency: int):
+        self.store = store
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stopping = False
+        self._events: Optional[asyncio.Queue] = None
+        self._event_writer: Optional[asyncio.Task] = None
+        self._samples: Deque[Tuple[str, Dict[str, str], float]] = deque()
+
+    def _collect_sample(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        # May be called from threads (LLM calls); deque appends are thread-safe
+        if name in CALIBRATION_SERIES:
+            self._samples.append((name, labels, value))
+
+    async def _write_samples(self) -> None:
+        samples = []
+        while self._samples:
+            samples.append(self._samples.popleft())
+        if samples:
+            try:
+                await asyncio.to_thread(self.store.add_samples, samples)
+            except Exception as e:
+                logger.warning(f"Failed to store {len(samples)} calibration samples: {str(e)}")
+
+    def _forward_event(self, job_id: str, event: str, data: dict) -> None:
+        # Jobs interrupted by a shutdown are retried elsewhere: their stream must not end here
+        if job_id in self._tasks and not self._stopping:
+            self._events.put_nowait((job_id, event, data))
+
+    async def _write_events(self) -> None:
+        while True:
+            batch = [await self._events.get()]
+            while not self._events.empty():
+                batch.append(self._events.get_nowait())
+            events = [item for item in batch if not isinstance(item, asyncio.Future)]
+            try:
+                if events:
+                    await asyncio.to_thread(self.store.add_events, events)
+            except Exception as e:
+                logger.warning(f"Failed to store {len(events)} progress events: {str(e)}")
+            for item in batch:
+                if isinstance(item, asyncio.Future) and not item.done():
+                    item.set_result(None)
+
+    async def _flush_events(self) -> None:
+        # Wait until the events published so far are stored (the terminal event before the job's status)
+        flushed = asyncio.get_running_loop().create_future()
+        self._events.put_nowait(flushed)
+        await flushed
+
+    async def _finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        await self._flush_events()
+        await self._write_samples()
+        await asyncio.to_thread(self.store.finish, job_id, status, result, error)
+
+    async def _keep_lease(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            reason = await asyncio.to_thread(self.store.heartbeat, job_id, self.worker_id, settings.JOB_LEASE_SECONDS)
+            if reason:
+                running_jobs.cancel(job_id, reason)
+
+    async def _process(self, job: dict) -> None:
+        # Imported here so the worker can start (and claim jobs) while the pipeline loads
+        from app.services.pdf_processor import PDFProcessor
+
+        job_id, payload = job["id"], job["payload"]
+        started = time.perf_counter()
+        lease = asyncio.create_task(self._keep_lease(job_id))
+        try:
+            key = await asyncio.to_thread(content_key, payload["file_path"])
+            cached = await asyncio.to_thread(self.store.cached_result, key)
+            export_path = None
+            if cached is not None:
+                # The graph of a job is served from its export: link the cached one under this job's ID
+                export_path = await asyncio.to_thread(alias_export, cached['metadata'].get('export_file_path'), job_id)
+            if export_path is not None:
+                metrics.increment("result_cache_hits")
+                result = {**cached, 'metadata': {**cached['metadata'], 'thread_id': job_id, 'export_file_path': export_path}}
+                layout = await asyncio.to_thread(layout_of, result['graph'])
+                job_events.publish(job_id, "completed", {"metadata": {**result['metadata'], 'export_file_path': os.path.basename(result['metadata']['export_file_path'])}, "layout": layout})
+            else:
+                result = await running_jobs.run(
+                    job_id,
+                    PDFProcessor().process_pdf(
+                        Path(payload["file_path"]),
+                        thread_id=job_id,
+                        profile=payload.get("profile", False),
+                        profile_memory=payload.get("profile_memory", False),
+                        tenant=payload.get("tenant"),
+                        priority=payload.get("priority", "normal"),
+                        deadline_seconds=payload.get("deadline_seconds"),
+                        deadline_started_at=payload.get("deadline_started_at")
+                    ),
+                    source=payload.get("saved_filename")
+                )
+                # Results degraded to meet a deadline are not served to later uploads
+                if not result['metadata'].get('degradations'):
+                    await asyncio.to_thread(self.store.store_result, key, result)
+            await self._finish(job_id, "done", result)
+            metrics.increment("jobs_processed", status="done")
+        except JobCancelledError as e:
+            await self._finish(job_id, "cancelled", None, e.reason)
+            metrics.increment("jobs_processed", status="cancelled")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            await self._finish(job_id, "failed", None, str(e))
+            metrics.increment("jobs_processed", status="failed")
+        finally:
+            lease.cancel()
+            metrics.observe("job_processing_seconds", time.perf_counter() - started)
+
+    async def run_forever(self) -> None:
+        self._events = asyncio.Queue()
+        self._event_writer = asyncio.create_task(self._write_events())
+        job_events.add_listener(self._forward_event)
+        metrics.add_observer(self._collect_sample)
+        logger.info(f"Worker {self.worker_id} processing up to {self.concurrency} jobs at once")
+        last_prune = 0.0
+        while True:
+            if len(self._tasks) < self.concurrency:
+                job = await asyncio.to_thread(self.store.claim, self.worker_id, settings.JOB_LEASE_SECONDS, settings.JOB_MAX_ATTEMPTS)
+                if job is not None:
+                    logger.info(f"Claimed job {job['id']} (attempt {job['attempts']})")
+                    task = asyncio.create_task(self._process(job))
+                    self._tasks[job["id"]] = task
+                    task.add_done_callback(lambda _, job_id=job["id"]: self._tasks.pop(job_id, None))
+                    continue
+            if time.monotonic() - last_prune > 3600:
+                last_prune = time.monotonic()
+                pruned = await asyncio.to_thread(self.store.prune, settings.JOB_RETENTION_SECONDS)
+                if pruned:
+                    logger.info(f"Pruned {pruned} finished jobs from the shared store")
+            await asyncio.sleep(settings.JOB_QUEUE_POLL_SECONDS)
+
+    async def shutdown(self) -> None:
+        """
+        Stop the running jobs; their leases expire and other workers retry them.
+        """
+        self._stopping = True
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        if self._event_writer is not None:
+            self._event_writer.cancel()
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelledError(Exception):
+    """
+    Raised by RunningJobs.run when the job was cancelled (explicitly, because its
+    client disconnected or because its file was deleted).
+    """
+
+    def __init__(self, job_id: str, reason: str):
+        super().__init__(f"Job {job_id} was cancelled ({reason})")
+        self.job_id = job_id
+        self.reason = reason
+
+
+class JobAlreadyRunningError(Exception):
+    """
+    Raised by RunningJobs.run when a job with the same ID is already running.
+    """
+
+
+class _RunningJob:
+    def __init__(self, task: asyncio.Task, source: Optional[str]):
+        self.task = task
+        self.source = source
+        self.started = time.monotonic()
+        self.reason: Optional[str] = None
+
+
+class RunningJobs:
+    """
+    Registry of the processing jobs running in this process, so they can be
+    cancelled by job ID or by the file they process.
+
+    Each job runs in its own task; cancelling it cancels the workflow node being
+    executed and, through it, the page tasks and LLM calls it waits on, which
+    hand their scheduler slots back as they unwind.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, _RunningJob] = {}
+
+    def is_running(self, job_id: str) -> bool:
+        return job_id in self._jobs
+
+    def cancel_reason(self, job_id: str) -> Optional[str]:
+        job = self._jobs.get(job_id)
+        return job.reason if job else None
+
+    async def _watch_disconnect(self, job_id: str, is_disconnected: Callable[[], Awaitable[bool]]) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_DISCONNECT_POLL_SECONDS)
+            if await is_disconnected():
+                logger.info(f"Client of job {job_id} disconnected")
+                self.cancel(job_id, "client_disconnected")
+                return
+
+    async def run(
+        self,
+        job_id: str,
+        coro: Coroutine[Any, Any, Any],
+        source: Optional[str] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> Any:
+        """
+        Run a job's coroutine as a cancellable task and wait for its result.
+
+        Args:
+            job_id: Job ID (must not be running already)
+            coro: The job's work, e.g. PDFProcessor.process_pdf(...)
+            source: File the job processes, for cancel_source
+            is_disconnected: Async check of the client connection (e.g. Request.is_disconnected),
+                polled every JOB_DISCONNECT_POLL_SECONDS; the job is cancelled when it returns True
+
+        Raises:
+            JobAlreadyRunningError: A job with this ID is already running
+            JobCancelledError: The job was cancelled
+        """
+        if job_id in self._jobs:
+            coro.close()
+            raise JobAlreadyRunningError(f"Job {job_id} is already running")
+
+        job = _RunningJob(asyncio.ensure_future(coro), source)
+        self._jobs[job_id] = job
+        watcher = asyncio.create_task(self._watch_disconnect(job_id, is_disconnected)) if is_disconnected else None
+        try:
+            try:
+                # Waiting without awaiting the task itself tells our own cancellation apart from the job's
+                await asyncio.wait({job.task})
+            except asyncio.CancelledError:
+                # The caller is being cancelled (e.g. server shutdown): take the job down with it
+                job.task.cancel()
+                metrics.increment("jobs_cancelled", reason="caller_cancelled")
+                raise
+            if job.task.cancelled():
+                reason = job.reason or "aborted"
+                metrics.increment("jobs_cancelled", reason=reason)
+                metrics.observe("cancelled_job_runtime_seconds", time.monotonic() - job.started)
+                raise JobCancelledError(job_id, reason)
+            return job.task.result()
+        finally:
+            if watcher:
+                watcher.cancel()
+            if self._jobs.get(job_id) is job:
+                del self._jobs[job_id]
+
+    def cancel(self, job_id: str, reason: str = "requested") -> bool:
+        """
+        Cancel a running job.
+
+        Returns:
+            bool: False if no such job is running
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.task.done():
+            return False
+        if job.reason is None:
+            job.reason = reason
+            logger.info(f"Cancelling job {job_id} ({reason})")
+            job.task.cancel()
+        return True
+
+    def cancel_source(self, source: str, reason: str = "file_deleted") -> List[str]:
+        """
+        Cancel the running jobs processing a file.
+
+        Returns:
+            IDs of the cancelled jobs
+        """
+        job_ids = [job_id for job_id, job in self._jobs.items() if job.source == source]
+        return [job_id for job_id in job_ids if self.cancel(job_id, reason)]
+
+    def snapshot(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        return {
+            job_id: {"source": job.source, "running_seconds": round(now - job.started, 1), "cancelling": job.reason is not None}
+            for job_id, job in self._jobs.items()
+        }
+
+
+running_jobs = RunningJobs()
@@ -1,10 +1,13 @@
+import asyncio
 import logging
+import os
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import uuid
 
-from app.langgraph.agents import graph
-from app.langgraph.user_state import userState
+from app.services.jobs import running_jobs
+from app.services.progress import job_events
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +20,44 @@ class PDFProcessor:
     3. Build a mind map graph
     """
     
-    async def process_pdf(self, file_path: Path) -> Dict[str, Any]:
+    async def process_pdf(
+        self,
+        file_path: Path,
+        thread_id: Optional[str] = None,
+        profile: bool = False,
+        profile_memory: bool = False,
+        tenant: Optional[str] = None,
+        priority: str = "normal",
+        deadline_seconds: Optional[float] = None,
+        deadline_started_at: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Process a PDF file and generate a mind map graph.
         
         Args:
             file_path: Path to the PDF file
+            thread_id: Optional job ID (generated if omitted); progress events are published under it
+            profile: Record a CPU/span profile of the workflow, saved next to the export
+            profile_memory: Also record tracemalloc allocation statistics (implies profile)
+            tenant: Tenant the job's LLM calls are accounted to by the fair scheduler
+            priority: Scheduling priority of the job's LLM calls (low, normal or high)
+            deadline_seconds: Time budget; processing is degraded to meet it (see app.services.deadline)
+            deadline_started_at: Start of the budget (wall clock, e.g. upload time of a queued job)
             
         Returns:
             Dictionary containing the graph with nodes and edges
         """
+        # The workflow pulls in langchain/langgraph/PyMuPDF, so it is only imported when needed
+        from app.langgraph.agents import get_graph
+        from app.services.graph_layout import attach_layout
+        from app.services.profiling import profile_job
+        from app.services.scheduler import job_context
+        from app.services.deadline import job_deadline, record_outcome
+        from app.services.preflight import record_job_duration
+        
+        thread_id = thread_id or f"session_{uuid.uuid4().hex[:8]}"
+        deadline = None
+        started = time.perf_counter()
         try:
             logger.info(f"Starting PDF processing for: {file_path}")
             
@@ -34,10 +65,7 @@ class PDFProcessor:
             if not file_path.exists():
                 raise FileNotFoundError(f"PDF file not found: {file_path}")
             
-            # Create initial state with unique thread ID
-            thread_id = f"session_{uuid.uuid4().hex[:8]}"
-            
-            initial_state: userState = {
+            initial_state = {
                 'thread_id': thread_id,
                 'path': str(file_path),
                 'nb_pages': 0,
@@ -48,17 +76,24 @@ class PDFProcessor:
                 'contextWindow_topics': {},
                 'graph': {},
                 'graph_building_complete': False,
+                'prompt_token_stats': [],
+                'layout': {},
                 'export_file_path': ''
             }
             
             # Execute the graph workflow
             logger.info("Invoking LangGraph workflow...")
-            result = await graph.ainvoke(initial_state)
+            with job_context(thread_id, tenant=tenant, priority=priority), job_deadline(deadline_seconds, deadline_started_at) as deadline:
+                if profile or profile_memory:
+                    with profile_job(thread_id, memory=profile_memory):
+                        result = await get_graph().ainvoke(initial_state)
+                else:
+                    result = await get_graph().ainvoke(initial_state)
             
             logger.info("Graph execution completed successfully!")
             
             # Extract the graph data
-            graph_data = result.get('graph', {'nodes': [], 'edges': []})
+            graph_data = attach_layout(result.get('graph', {'nodes': [], 'edges': []}), result.get('layout', {}))
             
             # Return the processing result
             processing_result = {
@@ -73,11 +108,26 @@ class PDFProcessor:
                 },
                 'topics': result.get('pages_topics', [])
             }
+            if deadline is not None:
+                processing_result['metadata'].update(deadline.summary())
+                record_outcome(deadline)
+            else:
+                # Runs without deadline degradations calibrate the preflight duration estimates
+                record_job_duration(result.get('nb_pages', 0), time.perf_counter() - started)
             
             logger.info(f"Processing complete: {processing_result['metadata']['total_nodes']} nodes, {processing_result['metadata']['total_edges']} edges")
+            # Clients only see the export's filename, not where it lives on the server
+            public_metadata = {**processing_result['metadata'], 'export_file_path': os.path.basename(processing_result['metadata']['export_file_path'])}
+            job_events.publish(thread_id, "completed", {"metadata": public_metadata, "layout": result.get('layout', {})})
             
             return processing_result
             
+        except asyncio.CancelledError:
+            logger.info(f"Processing of job {thread_id} cancelled")
+            job_events.publish(thread_id, "cancelled", {"reason": running_jobs.cancel_reason(thread_id) or "aborted"})
+            raise
         except Exception as e:
             logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
+            record_outcome(deadline, completed=False)
+            job_events.publish(thread_id, "failed", {"detail": str(e)})
             raise
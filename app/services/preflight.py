@@ -0,0 +1,222 @@
+import hashlib
+import logging
+import math
+import time
+from typing import Iterable, Optional, Sequence, Union
+
+from app.core.config import settings
+from app.core.metrics import TIMING_WINDOW, metrics
+from app.services.deadline import PAGES_PER_TOPIC, estimate_seconds, estimated_call_seconds
+from app.services.scheduler import get_scheduler
+from app.services.shared_store import get_shared_store
+
+logger = logging.getLogger(__name__)
+
+# Vision token accounting of high-detail images: fit in 2048x2048, shortest side scaled to 768, 512px tiles
+VISION_BASE_TOKENS = 85
+VISION_TILE_TOKENS = 170
+
+# Tokens of the page summary prompt besides the image
+SUMMARY_PROMPT_TOKENS = 150
+# Graph step prompt besides the topic's summaries (compact graph and instructions)
+GRAPH_PROMPT_OVERHEAD_TOKENS = 800
+
+# Reply sizes assumed until replies of each kind have been measured
+DEFAULT_OUTPUT_TOKENS = {"page_summary": 200, "topics": 400, "graph": 350}
+
+# A page is "image" when images cover this share of it and it has little text
+IMAGE_PAGE_COVERAGE = 0.5
+IMAGE_PAGE_MAX_TEXT_CHARS = 200
+
+
+class InvalidPDFError(Exception):
+    """
+    Raised by analyze_pdf when the file cannot be read as a PDF.
+    """
+
+
+def vision_tokens(width: float, height: float, detail: str = "high") -> int:
+    """
+    Input tokens of an image of the given pixel size sent to a vision model.
+    """
+    if detail == "low" or width <= 0 or height <= 0:
+        return VISION_BASE_TOKENS
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return VISION_BASE_TOKENS + VISION_TILE_TOKENS * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def _coverage(rects: Iterable[Sequence[float]], page_rect) -> float:
+    # Share of the page covered by the rectangles (clipped to the page, overlaps counted twice)
+    area = page_rect.width * page_rect.height
+    if area <= 0:
+        return 0.0
+    covered = 0.0
+    for x0, y0, x1, y1 in rects:
+        width = min(x1, page_rect.x1) - max(x0, page_rect.x0)
+        height = min(y1, page_rect.y1) - max(y0, page_rect.y0)
+        if width > 0 and height > 0:
+            covered += width * height
+    return min(1.0, covered / area)
+
+
+def analyze_pdf(source: Union[str, bytes]) -> dict:
+    """
+    Analyze a PDF without rendering it or calling a model: page count, text and
+    image coverage, blank and duplicate pages, and the vision tokens its pages
+    will cost (rendered at the pipeline's scale of 1).
+
+    Args:
+        source: Path of the PDF, or its content
+
+    Raises:
+        InvalidPDFError: The file is not a readable PDF
+    """
+    # PyMuPDF is only imported when needed, like the processing pipeline
+    import fitz
+    
+    started = time.perf_counter()
+    try:
+        document = fitz.open(stream=source, filetype="pdf") if isinstance(source, bytes) else fitz.open(source)
+    except Exception as e:
+        raise InvalidPDFError(f"Not a readable PDF: {str(e)}")
+
+    with document:
+        pages = []
+        seen = {}
+        for page in document:
+            blocks = page.get_text("blocks")
+            text = " ".join(block[4] for block in blocks if block[6] == 0).strip()
+            images = page.get_image_info(hashes=True)
+            text_coverage = _coverage([block[:4] for block in blocks if block[6] == 0], page.rect)
+            image_coverage = _coverage([image["bbox"] for image in images], page.rect)
+
+            # Same text and same images: the page repeats an earlier one (e.g. animation build steps)
+            fingerprint = hashlib.sha1(
+                (" ".join(text.split()) + "|" + ",".join(sorted(image["digest"].hex() for image in images))).encode()
+            ).hexdigest()
+            blank = not text and not images
+            duplicate_of = seen.get(fingerprint) if not blank else None
+            seen.setdefault(fingerprint, page.number + 1)
+
+            if blank:
+                kind = "blank"
+            elif image_coverage >= IMAGE_PAGE_COVERAGE and len(text) < IMAGE_PAGE_MAX_TEXT_CHARS:
+                kind = "image"
+            elif images:
+                kind = "mixed"
+            else:
+                kind = "text"
+            pages.append({
+                "page_number": page.number + 1,
+                "kind": kind,
+                "text_chars": len(text),
+                "images": len(images),
+                "text_coverage": round(text_coverage, 3),
+                "image_coverage": round(image_coverage, 3),
+                "vision_tokens": vision_tokens(page.rect.width, page.rect.height),
+                "duplicate_of": duplicate_of,
+            })
+
+    nb_pages = len(pages)
+    kinds = {kind: sum(1 for p in pages if p["kind"] == kind) for kind in ("text", "image", "mixed", "blank")}
+    elapsed = time.perf_counter() - started
+    metrics.observe("preflight_seconds", elapsed)
+    return {
+        "total_pages": nb_pages,
+        "page_kinds": kinds,
+        "avg_text_coverage": round(sum(p["text_coverage"] for p in pages) / nb_pages, 3) if nb_pages else 0.0,
+        "avg_image_coverage": round(sum(p["image_coverage"] for p in pages) / nb_pages, 3) if nb_pages else 0.0,
+        "duplicate_pages": [p["page_number"] for p in pages if p["duplicate_of"]],
+        "vision_tokens": sum(p["vision_tokens"] for p in pages),
+        "analysis_ms": round(elapsed * 1000, 2),
+        "pages": pages,
+    }
+
+
+# Timings the estimates are calibrated from. In queue mode they are measured by
+# the processing workers, which share them through the shared store.
+CALIBRATION_SERIES = ("llm_call_seconds", "llm_output_tokens", "job_duration_ratio")
+
+
+def calibration_percentile(name: str, q: float, **labels) -> Optional[float]:
+    """
+    Percentile of the recent samples of a calibration series, or None before any
+    was measured.
+    """
+    store = get_shared_store()
+    if store is None:
+        return metrics.timing_percentile(name, q, **labels)
+    values = sorted(store.recent_samples(name, TIMING_WINDOW, **labels))
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _call_seconds() -> float:
+    # Same as deadline.estimated_call_seconds, from the shared samples in queue mode
+    measured = calibration_percentile("llm_call_seconds", 0.75, model=settings.LLM_MODEL)
+    return measured if measured is not None else settings.DEADLINE_DEFAULT_CALL_SECONDS
+
+
+def _output_tokens(kind: str) -> float:
+    measured = calibration_percentile("llm_output_tokens", 0.5, kind=kind)
+    return measured if measured is not None else DEFAULT_OUTPUT_TOKENS[kind]
+
+
+def estimate_job(analysis: dict) -> dict:
+    """
+    Predict the LLM calls, tokens, cost and duration of processing an analyzed PDF.
+
+    Reply sizes come from the replies measured so far (llm_output_tokens), the
+    duration from the measured call latency, corrected by how far the durations
+    of past jobs were from their estimate (job_duration_ratio).
+    """
+    nb_pages = analysis["total_pages"]
+    topics = max(1, math.ceil(nb_pages / PAGES_PER_TOPIC))
+    summary_tokens = _output_tokens("page_summary")
+
+    input_tokens = (
+        analysis["vision_tokens"] + nb_pages * SUMMARY_PROMPT_TOKENS
+        + nb_pages * summary_tokens + SUMMARY_PROMPT_TOKENS
+        + topics * (PAGES_PER_TOPIC * summary_tokens + GRAPH_PROMPT_OVERHEAD_TOKENS)
+    )
+    output_tokens = nb_pages * summary_tokens + _output_tokens("topics") + topics * _output_tokens("graph")
+    cost = (input_tokens * settings.LLM_INPUT_COST_PER_MTOK + output_tokens * settings.LLM_OUTPUT_COST_PER_MTOK) / 1e6
+
+    base_seconds = estimate_seconds(
+        nb_pages, get_scheduler().capacity, _call_seconds(), graph_overlaps=settings.PIPELINE_PROGRESSIVE
+    )
+    ratio = calibration_percentile("job_duration_ratio", 0.5) or 1.0
+    ratio_p90 = calibration_percentile("job_duration_ratio", 0.9) or 1.5
+    return {
+        "llm_calls": nb_pages + 1 + topics,
+        "input_tokens": int(input_tokens),
+        "output_tokens": int(output_tokens),
+        "cost_usd": round(cost, 4),
+        "duration_seconds": round(base_seconds * ratio, 1),
+        "duration_p90_seconds": round(base_seconds * max(ratio, ratio_p90), 1),
+    }
+
+
+def preflight(source: Union[str, bytes]) -> dict:
+    """
+    Analysis and estimate of a PDF (see analyze_pdf and estimate_job).
+    """
+    analysis = analyze_pdf(source)
+    return {"analysis": analysis, "estimate": estimate_job(analysis)}
+
+
+def record_job_duration(nb_pages: int, seconds: float) -> None:
+    """
+    Record how long a job took compared to its estimate, to correct later estimates.
+    """
+    if nb_pages <= 0:
+        return
+    expected = estimate_seconds(
+        nb_pages, get_scheduler().capacity, estimated_call_seconds(), graph_overlaps=settings.PIPELINE_PROGRESSIVE
+    )
+    if expected > 0:
+        metrics.observe("job_duration_ratio", seconds / expected)
@@ -0,0 +1,274 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PREFIX = "profile_"
+# profile_<job_id>_<YYYYmmdd>_<HHMMSS>.json
+PROFILE_FILENAME_PATTERN = re.compile(rf"^{PROFILE_PREFIX}(?P<job_id>.+)_\d{{8}}_\d{{6}}\.json$")
+
+# Stack depth kept per sample, and caps on what is written to the artifact
+MAX_STACK_DEPTH = 64
+MAX_STACKS = 2000
+MAX_SPANS = 5000
+
+# Leaf frames in these files mean the thread is idle (waiting for work or I/O)
+IDLE_FILES = ("threading.py", "queue.py", "thread.py", "selectors.py")
+
+_current_profile: ContextVar[Optional["JobProfile"]] = ContextVar("job_profile", default=None)
+_NO_SPAN = nullcontext()
+
+# Memory profiles of concurrent jobs share tracemalloc: it is stopped when the last one ends
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_started_here = False
+
+
+def _acquire_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_started_here
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            # One frame per trace: allocations are reported by line, deeper tracebacks cost far more
+            tracemalloc.start(1)
+            _tracemalloc_started_here = True
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_started_here
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_started_here:
+            tracemalloc.stop()
+            _tracemalloc_started_here = False
+
+
+def profile_span(name: str, **attributes):
+    """
+    Time a step of the pipeline (render, LLM call, JSON parsing, export...) when the
+    current job is being profiled. Without an active profile this is a single
+    context variable lookup returning a no-op context manager.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return _NO_SPAN
+    return profile.span(name, **attributes)
+
+
+class StackSampler(threading.Thread):
+    """
+    Sampling CPU profiler: periodically records the stacks of all other threads
+    (the event loop and the executor threads) as folded stacks.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    self.idle_samples += 1
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(self._frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class JobProfile:
+    """
+    Profile of one job: timed spans (with the asyncio task they ran in), a sampling
+    CPU profile and, optionally, tracemalloc allocation statistics.
+
+    The CPU profile samples the whole process, so other jobs running at the same
+    time show up in it; spans only cover this job.
+    """
+
+    def __init__(self, job_id: str, memory: bool = False, interval: Optional[float] = None):
+        self.job_id = job_id
+        self.memory = memory
+        self.interval = interval or settings.PROFILE_SAMPLE_INTERVAL_SECONDS
+        self.spans: List[dict] = []
+        self._started = 0.0
+        self._sampler: Optional[StackSampler] = None
+        self._memory_start = None
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        try:
+            yield
+        finally:
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append({
+                    "name": name,
+                    "start_s": round(started - self._started, 4),
+                    "duration_s": round(time.perf_counter() - started, 4),
+                    "task": task.get_name() if task else threading.current_thread().name,
+                    **attributes
+                })
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._sampler = StackSampler(self.interval)
+        self._sampler.start()
+        if self.memory:
+            _acquire_tracemalloc()
+            self._memory_start = tracemalloc.take_snapshot()
+
+    def stop(self) -> dict:
+        """
+        Stop collecting and build the profile report.
+        """
+        wall = time.perf_counter() - self._started
+        self._sampler.stop()
+
+        summary: Dict[str, dict] = defaultdict(lambda: {"count": 0, "total_s": 0.0, "max_s": 0.0})
+        for span in self.spans:
+            entry = summary[span["name"]]
+            entry["count"] += 1
+            entry["total_s"] = round(entry["total_s"] + span["duration_s"], 4)
+            entry["max_s"] = max(entry["max_s"], span["duration_s"])
+
+        # Self time per function: the leaf frame of each sample
+        leaves: Counter = Counter()
+        for stack, count in self._sampler.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+
+        report = {
+            "job_id": self.job_id,
+            "recorded_at": datetime.now().isoformat(),
+            "wall_seconds": round(wall, 3),
+            "spans_summary": dict(sorted(summary.items(), key=lambda item: item[1]["total_s"], reverse=True)),
+            "spans": self.spans,
+            "cpu": {
+                "sample_interval_s": self.interval,
+                "samples": self._sampler.samples,
+                "idle_thread_samples": self._sampler.idle_samples,
+                "top_self": [{"function": f, "samples": c} for f, c in leaves.most_common(30)],
+                "folded_stacks": dict(self._sampler.stacks.most_common(MAX_STACKS)),
+            },
+        }
+        if self.memory:
+            try:
+                report["memory"] = self._memory_report()
+            finally:
+                _release_tracemalloc()
+        return report
+
+    def _memory_report(self) -> dict:
+        # Leave out the profiler's own bookkeeping
+        own_files = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+        snapshot = tracemalloc.take_snapshot().filter_traces(own_files)
+        current, peak = tracemalloc.get_traced_memory()
+        growth = snapshot.compare_to(self._memory_start.filter_traces(own_files), "lineno")[:30]
+        top = snapshot.statistics("lineno")[:30]
+        return {
+            "traced_current_mb": round(current / 1e6, 2),
+            "traced_peak_mb": round(peak / 1e6, 2),
+            "top_allocations": [
+                {"location": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                for stat in top
+            ],
+            "growth": [
+                {"location": str(stat.traceback[0]), "size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff}
+                for stat in growth
+            ],
+        }
+
+
+def profile_path(job_id: str, output_dir: str = settings.OUTPUT_DIR) -> str:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(output_dir, f"{PROFILE_PREFIX}{job_id}_{timestamp}.json")
+
+
+def profile_job_id(path: str) -> Optional[str]:
+    """
+    Job ID of a profile artifact (None if the filename is not a profile's).
+    """
+    match = PROFILE_FILENAME_PATTERN.match(os.path.basename(path))
+    return match.group("job_id") if match else None
+
+
+def find_profile(job_id: str, output_dir: str = settings.OUTPUT_DIR) -> Optional[str]:
+    """
+    Latest profile artifact of a job, or None.
+    """
+    if not os.path.exists(output_dir):
+        return None
+    # Job IDs may contain '_': compare the ID parsed from the filename, not a prefix
+    candidates = [os.path.join(output_dir, f) for f in os.listdir(output_dir) if profile_job_id(f) == job_id]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+@contextmanager
+def profile_job(job_id: str, memory: bool = False, output_dir: str = settings.OUTPUT_DIR) -> Iterator[JobProfile]:
+    """
+    Profile everything run inside the block for a job (including tasks and threads
+    it starts, which inherit the context) and save the report next to the exports.
+    """
+    profile = JobProfile(job_id, memory=memory)
+    token = _current_profile.set(profile)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+        try:
+            report = profile.stop()
+            os.makedirs(output_dir, exist_ok=True)
+            path = profile_path(job_id, output_dir)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, separators=(',', ':'))
+            metrics.increment("profiles_recorded")
+            logger.info(f"Profile of job {job_id} saved to {path}")
+        except Exception as e:
+            logger.error(f"Could not save profile of job {job_id}: {str(e)}", exc_info=True)
+
+
+def folded_stacks_text(report: dict) -> str:
+    """
+    CPU profile in the folded format read by flamegraph tools (speedscope, flamegraph.pl).
+    """
+    return "\n".join(f"{stack} {count}" for stack, count in report["cpu"]["folded_stacks"].items()) + "\n"
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Event types that end a job's stream
+TERMINAL_EVENTS = {"completed", "failed", "cancelled"}
+
+
+def graph_delta(previous: dict, current: dict) -> dict:
+    """
+    Compute the incremental difference between two versions of a graph.
+
+    Args:
+        previous: Graph before the update ("nodes"/"edges" lists)
+        current: Graph after the update
+
+    Returns:
+        Dict with added/updated nodes and edges and the IDs of removed ones
+    """
+    previous_nodes = {n.get('id'): n for n in previous.get('nodes', [])}
+    previous_edges = {e.get('id'): e for e in previous.get('edges', [])}
+    current_nodes = {n.get('id'): n for n in current.get('nodes', [])}
+    current_edges = {e.get('id'): e for e in current.get('edges', [])}
+
+    return {
+        "added_nodes": [n for node_id, n in current_nodes.items() if previous_nodes.get(node_id) != n],
+        "removed_nodes": [node_id for node_id in previous_nodes if node_id not in current_nodes],
+        "added_edges": [e for edge_id, e in current_edges.items() if previous_edges.get(edge_id) != e],
+        "removed_edges": [edge_id for edge_id in previous_edges if edge_id not in current_edges],
+    }
+
+
+class _JobChannel:
+    def __init__(self, history_limit: int):
+        self.history: Deque[dict] = deque(maxlen=history_limit)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.next_seq = 1
+        self.finished_at: Optional[float] = None
+
+
+class JobEventBroker:
+    """
+    In-process publish/subscribe channel for processing progress events.
+
+    Each job keeps a bounded history so a client that subscribes after the job
+    started (or reconnects with Last-Event-ID) replays what it missed before
+    receiving live events. Finished jobs are kept for `retention_seconds`;
+    channels that were only subscribed to are dropped once their subscribers leave.
+    """
+
+    def __init__(self, history_limit: int = 1000, retention_seconds: float = 300):
+        self.history_limit = history_limit
+        self.retention_seconds = retention_seconds
+        self._channels: Dict[str, _JobChannel] = {}
+        self._listeners: List[Callable[[str, str, dict], None]] = []
+
+    def add_listener(self, listener: Callable[[str, str, dict], None]) -> None:
+        """
+        Also pass every published event to `listener(job_id, event, data)`, e.g. to
+        forward events to other processes.
+        """
+        self._listeners.append(listener)
+
+    def _channel(self, job_id: str) -> _JobChannel:
+        self._expire()
+        channel = self._channels.get(job_id)
+        if channel is None:
+            channel = self._channels[job_id] = _JobChannel(self.history_limit)
+        return channel
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, channel in self._channels.items()
+            if not channel.subscribers and (
+                channel.next_seq == 1 or (channel.finished_at and now - channel.finished_at > self.retention_seconds)
+            )
+        ]
+        for job_id in expired:
+            del self._channels[job_id]
+
+    def reset(self, job_id: str) -> None:
+        """
+        Forget the events of a previous job with this ID, before a new job reuses it.
+        Sequence numbers keep increasing, so clients resuming with an old
+        Last-Event-ID receive the new job's events.
+        """
+        channel = self._channels.get(job_id)
+        if channel is not None:
+            channel.history.clear()
+            # Expires like a finished job if the new one never publishes
+            channel.finished_at = time.monotonic()
+
+    def publish(self, job_id: Optional[str], event: str, data: Optional[dict] = None) -> None:
+        """
+        Publish an event for a job. Never raises: progress reporting must not break processing.
+
+        Args:
+            job_id: Job (thread) ID, events without one are dropped
+            event: Event type (e.g. "page_summary", "graph_delta", "completed")
+            data: JSON-serializable payload
+        """
+        if not job_id:
+            return
+        try:
+            channel = self._channel(job_id)
+            message = {"seq": channel.next_seq, "event": event, "data": data or {}}
+            channel.next_seq += 1
+            channel.history.append(message)
+            channel.finished_at = time.monotonic() if event in TERMINAL_EVENTS else None
+            for queue in channel.subscribers:
+                queue.put_nowait(message)
+            for listener in self._listeners:
+                listener(job_id, event, message['data'])
+        except Exception as e:
+            logger.warning(f"Failed to publish {event} event for job {job_id}: {str(e)}")
+
+    async def subscribe(
+        self,
+        job_id: str,
+        last_seq: int = 0,
+        heartbeat: float = 15.0,
+        start_timeout: float = 60.0
+    ) -> AsyncIterator[Optional[dict]]:
+        """
+        Iterate over a job's events, replaying history first. Yields None as a
+        heartbeat when no event arrived for `heartbeat` seconds, and stops after a
+        terminal event, or if the job has published nothing after `start_timeout`
+        seconds (unknown job).
+
+        Args:
+            job_id: Job (thread) ID
+            last_seq: Only events with a greater sequence number are yielded
+            heartbeat: Seconds between heartbeats
+            start_timeout: Seconds to wait for a job that has not started yet
+        """
+        channel = self._channel(job_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        subscribed_at = time.monotonic()
+        try:
+            replay: List[dict] = [m for m in channel.history if m['seq'] > last_seq]
+            for message in replay:
+                last_seq = message['seq']
+                yield message
+                if message['event'] in TERMINAL_EVENTS:
+                    return
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    if not channel.history and time.monotonic() - subscribed_at >= start_timeout:
+                        return
+                    yield None
+                    continue
+                if message['seq'] <= last_seq:
+                    continue
+                yield message
+                if message['event'] in TERMINAL_EVENTS:
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+            self._expire()
+
+
+def format_sse(message: Optional[dict]) -> str:
+    """
+    Format a broker message (or a heartbeat) as a Server-Sent Events frame.
+    """
+    if message is None:
+        return ": keep-alive\n\n"
+    payload = json.dumps(message['data'], ensure_ascii=False)
+    return f"id: {message['seq']}\nevent: {message['event']}\ndata: {payload}\n\n"
+
+
+job_events = JobEventBroker()
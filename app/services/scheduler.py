@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"low": 0, "normal": 1, "high": 2}
+DEFAULT_TENANT = "default"
+
+
+class JobContext:
+    def __init__(self, job_id: str, tenant: str = DEFAULT_TENANT, priority: str = "normal", weight: float = 1.0):
+        self.job_id = job_id
+        self.tenant = tenant
+        self.priority = PRIORITIES.get(priority, PRIORITIES["normal"])
+        self.weight = weight
+
+
+_job_context: ContextVar[Optional[JobContext]] = ContextVar("llm_job_context", default=None)
+_DEFAULT_CONTEXT = JobContext("default")
+_expedited: ContextVar[bool] = ContextVar("llm_call_expedited", default=False)
+
+
+@contextmanager
+def job_context(job_id: str, tenant: Optional[str] = None, priority: str = "normal", weight: float = 1.0) -> Iterator[JobContext]:
+    """
+    Attribute the LLM calls made inside the block (and the tasks it starts) to a job
+    and tenant, so the scheduler can share capacity fairly between them.
+    """
+    context = JobContext(job_id, tenant or DEFAULT_TENANT, priority, weight)
+    token = _job_context.set(context)
+    try:
+        yield context
+    finally:
+        _job_context.reset(token)
+
+
+@contextmanager
+def expedite() -> Iterator[None]:
+    """
+    LLM calls made inside the block go ahead of the job's other waiting calls
+    (e.g. the progressive pipeline's segmentation and graph steps, which the rest
+    of the job waits on, ahead of its queued page summaries). Sharing between
+    jobs and tenants is unchanged.
+    """
+    token = _expedited.set(True)
+    try:
+        yield
+    finally:
+        _expedited.reset(token)
+
+
+class _Tenant:
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+        self.vtime = 0.0
+        self.jobs: Dict[str, "_Job"] = {}
+
+
+class _Job:
+    def __init__(self, context: JobContext, tenant: _Tenant):
+        self.id = context.job_id
+        self.priority = context.priority
+        self.weight = context.weight
+        self.tenant = tenant
+        self.vtime = 0.0
+        self.active = 0
+        self.granted = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+
+class LLMScheduler:
+    """
+    Process-wide scheduler of LLM calls with weighted fair queuing.
+
+    At most `capacity` calls run at once. When a slot frees up, the highest
+    priority level with waiting calls is served; within it, the tenant with the
+    least weighted service so far, then that tenant's job with the least weighted
+    service. A job holding `max_job_share` of the capacity only gets more slots
+    when no other job is waiting, so one large deck cannot hold up small ones
+    while idle capacity is still used.
+    """
+
+    def __init__(self, capacity: int, max_job_share: float = 0.5, tenant_weights: Optional[Dict[str, float]] = None):
+        self.capacity = capacity
+        self.max_job_slots = max(1, int(capacity * max_job_share))
+        self.tenant_weights = tenant_weights or {}
+        self.in_use = 0
+        self._tenants: Dict[str, _Tenant] = {}
+
+    def _min_vtime(self, items) -> float:
+        return min((item.vtime for item in items), default=0.0)
+
+    def _job_for(self, context: JobContext) -> _Job:
+        tenant = self._tenants.get(context.tenant)
+        if tenant is None:
+            tenant = _Tenant(context.tenant, self.tenant_weights.get(context.tenant, 1.0))
+            # A newly active tenant starts level with the others instead of with accumulated credit
+            tenant.vtime = self._min_vtime(self._tenants.values())
+            self._tenants[context.tenant] = tenant
+        job = tenant.jobs.get(context.job_id)
+        if job is None:
+            job = _Job(context, tenant)
+            job.vtime = self._min_vtime(tenant.jobs.values())
+            tenant.jobs[context.job_id] = job
+        return job
+
+    def _waiting_jobs(self) -> List[_Job]:
+        jobs = []
+        for tenant in self._tenants.values():
+            for job in tenant.jobs.values():
+                while job.waiters and job.waiters[0].done():
+                    job.waiters.popleft()
+                if job.waiters:
+                    jobs.append(job)
+        return jobs
+
+    def _pick(self) -> Optional[_Job]:
+        waiting = self._waiting_jobs()
+        if not waiting:
+            return None
+        top_priority = max(job.priority for job in waiting)
+        candidates = [job for job in waiting if job.priority == top_priority]
+        # Jobs over their share are only served when nothing else is waiting
+        candidates = [job for job in candidates if job.active < self.max_job_slots] or candidates
+        tenant = min({job.tenant for job in candidates}, key=lambda t: t.vtime)
+        return min((job for job in candidates if job.tenant is tenant), key=lambda j: j.vtime)
+
+    def _grant(self, job: _Job) -> None:
+        self.in_use += 1
+        job.active += 1
+        job.granted += 1
+        job.vtime += 1 / job.weight
+        job.tenant.vtime += 1 / job.tenant.weight
+        metrics.set_gauge("llm_scheduler_in_use", self.in_use)
+
+    def _dispatch(self) -> None:
+        while self.in_use < self.capacity:
+            job = self._pick()
+            if job is None:
+                return
+            self._grant(job)
+            job.waiters.popleft().set_result(None)
+
+    def _forget_if_idle(self, job: _Job) -> None:
+        if job.active == 0 and not job.waiters:
+            job.tenant.jobs.pop(job.id, None)
+            if not job.tenant.jobs:
+                self._tenants.pop(job.tenant.name, None)
+
+    async def acquire(self, context: Optional[JobContext] = None) -> _Job:
+        """
+        Wait for a slot for an LLM call of the current job (from job_context).
+        """
+        context = context or _job_context.get() or _DEFAULT_CONTEXT
+        job = self._job_for(context)
+        started = time.perf_counter()
+
+        if self.in_use < self.capacity and not self._waiting_jobs():
+            self._grant(job)
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            if _expedited.get():
+                job.waiters.appendleft(waiter)
+            else:
+                job.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted just before being cancelled: hand the slot back
+                    self.release(job)
+                else:
+                    try:
+                        job.waiters.remove(waiter)
+                    except ValueError:
+                        pass
+                    self._forget_if_idle(job)
+                raise
+
+        metrics.observe("llm_queue_wait_seconds", time.perf_counter() - started, tenant=job.tenant.name)
+        return job
+
+    def release(self, job: _Job) -> None:
+        self.in_use -= 1
+        job.active -= 1
+        metrics.set_gauge("llm_scheduler_in_use", self.in_use)
+        self._forget_if_idle(job)
+        self._dispatch()
+
+    def snapshot(self) -> dict:
+        """
+        Current capacity use, with active and waiting calls per tenant and job.
+        """
+        return {
+            "capacity": self.capacity,
+            "max_job_slots": self.max_job_slots,
+            "in_use": self.in_use,
+            "tenants": {
+                tenant.name: {
+                    "weight": tenant.weight,
+                    "jobs": {
+                        job.id: {
+                            "priority": job.priority,
+                            "active": job.active,
+                            "waiting": sum(1 for w in job.waiters if not w.done()),
+                            "granted": job.granted,
+                        }
+                        for job in tenant.jobs.values()
+                    },
+                }
+                for tenant in self._tenants.values()
+            },
+        }
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(
+            capacity=settings.LLM_MAX_CONCURRENCY or settings.LLM_POOL_SIZE,
+            max_job_share=settings.LLM_MAX_JOB_SHARE,
+            tenant_weights=settings.LLM_TENANT_WEIGHTS
+        )
+    return _scheduler
@@ -0,0 +1,510 @@
+"""
+State shared by the processes of a multi-worker deployment, in one SQLite
+database (WAL mode) on a volume mounted by every container:
+
+- a durable job queue: API workers enqueue uploads, processing workers claim
+  them with a renewable lease (jobs of a crashed worker are picked up again);
+- the progress events of each job, so any API worker can stream them;
+- a cache of processing results by PDF content and pipeline settings;
+- page summary checkpoints, so a retried job does not redo finished pages;
+- a budget of concurrent LLM calls across all processing workers;
+- recent calibration samples (call latencies, reply sizes, job durations) of
+  the workers, for the preflight estimates made by API workers.
+
+SQLite needs the processes to share a local filesystem (one host); it is not
+safe on network filesystems.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.jobs import JobAlreadyRunningError
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Result metadata of one job (its ID and the JobDeadline.summary() fields), not cached
+JOB_METADATA_FIELDS = ("thread_id", "deadline_seconds", "elapsed_seconds", "deadline_met", "degradations", "degradation_details")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel_reason TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+CREATE TABLE IF NOT EXISTS result_cache (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS page_checkpoints (
+    key TEXT NOT NULL,
+    page_number INTEGER NOT NULL,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (key, page_number)
+);
+CREATE TABLE IF NOT EXISTS calibration_samples (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calibration_by_series ON calibration_samples (name, labels, created_at);
+CREATE TABLE IF NOT EXISTS llm_slots (
+    slot INTEGER PRIMARY KEY,
+    holder TEXT,
+    expires REAL
+);
+"""
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pipeline_signature() -> str:
+    """
+    Short hash of the settings that change processing results, part of cache keys.
+    """
+    relevant = [settings.LLM_MODEL, settings.LLM_SMALL_MODEL, settings.LLM_ROUTING_THRESHOLD, settings.GRAPH_PROMPT_COMPACT, settings.PIPELINE_PROGRESSIVE]
+    return hashlib.sha256(json.dumps(relevant).encode()).hexdigest()[:12]
+
+
+def content_key(pdf_path: str) -> str:
+    """
+    Cache key of a PDF's results: its content hash and the pipeline settings.
+    """
+    return f"{file_digest(pdf_path)}:{pipeline_signature()}"
+
+
+class SharedStore:
+    """
+    SQLite-backed queue, event log, caches and LLM call budget shared between processes.
+    Each thread uses its own connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._connection()
+        # IMMEDIATE takes the write lock up front, so read-then-update steps cannot interleave
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    # Job queue
+
+    def reset_events(self, job_id: str) -> None:
+        """
+        Clear the events of a finished job before its ID is reused, so the new
+        job's stream does not replay them. Called before the new job publishes
+        anything (it may publish while waiting to be enqueued).
+
+        Raises:
+            JobAlreadyRunningError: A job with this ID is queued or running
+        """
+        with self._transaction() as db:
+            row = db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None and row["status"] in ACTIVE_STATUSES:
+                raise JobAlreadyRunningError(f"Job {job_id} is already running")
+            db.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+
+    def enqueue(self, job_id: str, payload: dict) -> None:
+        """
+        Add a job to the queue. A finished job with the same ID is replaced (its
+        events are cleared by reset_events, not here, to keep those the new job
+        already published).
+
+        Raises:
+            JobAlreadyRunningError: A job with this ID is queued or running
+        """
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None and row["status"] in ACTIVE_STATUSES:
+                raise JobAlreadyRunningError(f"Job {job_id} is already running")
+            db.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(payload), now, now)
+            )
+
+    def claim(self, worker_id: str, lease_seconds: float, max_attempts: int) -> Optional[dict]:
+        """
+        Take the oldest queued job, or a running job whose worker stopped renewing
+        its lease. Jobs that already used up `max_attempts` are marked failed, and
+        abandoned jobs whose cancellation was requested are marked cancelled.
+
+        Returns:
+            Dict with id, payload and attempts, or None if nothing is waiting
+        """
+        now = time.time()
+        with self._transaction() as db:
+            while True:
+                row = db.execute(
+                    "SELECT id, payload, attempts, status, cancel_reason FROM jobs "
+                    "WHERE (status = 'queued' OR (status = 'running' AND lease_expires < ?)) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["cancel_reason"] is not None:
+                    db.execute(
+                        "UPDATE jobs SET status = 'cancelled', lease_expires = NULL, updated_at = ? WHERE id = ?",
+                        (now, row["id"])
+                    )
+                    self._insert_event(db, row["id"], "cancelled", {"reason": row["cancel_reason"]})
+                    continue
+                if row["attempts"] >= max_attempts:
+                    error = f"Gave up after {row['attempts']} attempts (worker lost)"
+                    db.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                        (error, now, row["id"])
+                    )
+                    self._insert_event(db, row["id"], "failed", {"detail": error})
+                    continue
+                if row["status"] == "running":
+                    logger.warning(f"Job {row['id']} lost its worker, retrying (attempt {row['attempts'] + 1})")
+                db.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (worker_id, now + lease_seconds, now, row["id"])
+                )
+                return {"id": row["id"], "payload": json.loads(row["payload"]), "attempts": row["attempts"] + 1}
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> Optional[str]:
+        """
+        Renew the lease of a running job.
+
+        Returns:
+            The reason if cancellation of the job was requested, else None
+        """
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + lease_seconds, now, job_id, worker_id)
+            )
+            row = db.execute("SELECT cancel_reason FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["cancel_reason"] if row else None
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+            )
+
+    def job(self, job_id: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT id, status, result, error, attempts, cancel_reason FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def request_cancel(self, job_id: str, reason: str = "requested") -> bool:
+        """
+        Ask for a job to be cancelled: a queued job is cancelled right away, a
+        running one by its worker at its next heartbeat.
+
+        Returns:
+            bool: False if the job is not queued or running
+        """
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["status"] not in ACTIVE_STATUSES:
+                return False
+            status = "cancelled" if row["status"] == "queued" else "running"
+            db.execute(
+                "UPDATE jobs SET status = ?, cancel_reason = COALESCE(cancel_reason, ?), updated_at = ? WHERE id = ?",
+                (status, reason, now, job_id)
+            )
+            if status == "cancelled":
+                # No worker will report it: end the job's event stream here
+                self._insert_event(db, job_id, "cancelled", {"reason": reason})
+        return True
+
+    def cancel_source(self, saved_filename: str, reason: str = "file_deleted") -> List[str]:
+        """
+        Request cancellation of the active jobs processing an uploaded file.
+        """
+        rows = self._connection().execute(
+            "SELECT id FROM jobs WHERE status IN ('queued', 'running') AND json_extract(payload, '$.saved_filename') = ?",
+            (saved_filename,)
+        ).fetchall()
+        return [row["id"] for row in rows if self.request_cancel(row["id"], reason)]
+
+    def active_digests(self) -> Set[str]:
+        """
+        Content hashes of the PDFs of queued and running jobs (pinned in the blob store).
+        """
+        rows = self._connection().execute(
+            "SELECT json_extract(payload, '$.digest') AS digest FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchall()
+        return {row["digest"] for row in rows if row["digest"]}
+
+    def admitted_jobs(self) -> List[dict]:
+        """
+        Queued and running jobs with their admission (id, calls, seconds, admitted_at),
+        for the admission control of the API processes.
+        """
+        rows = self._connection().execute(
+            "SELECT id, json_extract(payload, '$.admission.llm_calls') AS calls, "
+            "json_extract(payload, '$.admission.predicted_seconds') AS seconds, "
+            "json_extract(payload, '$.admission.admitted_at') AS admitted_at "
+            "FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchall()
+        return [dict(row) for row in rows if row["calls"] is not None]
+
+    def queue_stats(self) -> Dict[str, int]:
+        rows = self._connection().execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["count"] for row in rows}
+
+    # Progress events
+
+    @staticmethod
+    def _insert_event(db: sqlite3.Connection, job_id: str, event: str, data: dict) -> None:
+        db.execute(
+            "INSERT INTO job_events (job_id, seq, event, data) "
+            "VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?), ?, ?)",
+            (job_id, job_id, event, json.dumps(data))
+        )
+
+    def add_event(self, job_id: str, event: str, data: dict) -> None:
+        self.add_events([(job_id, event, data)])
+
+    def add_events(self, events: List[Tuple[str, str, dict]]) -> None:
+        """
+        Append (job_id, event, data) events in order, in one transaction.
+        """
+        with self._transaction() as db:
+            for job_id, event, data in events:
+                self._insert_event(db, job_id, event, data)
+
+    def events(self, job_id: str, after_seq: int = 0) -> List[dict]:
+        rows = self._connection().execute(
+            "SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+            (job_id, after_seq)
+        ).fetchall()
+        return [{"seq": row["seq"], "event": row["event"], "data": json.loads(row["data"])} for row in rows]
+
+    # Caches
+
+    def cached_result(self, key: str) -> Optional[dict]:
+        row = self._connection().execute("SELECT result FROM result_cache WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def store_result(self, key: str, result: dict) -> None:
+        """
+        Cache a processing result for later jobs on the same content, without the
+        metadata of the job that produced it (JOB_METADATA_FIELDS).
+        """
+        metadata = {k: v for k, v in result.get('metadata', {}).items() if k not in JOB_METADATA_FIELDS}
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO result_cache (key, result, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps({**result, 'metadata': metadata}), time.time())
+            )
+
+    def page_summary(self, key: str, page_number: int) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT summary FROM page_checkpoints WHERE key = ? AND page_number = ?", (key, page_number)
+        ).fetchone()
+        return row["summary"] if row else None
+
+    def store_page_summary(self, key: str, page_number: int, summary: str) -> None:
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO page_checkpoints (key, page_number, summary, created_at) VALUES (?, ?, ?, ?)",
+                (key, page_number, summary, time.time())
+            )
+
+    # Calibration samples
+
+    def add_samples(self, samples: List[Tuple[str, Dict[str, str], float]]) -> None:
+        """
+        Store (name, labels, value) timing samples for other processes.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT INTO calibration_samples (name, labels, value, created_at) VALUES (?, ?, ?, ?)",
+                [(name, json.dumps(labels, sort_keys=True), value, now) for name, labels, value in samples]
+            )
+
+    def recent_samples(self, name: str, limit: int, **labels) -> List[float]:
+        rows = self._connection().execute(
+            "SELECT value FROM calibration_samples WHERE name = ? AND labels = ? ORDER BY created_at DESC LIMIT ?",
+            (name, json.dumps({k: str(v) for k, v in labels.items()}, sort_keys=True), limit)
+        ).fetchall()
+        return [row["value"] for row in rows]
+
+    def prune(self, retention_seconds: float) -> int:
+        """
+        Delete finished jobs (with their events), cached results, checkpoints and
+        calibration samples older than the retention period.
+
+        Returns:
+            Number of jobs deleted
+        """
+        cutoff = time.time() - retention_seconds
+        with self._transaction() as db:
+            finished = [row["id"] for row in db.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND updated_at < ?", (cutoff,)
+            ).fetchall()]
+            db.executemany("DELETE FROM job_events WHERE job_id = ?", [(job_id,) for job_id in finished])
+            db.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in finished])
+            db.execute("DELETE FROM result_cache WHERE created_at < ?", (cutoff,))
+            db.execute("DELETE FROM page_checkpoints WHERE created_at < ?", (cutoff,))
+            db.execute("DELETE FROM calibration_samples WHERE created_at < ?", (cutoff,))
+        return len(finished)
+
+    # LLM call budget
+
+    def seed_slots(self, capacity: int) -> None:
+        with self._transaction() as db:
+            db.executemany("INSERT OR IGNORE INTO llm_slots (slot) VALUES (?)", [(slot,) for slot in range(capacity)])
+
+    def try_acquire_slot(self, holder: str, capacity: int, lease_seconds: float) -> bool:
+        now = time.time()
+        # Waiters only take the write lock when a slot looks free
+        free = self._connection().execute(
+            "SELECT 1 FROM llm_slots WHERE slot < ? AND (holder IS NULL OR expires < ?) LIMIT 1", (capacity, now)
+        ).fetchone()
+        if free is None:
+            return False
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE llm_slots SET holder = ?, expires = ? WHERE slot = ("
+                "SELECT slot FROM llm_slots WHERE slot < ? AND (holder IS NULL OR expires < ?) LIMIT 1)",
+                (holder, now + lease_seconds, capacity, now)
+            )
+            return cursor.rowcount == 1
+
+    def release_slot(self, holder: str) -> None:
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE llm_slots SET holder = NULL, expires = NULL WHERE slot = ("
+                "SELECT slot FROM llm_slots WHERE holder = ? LIMIT 1)",
+                (holder,)
+            )
+
+    def slots_in_use(self) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) AS count FROM llm_slots WHERE holder IS NOT NULL AND expires >= ?", (time.time(),)
+        ).fetchone()
+        return row["count"]
+
+
+class SharedCallBudget:
+    """
+    Limit on concurrent LLM calls across all processes using the store, for
+    llm_client.set_call_budget. A slot held by a process that died is reclaimed
+    once its lease (longer than any call) expires.
+
+    Waiters poll with a jittered exponential backoff (poll_interval up to
+    max_poll_interval), so the processes waiting do not retry in lockstep.
+    """
+
+    def __init__(self, store: SharedStore, capacity: int, poll_interval: float = 0.05, max_poll_interval: float = 1.0):
+        self.store = store
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = settings.LLM_CALL_TIMEOUT * (settings.LLM_MAX_RETRIES + 1) + 30
+        store.seed_slots(capacity)
+
+    def acquire(self, block: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Take a slot, waiting up to `timeout` seconds (forever if None) when `block` is set.
+
+        Returns:
+            Whether a slot was taken
+        """
+        waited_until = time.monotonic() + timeout if timeout is not None else None
+        backoff = self.poll_interval
+        while not self.store.try_acquire_slot(self.holder, self.capacity, self.lease_seconds):
+            if not block:
+                return False
+            delay = random.uniform(backoff / 2, backoff)
+            if waited_until is not None:
+                remaining = waited_until - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(delay)
+            backoff = min(backoff * 2, self.max_poll_interval)
+        return True
+
+    def release(self) -> None:
+        self.store.release_slot(self.holder)
+
+
+_store: Optional[SharedStore] = None
+
+
+def get_shared_store() -> Optional[SharedStore]:
+    """
+    The shared store when running in queue mode (PROCESSING_MODE=queue), else None.
+    """
+    global _store
+    if settings.PROCESSING_MODE != "queue":
+        return None
+    if _store is None:
+        _store = SharedStore(settings.SHARED_STATE_PATH)
+    return _store
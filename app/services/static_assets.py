@@ -0,0 +1,117 @@
+import hashlib
+import logging
+import mimetypes
+import re
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.compression import COMPRESSIBLE_TYPES, MIN_COMPRESS_SIZE, brotli, compress_body, negotiate_encoding
+
+logger = logging.getLogger(__name__)
+
+# Vite emits content-hashed bundles such as assets/index-BdLq2Xk9.js
+HASHED_ASSET_PATTERN = re.compile(r"-[A-Za-z0-9_-]{8,}\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+class StaticAsset:
+    def __init__(self, path: str, body: bytes, content_type: str, last_modified: float):
+        self.path = path
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.last_modified = formatdate(last_modified, usegmt=True)
+        self.immutable = bool(HASHED_ASSET_PATTERN.search(path))
+        self.variants: Dict[str, bytes] = {}
+
+    @property
+    def compressible(self) -> bool:
+        return len(self.body) >= MIN_COMPRESS_SIZE and self.content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _content_type(path: Path) -> str:
+    content_type, _ = mimetypes.guess_type(path.name)
+    content_type = content_type or "application/octet-stream"
+    if content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+class AssetManifest:
+    """
+    In-memory manifest of the built frontend (`frontend/dist`).
+
+    Files are read once at startup, so requests never touch the filesystem.
+    Compressible files get gzip and (if the `brotli` package is installed) brotli
+    variants, reusing `.gz`/`.br` files emitted by the build when present. Hashed
+    bundles are served with immutable cache headers; everything else, including
+    index.html, is revalidated with ETags (304 Not Modified).
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.assets: Dict[str, StaticAsset] = {}
+        for path in sorted(self.root.rglob("*")):
+            if not path.is_file() or path.suffix in (".gz", ".br"):
+                continue
+            key = path.relative_to(self.root).as_posix()
+            self.assets[key] = StaticAsset(key, path.read_bytes(), _content_type(path), path.stat().st_mtime)
+        logger.info(f"Loaded {len(self.assets)} frontend assets from {self.root}")
+
+    def compress(self) -> None:
+        """
+        Build the compressed variants of every compressible asset (CPU-bound, run off the event loop).
+        """
+        for key, asset in self.assets.items():
+            if not asset.compressible:
+                continue
+            source = self.root / key
+            prebuilt_gz, prebuilt_br = Path(f"{source}.gz"), Path(f"{source}.br")
+            gz = prebuilt_gz.read_bytes() if prebuilt_gz.exists() else compress_body(asset.body, "gzip", level=9)
+            br = None
+            if prebuilt_br.exists():
+                br = prebuilt_br.read_bytes()
+            elif brotli is not None:
+                br = compress_body(asset.body, "br", level=11)
+            # Only keep variants that are actually smaller
+            if len(gz) < len(asset.body):
+                asset.variants["gzip"] = gz
+            if br is not None and len(br) < len(asset.body):
+                asset.variants["br"] = br
+        compressed = sum(1 for a in self.assets.values() if a.variants)
+        logger.info(f"Precompressed {compressed} frontend assets")
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self.assets.get(path.lstrip("/"))
+
+    def response(self, asset: StaticAsset, request: Request) -> Response:
+        """
+        Build the response for an asset, negotiating the content encoding and
+        answering conditional requests.
+        """
+        available = [coding for coding in ("br", "gzip") if coding in asset.variants]
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), available)
+
+        etag = asset.etag if encoding is None else asset.etag[:-1] + f'-{encoding}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": asset.last_modified,
+            "Cache-Control": IMMUTABLE_CACHE if asset.immutable else REVALIDATE_CACHE,
+        }
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(content=asset.variants[encoding], media_type=asset.content_type, headers=headers)
+        return Response(content=asset.body, media_type=asset.content_type, headers=headers)
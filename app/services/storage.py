@@ -0,0 +1,388 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: references are then only guarded within one process
+    fcntl = None
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Files of the output directory managed by the janitor (everything else is left alone)
+OUTPUT_PREFIXES = ("system_output_", "graph_only_", "profile_")
+
+
+class BlobStore:
+    """
+    Content-addressed store for uploaded PDFs.
+
+    Every distinct PDF is stored once as `blobs/<sha256>.pdf`; saved filenames are
+    only references to a blob, kept in `refs.json`. A blob is deleted when its last
+    reference goes away. Blobs of jobs in progress can be pinned so the janitor
+    never removes them.
+
+    Several processes (API and processing workers) can share the directory:
+    changes to the references are made under a file lock, and each process
+    reloads `refs.json` when another one changed it. Pins of other processes are
+    taken into account through `external_pins`.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.refs_path = self.root / "refs.json"
+        self.lock_path = self.root / "refs.lock"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._pins: Counter = Counter()
+        self._refs_mtime: Optional[int] = None
+        self._refs: Dict[str, dict] = self._load_refs()
+        # Digests in use by other processes (e.g. queued jobs), never removed
+        self.external_pins: Optional[Callable[[], Set[str]]] = None
+
+    def _load_refs(self) -> Dict[str, dict]:
+        if not self.refs_path.exists():
+            return {}
+        try:
+            self._refs_mtime = self.refs_path.stat().st_mtime_ns
+            with open(self.refs_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Could not read upload references {self.refs_path}: {str(e)}")
+            return {}
+
+    def _refresh(self) -> None:
+        try:
+            mtime = self.refs_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._refs_mtime:
+            self._refs = self._load_refs()
+
+    def _save_refs(self) -> None:
+        tmp_path = self.refs_path.with_suffix(f".json.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._refs, f)
+        os.replace(tmp_path, self.refs_path)
+        self._refs_mtime = self.refs_path.stat().st_mtime_ns
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Hold the references for a read-modify-write, across threads and processes.
+        """
+        with self._lock:
+            if fcntl is None:
+                self._refresh()
+                yield
+                return
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _pinned_digests(self) -> Set[str]:
+        pinned = set(self._pins)
+        if self.external_pins is not None:
+            try:
+                pinned |= self.external_pins()
+            except Exception as e:
+                logger.warning(f"Could not read blobs in use by other processes: {str(e)}")
+        return pinned
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blob_dir / f"{digest}.pdf"
+
+    def put(
+        self,
+        data: bytes,
+        ref_name: str,
+        original_filename: Optional[str] = None,
+        created_at: Optional[float] = None
+    ) -> Tuple[Path, bool]:
+        """
+        Store content under a reference name.
+
+        Args:
+            data: File content
+            ref_name: Saved filename referring to the content
+            original_filename: Name of the file as uploaded
+            created_at: Creation time of the reference (defaults to now)
+
+        Returns:
+            Tuple of (blob path, True if the content was already stored)
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        with self._locked():
+            deduplicated = path.exists()
+            if not deduplicated:
+                tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            self._refs[ref_name] = {
+                "sha256": digest,
+                "size": len(data),
+                "original_filename": original_filename or ref_name,
+                "created_at": created_at or time.time(),
+            }
+            self._save_refs()
+        metrics.increment("upload_dedup_hits" if deduplicated else "upload_blobs_written")
+        return path, deduplicated
+
+    def resolve(self, ref_name: str) -> Optional[Path]:
+        with self._lock:
+            self._refresh()
+            ref = self._refs.get(ref_name)
+        return self.blob_path(ref["sha256"]) if ref else None
+
+    def references(self) -> Dict[str, dict]:
+        with self._lock:
+            self._refresh()
+            return dict(self._refs)
+
+    def reference_count(self, digest: str) -> int:
+        with self._lock:
+            self._refresh()
+            return sum(1 for r in self._refs.values() if r["sha256"] == digest)
+
+    def is_pinned(self, digest: str) -> bool:
+        with self._lock:
+            return digest in self._pinned_digests()
+
+    def delete(self, ref_name: str) -> bool:
+        """
+        Remove a reference, and its blob if nothing else refers to it.
+
+        Returns:
+            False if the reference does not exist
+        """
+        with self._locked():
+            ref = self._refs.pop(ref_name, None)
+            if ref is None:
+                return False
+            self._save_refs()
+            self._remove_if_unreferenced(ref["sha256"])
+            return True
+
+    def _remove_if_unreferenced(self, digest: str) -> None:
+        if digest in self._pinned_digests() or any(r["sha256"] == digest for r in self._refs.values()):
+            return
+        try:
+            self.blob_path(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def pinned(self, path: Path) -> Iterator[None]:
+        """
+        Keep a blob from being deleted while it is in use (e.g. being processed).
+        """
+        digest = Path(path).stem
+        with self._lock:
+            self._pins[digest] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins[digest] -= 1
+                if self._pins[digest] <= 0:
+                    del self._pins[digest]
+
+    def remove_orphans(self) -> int:
+        """
+        Delete blobs that no reference points to (e.g. left by a crash).
+        """
+        with self._locked():
+            referenced = {r["sha256"] for r in self._refs.values()} | self._pinned_digests()
+            removed = 0
+            for path in self.blob_dir.glob("*.pdf"):
+                if path.stem not in referenced:
+                    path.unlink()
+                    removed += 1
+            return removed
+
+
+class StorageJanitor:
+    """
+    Enforces TTLs and size quotas on uploads and exported outputs, and reports
+    disk usage as metrics. Oldest files are evicted first when over quota.
+    """
+
+    def __init__(
+        self,
+        blob_store: BlobStore,
+        output_dir: Path,
+        upload_ttl: Optional[float],
+        upload_quota: Optional[int],
+        output_ttl: Optional[float],
+        output_quota: Optional[int]
+    ):
+        self.blob_store = blob_store
+        self.output_dir = Path(output_dir)
+        self.upload_ttl = upload_ttl
+        self.upload_quota = upload_quota
+        self.output_ttl = output_ttl
+        self.output_quota = output_quota
+
+    def migrate_legacy_uploads(self) -> int:
+        """
+        Move uploads saved before the blob store (`uploads/<timestamp>_<name>.pdf`)
+        into it, so identical copies collapse into one blob. The filenames stay valid.
+        Runs at startup whether or not limits are set, and on every janitor pass.
+        """
+        migrated = 0
+        for path in sorted(self.blob_store.root.glob("*.pdf")):
+            try:
+                data, created_at = path.read_bytes(), path.stat().st_mtime
+            except FileNotFoundError:
+                # Migrated by another process meanwhile
+                continue
+            # Keep the original upload time for TTL purposes
+            self.blob_store.put(data, path.name, created_at=created_at)
+            path.unlink(missing_ok=True)
+            migrated += 1
+        if migrated:
+            logger.info(f"Migrated {migrated} legacy uploads into the blob store")
+        return migrated
+
+    def _enforce_uploads(self, now: float) -> int:
+        refs = sorted(self.blob_store.references().items(), key=lambda item: item[1]["created_at"])
+        evicted = 0
+        if self.upload_ttl:
+            for name, ref in refs:
+                if now - ref["created_at"] > self.upload_ttl and self.blob_store.delete(name):
+                    evicted += 1
+            refs = sorted(self.blob_store.references().items(), key=lambda item: item[1]["created_at"])
+
+        if self.upload_quota:
+            usage = sum(p.stat().st_size for p in self.blob_store.blob_dir.glob("*.pdf"))
+            for name, ref in refs:
+                if usage <= self.upload_quota:
+                    break
+                if self.blob_store.is_pinned(ref["sha256"]):
+                    continue
+                shared = self.blob_store.reference_count(ref["sha256"])
+                self.blob_store.delete(name)
+                evicted += 1
+                if shared == 1:
+                    usage -= ref["size"]
+        return evicted
+
+    def _output_files(self) -> List[Path]:
+        files = [p for p in self.output_dir.glob("*") if p.is_file() and p.name.startswith(OUTPUT_PREFIXES)]
+        return sorted(files, key=lambda p: p.stat().st_mtime)
+
+    def _enforce_outputs(self, now: float) -> int:
+        evicted = 0
+        files = self._output_files()
+        if self.output_ttl:
+            for path in files:
+                if now - path.stat().st_mtime > self.output_ttl:
+                    path.unlink()
+                    evicted += 1
+            files = self._output_files()
+
+        if self.output_quota:
+            usage = sum(p.stat().st_size for p in files)
+            for path in files:
+                if usage <= self.output_quota:
+                    break
+                usage -= path.stat().st_size
+                path.unlink()
+                evicted += 1
+        return evicted
+
+    def report_usage(self) -> Dict[str, int]:
+        blobs = list(self.blob_store.blob_dir.glob("*.pdf"))
+        outputs = self._output_files() if self.output_dir.exists() else []
+        usage = {
+            "uploads_bytes": sum(p.stat().st_size for p in blobs),
+            "uploads_blobs": len(blobs),
+            "uploads_references": len(self.blob_store.references()),
+            "output_bytes": sum(p.stat().st_size for p in outputs),
+            "output_files": len(outputs),
+        }
+        metrics.set_gauge("storage_bytes", usage["uploads_bytes"], dir="uploads")
+        metrics.set_gauge("storage_files", usage["uploads_blobs"], dir="uploads")
+        metrics.set_gauge("storage_references", usage["uploads_references"], dir="uploads")
+        metrics.set_gauge("storage_bytes", usage["output_bytes"], dir="output")
+        metrics.set_gauge("storage_files", usage["output_files"], dir="output")
+        return usage
+
+    def run_once(self) -> Dict[str, int]:
+        """
+        Run one cleanup pass and refresh the disk usage metrics.
+        """
+        now = time.time()
+        self.migrate_legacy_uploads()
+        uploads_evicted = self._enforce_uploads(now)
+        orphans = self.blob_store.remove_orphans()
+        outputs_evicted = self._enforce_outputs(now) if self.output_dir.exists() else 0
+
+        metrics.increment("storage_evictions", uploads_evicted, dir="uploads")
+        metrics.increment("storage_evictions", outputs_evicted, dir="output")
+        if uploads_evicted or outputs_evicted or orphans:
+            logger.info(f"Storage janitor evicted {uploads_evicted} uploads, {outputs_evicted} outputs, {orphans} orphan blobs")
+        return {"uploads_evicted": uploads_evicted, "outputs_evicted": outputs_evicted, "orphans_removed": orphans, **self.report_usage()}
+
+    async def migrate(self) -> None:
+        """
+        Migrate the legacy uploads once (when no limits are set and the janitor
+        does not run).
+        """
+        try:
+            await asyncio.to_thread(self.migrate_legacy_uploads)
+        except Exception as e:
+            logger.error(f"Migration of legacy uploads failed: {str(e)}", exc_info=True)
+
+    async def run_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Storage janitor failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(interval)
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        from app.services.shared_store import get_shared_store
+
+        _blob_store = BlobStore(Path(settings.UPLOAD_DIR))
+        shared_store = get_shared_store()
+        if shared_store is not None:
+            # Blobs of queued jobs are in use by processing workers
+            _blob_store.external_pins = shared_store.active_digests
+    return _blob_store
+
+
+def create_janitor() -> StorageJanitor:
+    return StorageJanitor(
+        blob_store=get_blob_store(),
+        output_dir=Path(settings.OUTPUT_DIR),
+        upload_ttl=settings.UPLOAD_TTL_SECONDS,
+        upload_quota=settings.UPLOAD_QUOTA_BYTES,
+        output_ttl=settings.OUTPUT_TTL_SECONDS,
+        output_quota=settings.OUTPUT_QUOTA_BYTES
+    )
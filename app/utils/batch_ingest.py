@@ -0,0 +1,270 @@
+"""
+Headless batch ingestion of PDFs, without going through the HTTP API.
+
+Documents are processed by a pool of worker processes, each running the regular
+PDFProcessor pipeline and writing its export to the output directory. All workers
+share one budget of concurrent LLM calls. Completed documents are recorded (by
+content hash) in a JSONL state file, so an interrupted run resumes where it
+stopped and identical PDFs are only processed once. With the shared store of queue
+mode configured (PROCESSING_MODE=queue), results cached by the API's workers are
+reused, and page summaries are checkpointed there.
+
+Usage:
+    python -m app.utils.batch_ingest slides/ --workers 4 --llm-concurrency 16
+    python -m app.utils.batch_ingest --manifest nightly.txt
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_FILE = "batch_ingest_state.jsonl"
+
+# Event loop of a worker process, kept across documents so the LLM connection pool is reused
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_pdfs(source: Optional[str] = None, manifest: Optional[str] = None) -> List[Path]:
+    """
+    PDFs to ingest: every *.pdf under a directory (recursively), and/or the paths
+    listed in a manifest (one per line, or a JSON list).
+    """
+    paths: List[Path] = []
+    if source:
+        root = Path(source)
+        paths += sorted(root.rglob("*.pdf")) if root.is_dir() else [root]
+    if manifest:
+        text = Path(manifest).read_text(encoding='utf-8')
+        entries = json.loads(text) if text.lstrip().startswith("[") else text.splitlines()
+        base = Path(manifest).parent
+        for entry in entries:
+            entry = entry.strip()
+            if entry and not entry.startswith("#"):
+                path = Path(entry)
+                paths.append(path if path.is_absolute() else base / path)
+    return paths
+
+
+class BatchState:
+    """
+    Append-only record of processed documents, keyed by content hash.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.completed: Dict[str, dict] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line of an interrupted run may be truncated
+                        continue
+                    if record.get("status") == "done":
+                        self.completed[record["sha256"]] = record
+
+    def is_done(self, sha256: str) -> bool:
+        record = self.completed.get(sha256)
+        # Exports removed since (e.g. by the storage janitor) are processed again
+        return bool(record) and os.path.exists(record.get("export_file_path") or "")
+
+    def record(self, entry: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if entry.get("status") == "done":
+            self.completed[entry["sha256"]] = entry
+
+
+def _init_worker(llm_budget, log_level: int) -> None:
+    global _worker_loop
+    from app.langgraph.llm_client import set_call_budget
+    from app.langgraph.agents import warm_up
+
+    logging.basicConfig(level=log_level, format=f"%(asctime)s [worker {os.getpid()}] %(levelname)s %(name)s: %(message)s")
+    set_call_budget(llm_budget)
+    warm_up()
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+
+def _cached_result(path: str, thread_id: str) -> Optional[dict]:
+    """
+    Result of the same PDF from the shared store's cache, with its export linked
+    under thread_id, or None.
+    """
+    from app.services.shared_store import content_key, get_shared_store
+    from app.utils.export_utils import alias_export
+
+    store = get_shared_store()
+    if store is None:
+        return None
+    cached = store.cached_result(content_key(path))
+    if cached is None:
+        return None
+    export_path = alias_export(cached['metadata'].get('export_file_path'), thread_id)
+    if export_path is None:
+        return None
+    return {**cached, 'metadata': {**cached['metadata'], 'thread_id': thread_id, 'export_file_path': export_path}}
+
+
+def _process_document(path: str, sha256: str) -> dict:
+    from app.services.pdf_processor import PDFProcessor
+    from app.services.shared_store import content_key, get_shared_store
+
+    started = time.perf_counter()
+    entry = {"source": path, "sha256": sha256, "thread_id": f"batch_{sha256[:16]}"}
+    try:
+        result = _cached_result(path, entry["thread_id"])
+        entry["cached"] = result is not None
+        if result is None:
+            result = _worker_loop.run_until_complete(PDFProcessor().process_pdf(Path(path), thread_id=entry["thread_id"]))
+            store = get_shared_store()
+            if store is not None and result["metadata"].get("export_file_path"):
+                store.store_result(content_key(path), result)
+        metadata = result["metadata"]
+        if not metadata.get("export_file_path"):
+            raise RuntimeError("Export could not be written")
+        entry.update({
+            "status": "done",
+            "pages": metadata["total_pages"],
+            "nodes": metadata["total_nodes"],
+            "export_file_path": metadata["export_file_path"],
+        })
+    except Exception as e:
+        entry.update({"status": "failed", "error": str(e)})
+    entry["seconds"] = round(time.perf_counter() - started, 2)
+    entry["finished_at"] = time.time()
+    return entry
+
+
+def run_batch(
+    pdfs: List[Path],
+    workers: int,
+    llm_concurrency: int,
+    state_path: Path,
+    log_level: int = logging.WARNING
+) -> dict:
+    """
+    Process PDFs across a pool of worker processes, skipping documents already
+    completed according to the state file.
+
+    Returns:
+        Summary with documents processed, failed, skipped and throughput
+    """
+    state = BatchState(state_path)
+    pending: Dict[str, Path] = {}
+    skipped = 0
+    for path in pdfs:
+        sha256 = file_sha256(path)
+        if state.is_done(sha256) or sha256 in pending:
+            skipped += 1
+            continue
+        pending[sha256] = path
+
+    print(f"{len(pdfs)} PDFs: {len(pending)} to process, {skipped} already done or duplicate")
+    summary = {"processed": 0, "failed": 0, "skipped": skipped, "pages": 0, "seconds": 0.0}
+    if not pending:
+        return summary
+
+    started = time.perf_counter()
+    # Spawned workers don't inherit the parent's imported modules or threads
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        llm_budget = manager.BoundedSemaphore(llm_concurrency)
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(llm_budget, log_level)
+        )
+        try:
+            futures = {executor.submit(_process_document, str(path), sha256): (sha256, path) for sha256, path in pending.items()}
+            for future in as_completed(futures):
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    # The worker died (e.g. out of memory): a broken pool fails the documents in flight
+                    sha256, path = futures[future]
+                    entry = {
+                        "source": str(path), "sha256": sha256, "thread_id": f"batch_{sha256[:16]}",
+                        "status": "failed", "error": f"{type(e).__name__}: {str(e) or 'worker process died'}",
+                        "finished_at": time.time(),
+                    }
+                state.record(entry)
+                elapsed_min = (time.perf_counter() - started) / 60
+                if entry["status"] == "done":
+                    summary["processed"] += 1
+                    summary["pages"] += entry["pages"]
+                    outcome = f"{entry['pages']} pages in {entry['seconds']}s"
+                else:
+                    summary["failed"] += 1
+                    outcome = f"FAILED ({entry['error']})"
+                finished = summary["processed"] + summary["failed"]
+                print(
+                    f"[{finished}/{len(pending)}] {Path(entry['source']).name}: {outcome} | "
+                    f"{summary['pages'] / elapsed_min:.1f} pages/min, {summary['processed'] / elapsed_min:.2f} docs/min",
+                    flush=True
+                )
+        except KeyboardInterrupt:
+            print("Interrupted: completed documents are recorded, rerun the same command to resume")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+    if summary["failed"]:
+        print("Failed documents are processed again when the same command is rerun")
+
+    summary["seconds"] = round(time.perf_counter() - started, 1)
+    elapsed_min = summary["seconds"] / 60 or 1
+    summary["pages_per_min"] = round(summary["pages"] / elapsed_min, 1)
+    summary["docs_per_min"] = round(summary["processed"] / elapsed_min, 2)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a directory or manifest of PDFs without the API")
+    parser.add_argument("source", nargs="?", help="PDF file or directory of PDFs")
+    parser.add_argument("--manifest", help="File listing PDF paths (one per line, or a JSON list)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Worker processes")
+    parser.add_argument("--llm-concurrency", type=int, default=settings.LLM_POOL_SIZE, help="Concurrent LLM calls across all workers")
+    parser.add_argument("--state", default=os.path.join(settings.OUTPUT_DIR, DEFAULT_STATE_FILE), help="Resume state file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    if not args.source and not args.manifest:
+        parser.error("give a source directory/file or --manifest")
+
+    pdfs = collect_pdfs(args.source, args.manifest)
+    missing = [str(p) for p in pdfs if not p.is_file()]
+    if missing:
+        print(f"Missing files: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        summary = run_batch(pdfs, args.workers, args.llm_concurrency, Path(args.state), logging.INFO if args.verbose else logging.WARNING)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    print(json.dumps(summary))
@@ -0,0 +1,139 @@
+"""
+Payload size and serialization time of upload responses, per response view.
+
+Rebuilds the upload response of the largest exports in the output directory and
+measures, for each view: JSON size (identity, gzip, brotli) and the time taken by
+the serializers FastAPI can use for it.
+
+Usage:
+    python -m app.utils.bench_responses --exports 3 --scale 10
+"""
+import argparse
+import json
+import os
+import time
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.endpoints import shape_processing_result
+from app.core.compression import SUPPORTED_ENCODINGS, compress_body
+from app.core.models import PDFUploadResponse, ResponseView
+from app.utils.export_utils import list_exported_files, load_exported_output
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def processing_result_from_export(export: dict, scale: int = 1) -> dict:
+    """
+    Rebuild what PDFProcessor.process_pdf returned for an export. With scale > 1 the
+    graph and topics are repeated to simulate a larger deck.
+    """
+    results = export['processing_results']
+    graph = results.get('final_graph', {'nodes': [], 'edges': []})
+    layout = results.get('layout', {})
+    topics = results.get('topics', {}).get('topic_details', [])
+
+    nodes, edges, all_topics = [], [], []
+    for copy in range(scale):
+        suffix = f"_{copy}" if copy else ""
+        nodes += [{**node, 'id': node['id'] + suffix, **layout.get(node['id'], {})} for node in graph.get('nodes', [])]
+        edges += [
+            {**edge, 'id': edge['id'] + suffix, 'from': edge['from'] + suffix, 'to': edge['to'] + suffix}
+            for edge in graph.get('edges', [])
+        ]
+        all_topics += topics
+
+    metadata = export['metadata']
+    return {
+        'graph': {'nodes': nodes, 'edges': edges},
+        'metadata': {
+            'thread_id': metadata.get('thread_id', ''),
+            'total_pages': metadata.get('total_pages', 0) * scale,
+            'total_topics': len(all_topics),
+            'total_nodes': len(nodes),
+            'total_edges': len(edges),
+            'export_file_path': os.path.abspath(metadata.get('thread_id', 'export')),
+        },
+        'topics': all_topics,
+    }
+
+
+def response_body(processing_result: dict) -> dict:
+    return {
+        'success': True,
+        'message': "PDF uploaded and processed successfully",
+        'filename': "slides.pdf",
+        'saved_filename': "20250101_000000_slides.pdf",
+        'file_size': 1_000_000,
+        'processing_result': processing_result,
+    }
+
+
+def serializers() -> Dict[str, Callable[[dict], bytes]]:
+    def legacy(body: dict) -> bytes:
+        # Validation, jsonable_encoder and json.dumps (FastAPI before direct serialization)
+        return json.dumps(jsonable_encoder(PDFUploadResponse(**body), exclude_none=True)).encode()
+
+    def pydantic_json(body: dict) -> bytes:
+        return PDFUploadResponse.model_validate(body).model_dump_json(by_alias=True, exclude_none=True).encode()
+
+    options = {"legacy": legacy, "pydantic": pydantic_json}
+    if orjson is not None:
+        options["orjson"] = orjson.dumps
+    return options
+
+
+def time_call(fn: Callable, arg, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def benchmark(processing_result: dict, repeat: int) -> List[dict]:
+    rows = []
+    for view, include_summaries in [
+        (ResponseView.full, True),
+        (ResponseView.full, False),
+        (ResponseView.graph, True),
+        (ResponseView.topics, False),
+        (ResponseView.metadata, True),
+    ]:
+        body = response_body(shape_processing_result(processing_result, view, include_summaries))
+        payload = json.dumps(body).encode()
+        row = {
+            'view': view.value + ("" if include_summaries else " (no summaries)"),
+            'bytes': len(payload),
+            **{f"{coding}_bytes": len(compress_body(payload, coding)) for coding in SUPPORTED_ENCODINGS},
+        }
+        for name, fn in serializers().items():
+            row[f"{name}_ms"] = round(time_call(fn, body, repeat), 3)
+        rows.append(row)
+    return rows
+
+
+def print_rows(rows: List[dict]) -> None:
+    columns = list(rows[0].keys())
+    print("  ".join(f"{c:>18}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{str(row[c]):>18}" for c in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark upload response size and serialization")
+    parser.add_argument("--exports", type=int, default=3, help="Number of largest exports to use")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat graph and topics to simulate larger decks")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    exports = sorted(list_exported_files(), key=os.path.getsize, reverse=True)[:args.exports]
+    if not exports:
+        print("No exports found in the output directory")
+    for path in exports:
+        result = processing_result_from_export(load_exported_output(path), args.scale)
+        print(f"\n{os.path.basename(path)} (scale {args.scale}): {result['metadata']['total_nodes']} nodes, {result['metadata']['total_topics']} topics")
+        print_rows(benchmark(result, args.repeat))
@@ -0,0 +1,129 @@
+"""
+Throughput benchmark for serving the built frontend.
+
+Compares the previous handler (FileResponse from disk for every request) with the
+in-memory AssetManifest, over `frontend/dist` or a synthetic build of similar size.
+
+Usage:
+    python -m app.utils.bench_static --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import random
+import string
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+
+from app.services.static_assets import AssetManifest
+
+
+def make_synthetic_dist(root: Path) -> Path:
+    """
+    Write a dist folder shaped like a Vite build: index.html plus hashed JS/CSS bundles.
+    """
+    assets = root / "assets"
+    assets.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(0)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(2000)]
+
+    def source(size: int) -> str:
+        parts, total = [], 0
+        while total < size:
+            line = f"const {rng.choice(words)}={rng.choice(words)}({rng.randint(0, 999)});"
+            parts.append(line)
+            total += len(line)
+        return "".join(parts)
+
+    (assets / "index-Bq3xK9aZ.js").write_text(source(600_000))
+    (assets / "vendor-D8fLm2Qw.js").write_text(source(250_000))
+    (assets / "index-C4nTz7Hp.css").write_text(source(40_000))
+    (root / "index.html").write_text(
+        '<!doctype html><html><head><script type="module" src="/assets/index-Bq3xK9aZ.js"></script>'
+        '<link rel="stylesheet" href="/assets/index-C4nTz7Hp.css"></head><body><div id="root"></div></body></html>'
+    )
+    return root
+
+
+def legacy_app(dist: Path) -> FastAPI:
+    app = FastAPI()
+    app.mount("/assets", StaticFiles(directory=str(dist / "assets")), name="assets")
+
+    @app.get("/{full_path:path}")
+    async def serve_spa(full_path: str):
+        file_path = dist / full_path
+        if file_path.is_file():
+            return FileResponse(file_path)
+        return FileResponse(dist / "index.html")
+
+    return app
+
+
+def manifest_app(dist: Path) -> FastAPI:
+    app = FastAPI()
+    manifest = AssetManifest(dist)
+    manifest.compress()
+
+    @app.get("/{full_path:path}")
+    async def serve_spa(full_path: str, request: Request):
+        asset = manifest.get(full_path) or manifest.get("index.html")
+        return manifest.response(asset, request)
+
+    return app
+
+
+async def run_load(app: FastAPI, paths: list, total: int, concurrency: int, headers: dict) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    sent = 0
+    received_bytes = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            nonlocal sent, received_bytes
+            while sent < total:
+                path = paths[sent % len(paths)]
+                sent += 1
+                # Count bytes on the wire, without decoding them client-side
+                async with client.stream("GET", path, headers=headers) as response:
+                    async for chunk in response.aiter_raw():
+                        received_bytes += len(chunk)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests_per_second": round(total / elapsed, 1),
+        "mb_transferred": round(received_bytes / 1e6, 1),
+    }
+
+
+async def main(dist: Path, total: int, concurrency: int) -> None:
+    paths = ["/", "/graph"] + [f"/{p.relative_to(dist).as_posix()}" for p in (dist / "assets").glob("*")]
+    scenarios = [
+        ("legacy (FileResponse)", legacy_app(dist), {}),
+        ("manifest, identity", manifest_app(dist), {"Accept-Encoding": "identity"}),
+        ("manifest, gzip/br", manifest_app(dist), {"Accept-Encoding": "gzip, br"}),
+    ]
+    print(f"{total} requests, concurrency {concurrency}, {len(paths)} paths from {dist}")
+    for name, app, headers in scenarios:
+        result = await run_load(app, paths, total, concurrency, headers)
+        print(f"  {name:<24} {result['requests_per_second']:>8} req/s  {result['mb_transferred']:>8} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark static frontend serving")
+    parser.add_argument("--dist", help="Built frontend folder (default: frontend/dist or a synthetic build)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    dist = Path(args.dist) if args.dist else Path(__file__).parent.parent.parent / "frontend" / "dist"
+    if not dist.exists():
+        dist = make_synthetic_dist(Path(tempfile.mkdtemp(prefix="bench_dist_")))
+    asyncio.run(main(dist, args.requests, args.concurrency))
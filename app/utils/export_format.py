@@ -0,0 +1,160 @@
+"""
+Section-indexed container for exported system outputs (`.mmx` files).
+
+Layout:
+    MAGIC (4 bytes) | index length (uint32, little endian) | index (JSON) | sections
+
+The index maps each section name to its [offset, length] in the data area that
+follows it. Each section is a JSON document of its own: `metadata`, and one per
+key of `processing_results` (`processing_results.page_summaries`,
+`processing_results.topics`, `processing_results.final_graph`, ...). Readers map
+the file and decode only the sections they access.
+"""
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard json module
+    orjson = None
+
+MAGIC = b"MMX1"
+EXTENSION = ".mmx"
+HEADER = struct.Struct("<4sI")
+
+# Top-level keys whose entries are stored as separate sections
+SPLIT_KEYS = ("processing_results",)
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data).decode('utf-8'))
+
+
+def _flatten(data: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    sections = []
+    for key, value in data.items():
+        if key in SPLIT_KEYS and isinstance(value, dict):
+            sections += [(f"{key}.{sub_key}", sub_value) for sub_key, sub_value in value.items()]
+        else:
+            sections.append((key, value))
+    return sections
+
+
+def write_sectioned_export(data: Dict[str, Any], file_path: str) -> str:
+    """
+    Write a system output as a section-indexed container.
+
+    Args:
+        data: System output (same structure as the JSON exports)
+        file_path: Destination path
+
+    Returns:
+        str: Path to the written file
+    """
+    encoded = [(name, _dumps(value)) for name, value in _flatten(data)]
+    index, offset = {}, 0
+    for name, body in encoded:
+        index[name] = [offset, len(body)]
+        offset += len(body)
+    index_bytes = _dumps({"version": 1, "sections": index})
+
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(index_bytes)))
+        f.write(index_bytes)
+        for _, body in encoded:
+            f.write(body)
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+def is_sectioned_export(file_path: str) -> bool:
+    with open(file_path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class SectionedExport(Mapping):
+    """
+    Read-only, lazy view of a `.mmx` export that behaves like the dict loaded from
+    a JSON export: `export['processing_results']['final_graph']` only decodes the
+    graph section. Decoded sections are cached.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(file_path, 'rb') as f:
+            magic, index_length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a sectioned export: {file_path}")
+            index = _loads(f.read(index_length))
+        self.data_offset = HEADER.size + index_length
+        self.sections: Dict[str, List[int]] = index["sections"]
+        self._cache: Dict[str, Any] = {}
+
+    def read_section(self, name: str) -> Any:
+        """
+        Decode one section, reading only its bytes (through a memory map).
+        """
+        if name not in self._cache:
+            offset, length = self.sections[name]
+            with open(self.file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                start = self.data_offset + offset
+                self._cache[name] = _loads(mapped[start:start + length])
+        return self._cache[name]
+
+    def _top_level_keys(self) -> List[str]:
+        keys = []
+        for name in self.sections:
+            key = name.split(".", 1)[0] if name.split(".", 1)[0] in SPLIT_KEYS else name
+            if key not in keys:
+                keys.append(key)
+        return keys
+
+    def __getitem__(self, key: str) -> Any:
+        if key in SPLIT_KEYS and key in self._top_level_keys():
+            return _SectionGroup(self, key)
+        if key not in self.sections:
+            raise KeyError(key)
+        return self.read_section(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._top_level_keys())
+
+    def __len__(self) -> int:
+        return len(self._top_level_keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Decode every section into the same dict a JSON export would load as.
+        """
+        return {key: dict(value) if isinstance(value, _SectionGroup) else value for key, value in self.items()}
+
+
+class _SectionGroup(Mapping):
+    def __init__(self, export: SectionedExport, prefix: str):
+        self.export = export
+        self.prefix = prefix + "."
+
+    def __getitem__(self, key: str) -> Any:
+        name = self.prefix + key
+        if name not in self.export.sections:
+            raise KeyError(key)
+        return self.export.read_section(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return (name[len(self.prefix):] for name in self.export.sections if name.startswith(self.prefix))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -1,19 +1,34 @@
+import argparse
 import json
 import os
-from typing import Dict, List, Optional
+import re
+import shutil
+from typing import List, Mapping, Optional
 from datetime import datetime
 
-def load_exported_output(file_path: str) -> Optional[Dict]:
+from app.core.config import settings
+from app.utils.export_format import EXTENSION, SectionedExport, write_sectioned_export
+
+# system_output_<thread_id>_<YYYYmmdd>_<HHMMSS>.<ext> (thread IDs may contain '_')
+EXPORT_FILENAME_PATTERN = re.compile(r"^system_output_(?P<thread_id>.+)_\d{8}_\d{6}\.(?:json|mmx)$")
+
+def load_exported_output(file_path: str) -> Optional[Mapping]:
     """
-    Load an exported system output from a JSON file.
+    Load an exported system output.
+    
+    `.mmx` exports are loaded lazily: only the sections that are accessed (e.g.
+    `['processing_results']['final_graph']`) are read and decoded. JSON exports
+    are parsed entirely.
     
     Args:
-        file_path: Path to the exported JSON file
+        file_path: Path to the exported file (.mmx or .json)
     
     Returns:
-        Dict containing the complete system output, or None if error
+        Mapping containing the complete system output, or None if error
     """
     try:
+        if file_path.endswith(EXTENSION):
+            return SectionedExport(file_path)
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         return data
@@ -21,19 +36,20 @@ def load_exported_output(file_path: str) -> Optional[Dict]:
         print(f"Error loading exported output from {file_path}: {e}")
         return None
 
-def display_export_summary(exported_data: Dict) -> None:
+def display_export_summary(exported_data: Mapping, details: bool = True) -> None:
     """
     Display a summary of the exported system output.
     
     Args:
-        exported_data: Exported data loaded from JSON file
+        exported_data: Exported data returned by load_exported_output
+        details: Also list page summaries, topics and graph contents (with False
+            only the metadata is read)
     """
     if not exported_data:
         print("No exported data to display")
         return
     
     metadata = exported_data.get('metadata', {})
-    processing_results = exported_data.get('processing_results', {})
     
     print("=" * 60)
     print("EXPORTED SYSTEM OUTPUT SUMMARY")
@@ -46,6 +62,10 @@ def display_export_summary(exported_data: Dict) -> None:
     print(f"Graph Nodes: {metadata.get('graph_nodes', 0)}")
     print(f"Graph Edges: {metadata.get('graph_edges', 0)}")
     
+    if not details:
+        return
+    processing_results = exported_data.get('processing_results', {})
+    
     # Display page summaries
     page_summaries = processing_results.get('page_summaries', [])
     print(f"\n📄 PAGE SUMMARIES ({len(page_summaries)} pages):")
@@ -97,27 +117,42 @@ def display_export_summary(exported_data: Dict) -> None:
             label = edge.get('label', '')
             print(f"    {i}. {from_node} --[{label}]--> {to_node}")
 
-def list_exported_files(output_dir: str = "output") -> List[str]:
+def export_thread_id(path: str) -> Optional[str]:
+    """
+    Thread ID of the processing session an export file belongs to (None if the
+    filename is not an export's).
+    """
+    match = EXPORT_FILENAME_PATTERN.match(os.path.basename(path))
+    return match.group("thread_id") if match else None
+
+def list_exported_files(output_dir: str = settings.OUTPUT_DIR, thread_id: Optional[str] = None) -> List[str]:
     """
     List all exported system output files in the output directory.
     
     Args:
         output_dir: Directory containing exported files
+        thread_id: Only list the exports of this processing session
     
     Returns:
-        List of file paths to exported files
+        List of file paths to exported files, most recent first
     """
     if not os.path.exists(output_dir):
         return []
     
+    filenames = set(os.listdir(output_dir))
     exported_files = []
-    for filename in os.listdir(output_dir):
-        if filename.startswith("system_output_") and filename.endswith(".json"):
+    for filename in filenames:
+        if not filename.startswith("system_output_"):
+            continue
+        if thread_id is not None and export_thread_id(filename) != thread_id:
+            continue
+        # A converted JSON export is superseded by its .mmx copy
+        if filename.endswith(EXTENSION) or (filename.endswith(".json") and filename[:-len(".json")] + EXTENSION not in filenames):
             exported_files.append(os.path.join(output_dir, filename))
     
     return sorted(exported_files, key=os.path.getmtime, reverse=True)
 
-def get_latest_export(output_dir: str = "output") -> Optional[str]:
+def get_latest_export(output_dir: str = settings.OUTPUT_DIR) -> Optional[str]:
     """
     Get the path to the most recently exported system output.
     
@@ -130,12 +165,12 @@ def get_latest_export(output_dir: str = "output") -> Optional[str]:
     exported_files = list_exported_files(output_dir)
     return exported_files[0] if exported_files else None
 
-def export_graph_only(exported_data: Dict, output_file: str) -> bool:
+def export_graph_only(exported_data: Mapping, output_file: str) -> bool:
     """
     Export only the graph portion from the complete system output.
     
     Args:
-        exported_data: Complete exported system output
+        exported_data: Exported system output (only its metadata and graph are read)
         output_file: Path where to save the graph-only file
     
     Returns:
@@ -169,17 +204,91 @@ def export_graph_only(exported_data: Dict, output_file: str) -> bool:
         print(f"Error exporting graph: {e}")
         return False
 
+def alias_export(export_path: str, thread_id: str) -> Optional[str]:
+    """
+    Make an export available under another thread ID (e.g. for a job served from
+    the result cache), as a hard link or, across filesystems, a copy.
+    
+    Returns:
+        Path of the export for thread_id, or None if export_path no longer exists
+    """
+    if not export_path or not os.path.isfile(export_path):
+        return None
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    alias_path = os.path.join(os.path.dirname(export_path), f"system_output_{thread_id}_{timestamp}{os.path.splitext(export_path)[1]}")
+    try:
+        os.link(export_path, alias_path)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copyfile(export_path, alias_path)
+    return alias_path
+
+def convert_export(json_path: str, remove_source: bool = False) -> Optional[str]:
+    """
+    Convert a JSON export (system_output_*.json) to the section-indexed .mmx format.
+    
+    Args:
+        json_path: Path to the JSON export
+        remove_source: Delete the JSON file once converted
+    
+    Returns:
+        Path to the .mmx file, or None if error
+    """
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        mmx_path = os.path.splitext(json_path)[0] + EXTENSION
+        write_sectioned_export(data, mmx_path)
+        # Keep the export's age for the storage janitor's TTL
+        stat = os.stat(json_path)
+        os.utime(mmx_path, (stat.st_atime, stat.st_mtime))
+        if remove_source:
+            os.remove(json_path)
+        return mmx_path
+    except Exception as e:
+        print(f"Error converting {json_path}: {e}")
+        return None
+
+def convert_all_exports(output_dir: str = settings.OUTPUT_DIR, remove_source: bool = False) -> List[str]:
+    """
+    Convert every JSON export of the output directory to the .mmx format.
+    
+    Returns:
+        Paths to the converted files
+    """
+    if not os.path.exists(output_dir):
+        return []
+    converted = []
+    for filename in sorted(os.listdir(output_dir)):
+        if filename.startswith("system_output_") and filename.endswith(".json"):
+            mmx_path = convert_export(os.path.join(output_dir, filename), remove_source)
+            if mmx_path:
+                converted.append(mmx_path)
+    return converted
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and convert exported system outputs")
+    parser.add_argument("--output-dir", default=settings.OUTPUT_DIR)
+    parser.add_argument("--convert", action="store_true", help="Convert JSON exports to the .mmx format")
+    parser.add_argument("--remove-json", action="store_true", help="Delete JSON exports once converted")
+    parser.add_argument("--summary-only", action="store_true", help="Only show the metadata of the latest export")
+    args = parser.parse_args()
+    
+    if args.convert:
+        converted = convert_all_exports(args.output_dir, remove_source=args.remove_json)
+        print(f"Converted {len(converted)} exports to {EXTENSION}")
+    
     # Example usage
-    latest_export = get_latest_export()
+    latest_export = get_latest_export(args.output_dir)
     if latest_export:
         print(f"Loading latest export: {latest_export}")
         exported_data = load_exported_output(latest_export)
         if exported_data:
-            display_export_summary(exported_data)
+            display_export_summary(exported_data, details=not args.summary_only)
             
             # Export graph only
-            graph_output = latest_export.replace("system_output_", "graph_only_")
+            graph_output = os.path.splitext(latest_export.replace("system_output_", "graph_only_"))[0] + ".json"
             export_graph_only(exported_data, graph_output)
     else:
         print("No exported files found in output directory")
@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """
+    Parse the stderr of `python -X importtime`.
+    
+    Args:
+        output: Raw importtime output
+    
+    Returns:
+        List of dicts with module, self_us, cumulative_us and depth (nesting level)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        stripped = name.lstrip()
+        entries.append({
+            "module": stripped.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(name) - len(stripped) - 1) // 2
+        })
+    return entries
+
+
+def profile_imports(module: str = "app.main", top: int = 15) -> Dict:
+    """
+    Import a module in a fresh interpreter and measure its import time.
+    
+    Args:
+        module: Module to import
+        top: Number of slowest modules to report
+    
+    Returns:
+        Dict with total import time, wall time of the interpreter, the import time
+        spent per top-level package and the modules with the highest self time
+    """
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    
+    entries = parse_importtime(completed.stderr)
+    target = next((e for e in entries if e["module"] == module), None)
+    per_package: Dict[str, int] = {}
+    for e in entries:
+        package = e["module"].split(".")[0]
+        per_package[package] = per_package.get(package, 0) + e["self_us"]
+    slowest = sorted(entries, key=lambda e: e["self_us"], reverse=True)[:top]
+    
+    return {
+        "module": module,
+        "total_ms": round(target["cumulative_us"] / 1000, 1) if target else None,
+        "wall_ms": round(wall_ms, 1),
+        "package_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "slowest_self_ms": {e["module"]: round(e["self_us"] / 1000, 1) for e in slowest}
+    }
+
+
+def git_revision(cwd: Optional[str] = None) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=cwd
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def record_profile(profile: Dict, history_file: str = "profiles/import_time.jsonl") -> str:
+    """
+    Append an import profile to the history file so it can be tracked over time.
+    
+    Returns:
+        Path to the history file
+    """
+    os.makedirs(os.path.dirname(history_file) or ".", exist_ok=True)
+    record = {"recorded_at": datetime.now().isoformat(), "git_revision": git_revision(), **profile}
+    with open(history_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + "\n")
+    return history_file
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the import time of the application")
+    parser.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to show")
+    parser.add_argument("--history", default="profiles/import_time.jsonl", help="History file to append to")
+    parser.add_argument("--no-record", action="store_true", help="Only print, don't append to the history")
+    args = parser.parse_args()
+    
+    profile = profile_imports(args.module, args.top)
+    print(f"Import of {profile['module']}: {profile['total_ms']} ms (interpreter wall time {profile['wall_ms']} ms)")
+    print("\nTime per package (ms):")
+    for name, ms in profile["package_ms"].items():
+        print(f"  {ms:>9.1f}  {name}")
+    print("\nSlowest modules (self ms):")
+    for name, ms in profile["slowest_self_ms"].items():
+        print(f"  {ms:>9.1f}  {name}")
+    
+    if not args.no_record:
+        print(f"\nRecorded in {record_profile(profile, args.history)}")
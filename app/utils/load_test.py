@@ -0,0 +1,320 @@
+"""
+Load test of the API against a local mock of the OpenAI API.
+
+Starts the mock server and `uvicorn app.main:app` (in a scratch working directory),
+generates decks of the requested sizes, drives uploads either open-loop (Poisson
+arrivals at --rate per second) or closed-loop (--concurrency clients), and reports
+throughput, latency percentiles, error rate, event loop lag and server memory.
+Results are saved to loadtest_results/ and appended to its history file so
+capacity can be compared between releases.
+
+Usage:
+    python -m app.utils.load_test --mix 5:0.5,20:0.3,60:0.2 --concurrency 8 --requests 40
+    python -m app.utils.load_test --mix 10:1 --rate 0.5 --requests 30 --mock-latency-ms 400
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.utils.import_profile import git_revision
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def parse_mix(mix: str) -> List[Tuple[int, float]]:
+    """
+    Parse an upload mix such as "5:0.5,20:0.3,60:0.2" (pages:weight, ...).
+    """
+    entries = []
+    for part in mix.split(","):
+        pages, _, weight = part.partition(":")
+        entries.append((int(pages), float(weight or 1)))
+    return entries
+
+
+def make_deck(pages: int, path: Path) -> Path:
+    """
+    Write a PDF with one text slide per page.
+    """
+    import fitz
+
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        page = doc.new_page(width=960, height=540)
+        page.insert_text((60, 80), f"Slide {number}: Attention and transformers", fontsize=32)
+        for line in range(6):
+            page.insert_text((80, 160 + line * 50), f"- Point {line + 1} about training, inference and evaluation", fontsize=20)
+        page.draw_rect(fitz.Rect(700, 380, 900, 500), color=(0.2, 0.4, 0.8), fill=(0.8, 0.9, 1.0))
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 3)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url: str, timeout: float, process: subprocess.Popen) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before {url} was up")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+class MemorySampler:
+    """
+    Samples the resident memory of a process from /proc (Linux only).
+    """
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _rss_bytes(self) -> Optional[int]:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+        return None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss = self._rss_bytes()
+            if rss is not None:
+                self.samples.append(rss)
+
+    def start(self) -> "MemorySampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, Optional[float]]:
+        self._stop.set()
+        self._thread.join()
+        to_mb = lambda value: round(value / 1e6, 1) if value is not None else None
+        return {
+            "rss_start_mb": to_mb(self.samples[0] if self.samples else None),
+            "rss_peak_mb": to_mb(max(self.samples) if self.samples else None),
+            "rss_end_mb": to_mb(self.samples[-1] if self.samples else None),
+        }
+
+
+async def drive_uploads(
+    base_url: str,
+    decks: List[Tuple[int, Path, float]],
+    requests: int,
+    concurrency: Optional[int],
+    rate: Optional[float],
+    seed: int,
+    timeout: float
+) -> Tuple[List[dict], float]:
+    """
+    Send the uploads, closed-loop (concurrency) or open-loop (Poisson arrivals at rate/s).
+
+    Returns:
+        Tuple of (one record per request, wall time in seconds)
+    """
+    rng = random.Random(seed)
+    choices = [rng.choices(decks, weights=[w for _, _, w in decks])[0] for _ in range(requests)]
+    results: List[dict] = []
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        async def upload(pages: int, path: Path) -> None:
+            started = time.perf_counter()
+            record = {"pages": pages}
+            try:
+                with open(path, 'rb') as f:
+                    response = await client.post(
+                        "/api/upload-pdf",
+                        params={"view": "metadata"},
+                        files={"file": (path.name, f.read(), "application/pdf")}
+                    )
+                record["status"] = response.status_code
+            except httpx.HTTPError as e:
+                record["status"] = None
+                record["error"] = type(e).__name__
+            record["latency"] = time.perf_counter() - started
+            results.append(record)
+
+        started = time.perf_counter()
+        if rate:
+            tasks = []
+            for pages, path, _ in choices:
+                tasks.append(asyncio.create_task(upload(pages, path)))
+                await asyncio.sleep(rng.expovariate(rate))
+            await asyncio.gather(*tasks)
+        else:
+            queue = list(choices)
+
+            async def worker():
+                while queue:
+                    pages, path, _ = queue.pop()
+                    await upload(pages, path)
+
+            await asyncio.gather(*[worker() for _ in range(concurrency or 1)])
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def summarize(results: List[dict], elapsed: float, server_metrics: dict, memory: dict) -> dict:
+    succeeded = [r for r in results if r["status"] == 200]
+    latencies = [r["latency"] for r in succeeded]
+    lag = server_metrics.get("timings", {}).get("event_loop_lag_seconds", {})
+    by_size = {}
+    for pages in sorted({r["pages"] for r in results}):
+        size_latencies = [r["latency"] for r in succeeded if r["pages"] == pages]
+        by_size[str(pages)] = {
+            "requests": sum(1 for r in results if r["pages"] == pages),
+            "p50_s": percentile(size_latencies, 0.50),
+            "p95_s": percentile(size_latencies, 0.95),
+        }
+    return {
+        "requests": len(results),
+        "succeeded": len(succeeded),
+        "error_rate": round(1 - len(succeeded) / len(results), 4) if results else None,
+        "errors": sorted({str(r.get("error") or r["status"]) for r in results if r["status"] != 200}),
+        "wall_seconds": round(elapsed, 2),
+        "throughput_rps": round(len(succeeded) / elapsed, 3),
+        "docs_per_min": round(len(succeeded) / elapsed * 60, 2),
+        "pages_per_min": round(sum(r["pages"] for r in succeeded) / elapsed * 60, 1),
+        "latency_s": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": percentile(latencies, 1.0),
+        },
+        "latency_by_deck_size": by_size,
+        "event_loop_lag_ms": {k: round(lag[k] * 1000, 1) for k in ("p50", "p95", "p99", "max") if k in lag},
+        "memory": memory,
+        "llm_calls": sum(v["count"] for k, v in server_metrics.get("timings", {}).items() if k.startswith("llm_call_seconds")),
+    }
+
+
+def save_results(result: dict, results_dir: Path) -> Path:
+    """
+    Write the full result and append its summary to the history file.
+    """
+    results_dir.mkdir(parents=True, exist_ok=True)
+    path = results_dir / f"loadtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    with open(results_dir / "history.jsonl", 'a', encoding='utf-8') as f:
+        f.write(json.dumps({k: v for k, v in result.items() if k != "requests_detail"}) + "\n")
+    return path
+
+
+def run_load_test(args: argparse.Namespace) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="loadtest_"))
+    mock_port, app_port = _free_port(), _free_port()
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT) + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    mock_env = {**env, "MOCK_LATENCY_MS": str(args.mock_latency_ms), "MOCK_JITTER_MS": str(args.mock_latency_ms / 4),
+                "MOCK_ERROR_RATE": str(args.mock_error_rate)}
+    app_env = {**env, "OPENAI_API_KEY": "loadtest", "OPENAI_BASE_URL": f"http://127.0.0.1:{mock_port}/v1"}
+    for assignment in args.app_env:
+        key, _, value = assignment.partition("=")
+        app_env[key] = value
+
+    decks = [(pages, make_deck(pages, workdir / f"deck_{pages}.pdf"), weight) for pages, weight in parse_mix(args.mix)]
+    processes = []
+    try:
+        mock = subprocess.Popen(
+            [sys.executable, "-m", "app.utils.mock_openai_server", "--port", str(mock_port)],
+            env=mock_env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        processes.append(mock)
+        _wait_for(f"http://127.0.0.1:{mock_port}/v1/models", 30, mock)
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(app_port), "--log-level", "warning"],
+            env=app_env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=open(workdir / "server.log", 'w')
+        )
+        processes.append(server)
+        base_url = f"http://127.0.0.1:{app_port}"
+        _wait_for(f"{base_url}/ready", 120, server)
+
+        sampler = MemorySampler(server.pid).start()
+        results, elapsed = asyncio.run(drive_uploads(
+            base_url, decks, args.requests, args.concurrency, args.rate, args.seed, args.timeout
+        ))
+        memory = sampler.stop()
+        server_metrics = httpx.get(f"{base_url}/api/metrics", timeout=10).json()
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        "recorded_at": datetime.now().isoformat(),
+        "git_revision": git_revision(cwd=str(REPO_ROOT)),
+        "api_version": settings.API_VERSION,
+        "config": {
+            "mix": args.mix,
+            "requests": args.requests,
+            "concurrency": None if args.rate else args.concurrency,
+            "rate_per_second": args.rate,
+            "mock_latency_ms": args.mock_latency_ms,
+            "mock_error_rate": args.mock_error_rate,
+            "app_env": args.app_env,
+        },
+        **summarize(results, elapsed, server_metrics, memory),
+        "requests_detail": [{**r, "latency": round(r["latency"], 3)} for r in results],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API against a local mock LLM")
+    parser.add_argument("--mix", default="5:0.5,20:0.3,60:0.2", help="Deck sizes and weights, pages:weight,...")
+    parser.add_argument("--requests", type=int, default=40, help="Total uploads")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients (closed loop)")
+    parser.add_argument("--rate", type=float, help="Arrivals per second (open loop, overrides --concurrency)")
+    parser.add_argument("--mock-latency-ms", type=float, default=300)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--app-env", action="append", default=[], help="Extra KEY=VALUE settings for the app")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results-dir", default="loadtest_results")
+    parser.add_argument("--no-record", action="store_true", help="Only print, don't save the results")
+    args = parser.parse_args()
+
+    result = run_load_test(args)
+    print(json.dumps({k: v for k, v in result.items() if k != "requests_detail"}, indent=2))
+    if not args.no_record:
+        print(f"\nSaved to {save_results(result, Path(args.results_dir))}")
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Simulated model behaviour, configurable through the environment
+LATENCY_MS = float(os.environ.get("MOCK_LATENCY_MS", "200"))
+JITTER_MS = float(os.environ.get("MOCK_JITTER_MS", "50"))
+ERROR_RATE = float(os.environ.get("MOCK_ERROR_RATE", "0"))
+# Stub of a weaker model: replies for this model are truncated (invalid JSON) at the given rate
+DEGRADED_MODEL = os.environ.get("MOCK_DEGRADED_MODEL", "")
+DEGRADED_RATE = float(os.environ.get("MOCK_DEGRADED_RATE", "0"))
+# Streamed replies (stream=true) are sent in chunks of this many characters, with this delay between chunks
+STREAM_CHUNK_CHARS = int(os.environ.get("MOCK_STREAM_CHUNK_CHARS", "16"))
+STREAM_CHUNK_MS = float(os.environ.get("MOCK_STREAM_CHUNK_MS", "2"))
+
+app = FastAPI(title="Mock OpenAI-compatible API")
+
+# Connection statistics: one entry per distinct client (host, port) = TCP connection
+_stats = {"requests": 0, "connections": set(), "started_at": time.time()}
+
+
+def _text_of(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _words(text: str, count: int) -> List[str]:
+    words = [w for w in re.findall(r"[A-Za-z][A-Za-z-]{3,}", text)]
+    return words[:count] or ["Concept"]
+
+
+def _topics_reply(user_text: str) -> str:
+    slides = [int(n) for n in re.findall(r"Slide (\d+):", user_text)] or [1]
+    summaries = re.split(r"\n\nSlide \d+:\n", "\n\n" + user_text)[1:] or [""]
+    # Group consecutive slides in chunks of 3
+    topics = []
+    for start in range(0, len(slides), 3):
+        chunk = slides[start:start + 3]
+        topics.append({
+            "topic_title": f"Topic {len(topics) + 1}: " + " ".join(_words(summaries[start] if start < len(summaries) else "", 2)),
+            "slide_numbers": chunk,
+            "summaries": [summaries[i].strip() if i < len(summaries) else "" for i in range(start, start + len(chunk))]
+        })
+    return json.dumps({"topics": topics})
+
+
+def _graph_nodes(topic_title: str, summaries_text: str, prefix: str) -> Dict[str, list]:
+    central = f"{prefix}1"
+    nodes = [{"id": central, "title": topic_title, "type": "central"}]
+    edges = []
+    for i, word in enumerate(_words(summaries_text, 4), 2):
+        nodes.append({"id": f"{prefix}{i}", "title": f"{word.title()} Concept", "type": "subnode"})
+        edges.append({"id": f"{prefix}edge_{i}", "from": central, "to": f"{prefix}{i}", "label": "includes"})
+    return {"nodes": nodes, "edges": edges}
+
+
+def _graph_reply(user_text: str) -> str:
+    if "CROSS-TOPIC LINKS" in user_text:
+        centrals = re.findall(r"^\s*(n\d+) \[C\]", user_text, re.MULTILINE)
+        edges = [
+            {"id": f"new_edge_{i}", "from": source, "to": target, "label": "relates to"}
+            for i, (source, target) in enumerate(zip(centrals, centrals[1:]), 1)
+        ]
+        return json.dumps({"nodes": [], "edges": edges})
+
+    if "Return ONLY the new nodes and edges" in user_text:
+        title = re.search(r"New Topic to Add: (.+)", user_text).group(1).strip()
+        additions = _graph_nodes(title, user_text.split("Existing mind map")[0], "new_")
+        existing = re.findall(r"^\s*(n\d+) \[C\]", user_text, re.MULTILINE)
+        if existing:
+            additions["edges"].append({"id": "new_link", "from": existing[0], "to": "new_1", "label": "relates to"})
+        return json.dumps(additions)
+
+    if "Current mind map (DO NOT LOSE ANY OF THIS):" in user_text:
+        title = re.search(r"New Topic to Add: (.+)", user_text).group(1).strip()
+        current = user_text.split("Current mind map (DO NOT LOSE ANY OF THIS):")[1].split("Your sequential enrichment task")[0]
+        graph = json.loads(current)
+        additions = _graph_nodes(title, user_text, f"t{len(graph['nodes'])}_")
+        graph["nodes"] += additions["nodes"]
+        graph["edges"] += additions["edges"]
+        return json.dumps(graph)
+
+    match = re.search(r"Topic: (.+)", user_text)
+    title = match.group(1).strip() if match else "Main Topic"
+    return json.dumps(_graph_nodes(title, user_text, "node_"))
+
+
+def mock_reply(messages: List[dict]) -> str:
+    """
+    Produce a plausible reply for the prompts used by the mind map pipeline:
+    slide summaries, topic extraction JSON and graph JSON.
+    """
+    system_text = " ".join(_text_of(m.get("content")) for m in messages if m.get("role") == "system")
+    user_text = "\n".join(_text_of(m.get("content")) for m in messages if m.get("role") == "user")
+
+    if "identifying main topics" in system_text:
+        return _topics_reply(user_text)
+    if "mind maps" in system_text:
+        return _graph_reply(user_text)
+    return f"Slide summary {uuid.uuid4().hex[:6]}: key concepts of the lecture such as transformers, attention and training."
+
+
+def _completion(model: str, content: str) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": len(content) // 4, "total_tokens": 100 + len(content) // 4},
+    }
+
+
+def _chunk(chunk_id: str, model: str, delta: dict, finish_reason: Optional[str] = None) -> str:
+    payload = {
+        "id": chunk_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+async def _stream_completion(model: str, content: str):
+    chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+    yield _chunk(chunk_id, model, {"role": "assistant", "content": ""})
+    for start in range(0, len(content), STREAM_CHUNK_CHARS):
+        yield _chunk(chunk_id, model, {"content": content[start:start + STREAM_CHUNK_CHARS]})
+        await asyncio.sleep(STREAM_CHUNK_MS / 1000)
+    yield _chunk(chunk_id, model, {}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.middleware("http")
+async def count_connections(request: Request, call_next):
+    if request.url.path.startswith("/v1/"):
+        _stats["requests"] += 1
+        if request.client:
+            _stats["connections"].add((request.client.host, request.client.port))
+    return await call_next(request)
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "gpt-4o", "object": "model"}, {"id": "gpt-4o-mini", "object": "model"}]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(max(0.0, random.gauss(LATENCY_MS, JITTER_MS)) / 1000)
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        return JSONResponse(status_code=500, content={"error": {"message": "Mock server error", "type": "server_error"}})
+    model = body.get("model", "gpt-4o")
+    content = mock_reply(body.get("messages", []))
+    if model == DEGRADED_MODEL and random.random() < DEGRADED_RATE:
+        content = content[:len(content) // 2]
+    if body.get("stream"):
+        return StreamingResponse(_stream_completion(model, content), media_type="text/event-stream")
+    return _completion(model, content)
+
+
+@app.get("/mock/stats")
+async def stats():
+    """
+    Requests served and distinct TCP connections seen (lower connections per request = better reuse).
+    """
+    return {
+        "requests": _stats["requests"],
+        "connections": len(_stats["connections"]),
+        "uptime_seconds": round(time.time() - _stats["started_at"], 1),
+    }
+
+
+def run(host: str = "127.0.0.1", port: int = 8100, log_level: Optional[str] = "warning") -> None:
+    import uvicorn
+    uvicorn.run(app, host=host, port=port, log_level=log_level)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+    print(f"Mock OpenAI API on http://{args.host}:{args.port}/v1 (set OPENAI_BASE_URL to use it)")
+    run(args.host, args.port)
@@ -0,0 +1,65 @@
+"""
+Processing worker of a multi-worker deployment (PROCESSING_MODE=queue).
+
+API workers only accept uploads and enqueue them in the shared store; processing
+workers claim the jobs, run the pipeline and store results and progress events
+for the API workers to return. Start as many as the LLM quota allows, on the
+same host or containers sharing the uploads, output and data volumes.
+
+Usage:
+    PROCESSING_MODE=queue python -m app.worker --concurrency 2
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+from app.core.config import settings
+from app.services.job_queue import ProcessingWorker
+from app.services.shared_store import SharedCallBudget, get_shared_store
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(worker: ProcessingWorker) -> None:
+    from app.langgraph.agents import warm_up
+    from app.langgraph.llm_client import close_http_client, warm_up_connections
+
+    # Stop cleanly on `docker stop` as on Ctrl+C
+    main_task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, main_task.cancel)
+
+    await asyncio.to_thread(warm_up)
+    await warm_up_connections()
+    try:
+        await worker.run_forever()
+    except asyncio.CancelledError:
+        logger.info("Worker stopping, running jobs will be retried by other workers")
+    finally:
+        await worker.shutdown()
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process queued uploads (PROCESSING_MODE=queue)")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY, help="Jobs processed at once")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    logging.getLogger(__name__).setLevel(logging.INFO)
+
+    store = get_shared_store()
+    if store is None:
+        print("Set PROCESSING_MODE=queue to run processing workers", file=sys.stderr)
+        sys.exit(1)
+
+    if settings.LLM_GLOBAL_CONCURRENCY:
+        from app.langgraph.llm_client import set_call_budget
+        set_call_budget(SharedCallBudget(store, settings.LLM_GLOBAL_CONCURRENCY))
+
+    try:
+        asyncio.run(run_worker(ProcessingWorker(store, args.concurrency)))
+    except KeyboardInterrupt:
+        pass
@@ -7,6 +7,7 @@ export const CONFIG = {
         UPLOAD_PDF: '/api/upload-pdf',
         DELETE_PDF: '/api/delete-pdf',
         GET_GRAPH: '/api/get-graph',
+        JOB_EVENTS: '/api/jobs',
     },
     
     // File Upload Configuration
@@ -145,72 +145,82 @@ export default function GraphPage() {
         const allExpanded = new Set(outerNodes.map(n => n.id));
         setExpandedNodes(allExpanded);
 
-        // Position outer nodes in a HORIZONTAL LINE
-        const totalWidth = 1600;
-        const startX = 200;
-        const spacing = totalWidth / (outerNodes.length + 1);
-        const outerY = 100; // Fixed Y position for all outer nodes
-
-        outerNodes.forEach((node, i) => {
-            node.position = {
-                x: startX + (i + 1) * spacing,
-                y: outerY
-            };
-        });
+        // Use the coordinates precomputed by the backend when every node has them
+        const hasServerLayout = graphData.nodes.length > 0 &&
+            graphData.nodes.every(n => typeof n.x === 'number' && typeof n.y === 'number');
+
+        if (hasServerLayout) {
+            graphData.nodes.forEach(node => {
+                node.position = { x: node.x, y: node.y };
+            });
+        } else {
+            // Position outer nodes in a HORIZONTAL LINE
+            const totalWidth = 1600;
+            const startX = 200;
+            const spacing = totalWidth / (outerNodes.length + 1);
+            const outerY = 100; // Fixed Y position for all outer nodes
 
-        // Position inner nodes with each parent's group at a DIFFERENT horizontal level
-        outerNodes.forEach((parent, parentIndex) => {
-            const siblings = innerNodes.filter(n => n.parent === parent.id);
+            outerNodes.forEach((node, i) => {
+                node.position = {
+                    x: startX + (i + 1) * spacing,
+                    y: outerY
+                };
+            });
+
+            // Position inner nodes with each parent's group at a DIFFERENT horizontal level
+            outerNodes.forEach((parent, parentIndex) => {
+                const siblings = innerNodes.filter(n => n.parent === parent.id);
             
-            if (siblings.length === 0) return;
+                if (siblings.length === 0) return;
             
-            // Sort siblings by connection count (most connected in center)
-            const siblingsWithConnections = siblings.map(node => ({
-                node,
-                connections: countConnections(node.id, graphData.edges, graphData.nodes)
-            }));
-            siblingsWithConnections.sort((a, b) => b.connections - a.connections);
+                // Sort siblings by connection count (most connected in center)
+                const siblingsWithConnections = siblings.map(node => ({
+                    node,
+                    connections: countConnections(node.id, graphData.edges, graphData.nodes)
+                }));
+                siblingsWithConnections.sort((a, b) => b.connections - a.connections);
             
-            const totalSiblings = siblings.length;
-            const horizontalSpread = Math.min(600, totalSiblings * 160); // Wider spread for horizontal layout
+                const totalSiblings = siblings.length;
+                const horizontalSpread = Math.min(600, totalSiblings * 160); // Wider spread for horizontal layout
             
-            // Each parent gets its own Y level (tier)
-            const tierHeight = 180; // Vertical spacing between tiers
-            const baseY = parent.position.y + 250 + (parentIndex * tierHeight);
+                // Each parent gets its own Y level (tier)
+                const tierHeight = 180; // Vertical spacing between tiers
+                const baseY = parent.position.y + 250 + (parentIndex * tierHeight);
             
-            if (totalSiblings === 1) {
-                // Single node centered horizontally on its tier
-                siblings[0].position = {
-                    x: parent.position.x,
-                    y: baseY
-                };
-            } else if (totalSiblings === 2) {
-                // Two nodes side by side on the same tier
-                siblings[0].position = {
-                    x: parent.position.x - 120,
-                    y: baseY
-                };
-                siblings[1].position = {
-                    x: parent.position.x + 120,
-                    y: baseY
-                };
-            } else {
-                // Multiple nodes: spread horizontally across the full tier
-                siblingsWithConnections.forEach((item, idx) => {
-                    // Distribute evenly across the horizontal space
-                    const xPosition = parent.position.x - horizontalSpread / 2 + 
-                                    (idx / (totalSiblings - 1)) * horizontalSpread;
+                if (totalSiblings === 1) {
+                    // Single node centered horizontally on its tier
+                    siblings[0].position = {
+                        x: parent.position.x,
+                        y: baseY
+                    };
+                } else if (totalSiblings === 2) {
+                    // Two nodes side by side on the same tier
+                    siblings[0].position = {
+                        x: parent.position.x - 120,
+                        y: baseY
+                    };
+                    siblings[1].position = {
+                        x: parent.position.x + 120,
+                        y: baseY
+                    };
+                } else {
+                    // Multiple nodes: spread horizontally across the full tier
+                    siblingsWithConnections.forEach((item, idx) => {
+                        // Distribute evenly across the horizontal space
+                        const xPosition = parent.position.x - horizontalSpread / 2 + 
+                                        (idx / (totalSiblings - 1)) * horizontalSpread;
                     
-                    // Small vertical variation for organic look (within the tier)
-                    const verticalJitter = (idx % 3) * 12 - 12; // -12, 0, or 12
+                        // Small vertical variation for organic look (within the tier)
+                        const verticalJitter = (idx % 3) * 12 - 12; // -12, 0, or 12
                     
-                    item.node.position = {
-                        x: xPosition,
-                        y: baseY + verticalJitter
-                    };
-                });
-            }
-        });
+                        item.node.position = {
+                            x: xPosition,
+                            y: baseY + verticalJitter
+                        };
+                    });
+                }
+            });
+        }
 
         // Assign colors to outer nodes
         const parentColorMap = {};
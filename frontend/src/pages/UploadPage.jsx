@@ -9,6 +9,7 @@ export default function UploadPage() {
     const [isDragging, setIsDragging] = useState(false);
     const [isUploading, setIsUploading] = useState(false);
     const [response, setResponse] = useState(null);
+    const [progress, setProgress] = useState('');
     const navigate = useNavigate();
 
     const formatFileSize = (bytes) => {
@@ -77,9 +78,32 @@ export default function UploadPage() {
 
         setIsUploading(true);
         setResponse(null);
+        setProgress('');
+
+        // Follow progress while the upload request is being processed
+        const jobId = `job_${crypto.randomUUID().replace(/-/g, '').slice(0, 16)}`;
+        let totalPages = 0;
+        let pagesDone = 0;
+        let nodeCount = 0;
+        const unsubscribe = apiService.subscribeToJob(jobId, (type, data) => {
+            if (type === 'pages_started') {
+                totalPages = data.total_pages;
+                setProgress(`Summarizing pages 0/${totalPages}...`);
+            } else if (type === 'page_summary') {
+                pagesDone += 1;
+                setProgress(`Summarizing pages ${pagesDone}/${totalPages}...`);
+            } else if (type === 'topics') {
+                setProgress(`Found ${data.topics.length} topics, building graph...`);
+            } else if (type === 'graph_delta') {
+                nodeCount += data.added_nodes.length - data.removed_nodes.length;
+                // total_topics is null while topics are still being segmented (progressive pipeline)
+                const topicProgress = data.total_topics ? `${data.topic_index}/${data.total_topics}` : `${data.topic_index}`;
+                setProgress(`Building graph: topic ${topicProgress} (${nodeCount} nodes)`);
+            }
+        });
 
         try {
-            const result = await apiService.uploadPDF(selectedFile);
+            const result = await apiService.uploadPDF(selectedFile, undefined, jobId);
 
             if (result.success) {
                 // Extract graph data from processing_result
@@ -127,6 +151,8 @@ export default function UploadPage() {
                 content: error.message
             });
         } finally {
+            unsubscribe();
+            setProgress('');
             setIsUploading(false);
         }
     };
@@ -184,7 +210,7 @@ export default function UploadPage() {
                     {isUploading ? (
                         <>
                             <span className="loader"></span>
-                            <span>Uploading...</span>
+                            <span>{progress || 'Uploading...'}</span>
                         </>
                     ) : (
                         <span>Upload PDF</span>
@@ -6,12 +6,13 @@ class APIService {
         this.baseURL = baseURL;
     }
 
-    async uploadPDF(file, endpoint = CONFIG.API_ENDPOINTS.UPLOAD_PDF) {
+    async uploadPDF(file, endpoint = CONFIG.API_ENDPOINTS.UPLOAD_PDF, jobId = null) {
         const formData = new FormData();
         formData.append('file', file);
+        const query = jobId ? `?job_id=${encodeURIComponent(jobId)}` : '';
 
         try {
-            const response = await fetch(`${this.baseURL}${endpoint}`, {
+            const response = await fetch(`${this.baseURL}${endpoint}${query}`, {
                 method: 'POST',
                 body: formData,
             });
@@ -82,6 +83,25 @@ class APIService {
         }
     }
 
+    // Follow a job's progress events (Server-Sent Events). Returns a function that stops listening.
+    subscribeToJob(jobId, onEvent) {
+        const source = new EventSource(
+            `${this.baseURL}${CONFIG.API_ENDPOINTS.JOB_EVENTS}/${encodeURIComponent(jobId)}/events`
+        );
+        const eventTypes = ['pages_started', 'page_summary', 'topics', 'graph_delta', 'completed', 'failed'];
+
+        eventTypes.forEach(type => {
+            source.addEventListener(type, (event) => {
+                onEvent(type, JSON.parse(event.data));
+                if (type === 'completed' || type === 'failed') {
+                    source.close();
+                }
+            });
+        });
+
+        return () => source.close();
+    }
+
     setBaseURL(url) {
         this.baseURL = url;
     }
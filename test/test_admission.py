@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.admission import AdmissionController, AdmissionRejectedError
+from app.services.shared_store import SharedStore
+
+
+def _preflight(calls: int, seconds: float = 10.0, pages: int = 5) -> dict:
+    return {
+        "analysis": {"total_pages": pages},
+        "estimate": {"llm_calls": calls, "cost_usd": 0.01, "duration_p90_seconds": seconds},
+    }
+
+
+def test_queued_job_is_admitted_when_calls_are_released():
+    async def run():
+        controller = AdmissionController(max_inflight_calls=10, max_wait_seconds=30)
+        first = await controller.acquire("a", _preflight(8, seconds=20))
+        assert controller.decide(_preflight(2))["decision"] == "admit"
+        decision = controller.decide(_preflight(5))
+        assert decision["decision"] == "queue"
+        assert 19 < decision["predicted_wait_seconds"] <= 20
+
+        queued = asyncio.ensure_future(controller.acquire("b", _preflight(5)))
+        await asyncio.sleep(0)
+        assert controller.snapshot()["queued_jobs"] == [{"job_id": "b", "llm_calls": 5}]
+        controller.release(first)
+        second = await asyncio.wait_for(queued, 1)
+        assert controller.snapshot()["inflight_calls"] == 5
+        controller.release(second)
+        return controller
+
+    controller = asyncio.run(run())
+
+    assert controller.snapshot()["inflight_calls"] == 0
+
+
+def test_jobs_are_rejected_over_the_wait_or_page_limits(monkeypatch):
+    async def run():
+        controller = AdmissionController(max_inflight_calls=10, max_wait_seconds=30)
+        await controller.acquire("a", _preflight(8, seconds=60))
+        with pytest.raises(AdmissionRejectedError) as busy:
+            await controller.acquire("b", _preflight(5))
+        return busy.value, controller
+
+    busy, controller = asyncio.run(run())
+
+    assert busy.reason == "server_busy" and busy.retry_after > 30
+    monkeypatch.setattr(settings, "PDF_MAX_PAGES", 10)
+    assert controller.decide(_preflight(1, pages=11))["reason"] == "too_many_pages"
+
+
+def test_queue_mode_counts_jobs_admitted_by_other_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_DISCONNECT_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "LLM_GLOBAL_CONCURRENCY", 3)
+    store = SharedStore(str(tmp_path / "shared.sqlite3"))
+    # A job admitted by another API process, waiting for a processing worker
+    store.enqueue("other", {"admission": {"llm_calls": 20, "predicted_seconds": 30.0, "admitted_at": time.time()}})
+
+    async def run():
+        controller = AdmissionController(store=store)
+        assert controller.max_inflight_calls == 24
+        queued = asyncio.ensure_future(controller.acquire("mine", _preflight(10)))
+        await asyncio.sleep(0.05)
+        assert not queued.done()
+        assert controller.snapshot()["inflight_calls"] == 20
+
+        store.claim("worker", 30.0, max_attempts=3)
+        store.finish("other", "done", {})
+        ticket = await asyncio.wait_for(queued, 1)
+        return controller, ticket
+
+    controller, ticket = asyncio.run(run())
+
+    assert ticket.payload()["llm_calls"] == 10
+    assert controller.snapshot()["inflight_calls"] == 10
@@ -0,0 +1,62 @@
+import pytest
+
+from app.core.config import settings
+from app.services import deadline as deadline_module
+from app.services.deadline import estimate_seconds, job_deadline, plan_pages, sample_pages
+
+
+@pytest.fixture
+def one_second_calls(monkeypatch):
+    monkeypatch.setattr(deadline_module, "estimated_call_seconds", lambda: 1.0)
+    monkeypatch.setattr(settings, "DEADLINE_SAFETY_MARGIN", 0.0)
+    monkeypatch.setattr(settings, "DEADLINE_MIN_PAGES", 4)
+
+
+def _plan(seconds: float, nb_pages: int = 40, concurrency: int = 4):
+    with job_deadline(seconds) as deadline:
+        pages, low_res = plan_pages(nb_pages, concurrency)
+    return pages, low_res, deadline
+
+
+def test_sampled_pages_are_spread_over_the_deck():
+    assert sample_pages(10, 4) == [1, 4, 7, 10]
+    assert sample_pages(3, 5) == [1, 2, 3]
+    assert sample_pages(10, 1) == [1]
+
+
+def test_estimate_follows_the_pipeline_shape():
+    # 40 pages in waves of 4 calls, then topic extraction and 10 graph steps
+    assert estimate_seconds(40, 4, 1.0) == 10 + 1 + 10
+    assert estimate_seconds(40, 4, 1.0, parallel=True) == 10 + 1 + 3 + 1
+    assert estimate_seconds(40, 4, 1.0, low_res=True, parallel=True) == pytest.approx(8 + 1 + 3 + 1)
+    assert estimate_seconds(40, 4, 1.0, graph_overlaps=True) == max(10, 2 + 10) + 1
+
+
+def test_no_deadline_or_enough_time_keeps_everything(one_second_calls):
+    assert plan_pages(40, 4) == (list(range(1, 41)), False)
+
+    pages, low_res, deadline = _plan(30)
+
+    assert (len(pages), low_res, deadline.degradations) == (40, False, [])
+
+
+def test_degradations_are_applied_in_order(one_second_calls):
+    _, low_res, deadline = _plan(18)
+    assert (low_res, deadline.degradations) == (False, ["parallel_graph"])
+
+    pages, low_res, deadline = _plan(14)
+    assert (len(pages), low_res, deadline.degradations) == (40, True, ["parallel_graph", "reduced_resolution"])
+
+    pages, low_res, deadline = _plan(9)
+    assert pages == sample_pages(40, 24)
+    assert deadline.degradations == ["parallel_graph", "reduced_resolution", "sampled_pages"]
+    assert deadline.details["sampled_pages"] == {"pages": 24, "total_pages": 40}
+
+
+def test_sampling_keeps_a_minimum_of_pages(one_second_calls):
+    pages, _, deadline = _plan(0.5)
+
+    assert pages == sample_pages(40, settings.DEADLINE_MIN_PAGES)
+    summary = deadline.summary()
+    assert summary["deadline_seconds"] == 0.5
+    assert summary["degradations"][-1] == "sampled_pages"
@@ -0,0 +1,38 @@
+import json
+import os
+
+from app.utils.export_format import SectionedExport, is_sectioned_export, write_sectioned_export
+from app.utils.export_utils import convert_export, load_exported_output
+
+EXPORT = {
+    "metadata": {"thread_id": "abc_def", "total_pages": 2},
+    "processing_results": {
+        "page_summaries": [{"page_number": 1, "summary": "Intro é"}, {"page_number": 2, "summary": "Details"}],
+        "topics": [{"topic_title": "Intro", "slide_numbers": [1, 2]}],
+        "final_graph": {"nodes": [{"id": "n1", "title": "Intro", "type": "central"}], "edges": []},
+    },
+}
+
+
+def test_round_trip(tmp_path):
+    path = write_sectioned_export(EXPORT, str(tmp_path / "out.mmx"))
+
+    export = SectionedExport(path)
+
+    assert is_sectioned_export(path)
+    assert export.to_dict() == EXPORT
+    assert export["processing_results"]["final_graph"] == EXPORT["processing_results"]["final_graph"]
+    assert sorted(export["processing_results"]) == sorted(EXPORT["processing_results"])
+
+
+def test_json_exports_convert_to_the_same_content(tmp_path):
+    json_path = tmp_path / "system_output_abc_def_20240101_120000.json"
+    json_path.write_text(json.dumps(EXPORT), encoding="utf-8")
+    os.utime(json_path, (1_000_000, 1_000_000))
+
+    mmx_path = convert_export(str(json_path), remove_source=True)
+
+    assert not json_path.exists()
+    assert os.path.getmtime(mmx_path) == 1_000_000
+    assert load_exported_output(mmx_path).to_dict() == EXPORT
+
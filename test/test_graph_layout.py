@@ -0,0 +1,55 @@
+import math
+
+from app.services.graph_layout import IDEAL_EDGE_LENGTH, attach_layout, compute_layout, layout_of
+
+
+def _graph(subnodes: int) -> dict:
+    nodes = [{"id": "c", "title": "Center", "type": "central"}]
+    edges = []
+    for i in range(subnodes):
+        nodes.append({"id": f"s{i}", "title": f"Sub {i}", "type": "subnode"})
+        edges.append({"id": f"e{i}", "from": "c", "to": f"s{i}", "label": "includes"})
+    return {"nodes": nodes, "edges": edges}
+
+
+def _distance(a: dict, b: dict) -> float:
+    return math.hypot(a["x"] - b["x"], a["y"] - b["y"])
+
+
+def test_every_node_is_placed_without_overlaps():
+    layout = compute_layout(_graph(12))
+
+    assert set(layout) == {"c"} | {f"s{i}" for i in range(12)}
+    positions = list(layout.values())
+    closest = min(_distance(a, b) for i, a in enumerate(positions) for b in positions[i + 1:])
+    assert closest > IDEAL_EDGE_LENGTH / 10
+
+
+def test_layout_is_deterministic():
+    assert compute_layout(_graph(8)) == compute_layout(_graph(8))
+
+
+def test_incremental_layout_keeps_known_nodes_close():
+    before = compute_layout(_graph(8))
+
+    after = compute_layout(_graph(9), previous=before)
+
+    assert "s8" in after
+    moved = max(_distance(before[node_id], after[node_id]) for node_id in before)
+    assert moved < IDEAL_EDGE_LENGTH / 2
+
+
+def test_empty_graph_and_attach_layout():
+    assert compute_layout({"nodes": [], "edges": []}) == {}
+
+    graph = attach_layout(_graph(1), {"c": {"x": 1.0, "y": 2.0}})
+
+    assert graph["nodes"][0] == {"id": "c", "title": "Center", "type": "central", "x": 1.0, "y": 2.0}
+    assert "x" not in graph["nodes"][1]
+
+
+def test_layout_of_a_laid_out_graph():
+    layout = compute_layout(_graph(3), previous={"c": {"x": 5.0, "y": 5.0}})
+
+    assert layout_of(attach_layout(_graph(3), layout)) == layout
+    assert layout_of(_graph(3)) == compute_layout(_graph(3))
@@ -0,0 +1,74 @@
+from app.services.graph_merger import KnowledgeGraphStore
+
+
+def _graph(*titles: str) -> dict:
+    nodes = [{"id": f"n{i}", "title": title, "type": "central" if i == 0 else "subnode"} for i, title in enumerate(titles)]
+    edges = [{"id": f"e{i}", "from": "n0", "to": f"n{i}", "label": "includes"} for i in range(1, len(titles))]
+    return {"nodes": nodes, "edges": edges}
+
+
+def test_equal_titles_are_deduplicated():
+    store = KnowledgeGraphStore()
+    store.merge_graph(_graph("Neural Networks", "Backpropagation"), "doc1")
+
+    stats = store.merge_graph(_graph("neural networks", "Convolution"), "doc2")
+
+    assert stats["nodes_deduplicated"] == 1
+    assert stats["nodes_added"] == 1
+    merged = next(n for n in store.nodes.values() if n["title"] == "Neural Networks")
+    assert merged["sources"] == ["doc1", "doc2"]
+
+
+def test_similar_nodes_of_other_documents_are_cross_linked():
+    store = KnowledgeGraphStore(link_threshold=0.5)
+    store.merge_graph(_graph("Deep Learning", "Gradient Descent Tricks"), "doc1")
+
+    # The new node's siblings rank above the other document's node and must not hide it
+    siblings = [f"Stochastic Gradient Descent {word}" for word in ("Momentum", "Schedule", "Variant", "Batch", "Proof")]
+    stats = store.merge_graph(_graph("Optimization", "Stochastic Gradient Descent", *siblings), "doc2")
+
+    assert stats["cross_links_added"] == 1
+    linked = next(e for e in store.edges.values() if e["label"] == "relates to")
+    assert {store.nodes[linked["from"]]["title"], store.nodes[linked["to"]]["title"]} == {
+        "Stochastic Gradient Descent", "Gradient Descent Tricks"
+    }
+
+
+def test_journal_is_replayed(tmp_path):
+    journal = str(tmp_path / "kg.jsonl")
+    store = KnowledgeGraphStore(journal)
+    store.merge_graph(_graph("Databases", "Indexes"), "doc1")
+    store.merge_graph(_graph("Databases", "Transactions"), "doc2")
+
+    reloaded = KnowledgeGraphStore(journal)
+
+    assert reloaded.to_graph() == store.to_graph()
+    assert set(reloaded.documents) == {"doc1", "doc2"}
+    stats = reloaded.merge_graph(_graph("Caching"), "doc3")
+    assert set(reloaded.nodes) - set(store.nodes) == {f"kg_{len(store.nodes) + 1}"}
+    assert stats["nodes_added"] == 1
+
+
+def test_processes_sharing_a_journal_do_not_reuse_ids(tmp_path):
+    journal = str(tmp_path / "kg.jsonl")
+    first, second = KnowledgeGraphStore(journal), KnowledgeGraphStore(journal)
+
+    first.merge_graph(_graph("Attention"), "docA")
+    second.merge_graph(_graph("Gradient Descent"), "docB")
+
+    assert {n["title"] for n in first.to_graph()["nodes"]} == {"Attention", "Gradient Descent"}
+    reloaded = KnowledgeGraphStore(journal)
+    assert {n["id"]: n["title"] for n in reloaded.to_graph()["nodes"]} == {"kg_1": "Attention", "kg_2": "Gradient Descent"}
+
+
+def test_cross_links_skip_the_document_own_nodes():
+    store = KnowledgeGraphStore(link_threshold=0.5, max_links_per_node=1)
+    store.merge_graph(_graph("Learning Theory"), "doc1")
+    store.merge_graph(_graph("Learning Rates"), "doc2")
+
+    stats = store.merge_graph(_graph("Learning", "Learning Curves"), "doc3")
+
+    # "Learning" matches its sibling best, but is linked to another document's node
+    assert stats["cross_links_added"] == 1
+    linked = next(e for e in store.edges.values() if e["label"] == "relates to")
+    assert store.nodes[linked["to"]]["sources"] in (["doc1"], ["doc2"])
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.langgraph import llm_client
+from app.services.jobs import JobAlreadyRunningError, JobCancelledError, RunningJobs
+from app.services.scheduler import JobContext, LLMScheduler
+
+
+class _HangingModel:
+    model_name = "hanging"
+
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def ainvoke(self, messages, **kwargs):
+        self.started.set()
+        await asyncio.sleep(3600)
+
+
+def test_cancelled_job_raises_with_its_reason():
+    async def run():
+        jobs = RunningJobs()
+        task = asyncio.ensure_future(jobs.run("job", asyncio.sleep(3600), source="a.pdf"))
+        await asyncio.sleep(0)
+        assert jobs.is_running("job")
+        assert jobs.cancel_source("other.pdf") == []
+        assert jobs.cancel_source("a.pdf") == ["job"]
+        with pytest.raises(JobCancelledError) as error:
+            await task
+        return jobs, error.value
+
+    jobs, error = asyncio.run(run())
+
+    assert error.reason == "file_deleted"
+    assert not jobs.is_running("job")
+
+
+def test_job_ids_cannot_run_twice():
+    async def run():
+        jobs = RunningJobs()
+        first = asyncio.ensure_future(jobs.run("job", asyncio.sleep(0.01, result="done")))
+        await asyncio.sleep(0)
+        with pytest.raises(JobAlreadyRunningError):
+            await jobs.run("job", asyncio.sleep(0))
+        return await first
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_disconnected_client_cancels_its_job(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_DISCONNECT_POLL_SECONDS", 0.01)
+
+    async def disconnected():
+        return True
+
+    async def run():
+        with pytest.raises(JobCancelledError) as error:
+            await RunningJobs().run("job", asyncio.sleep(3600), is_disconnected=disconnected)
+        return error.value.reason
+
+    assert asyncio.run(run()) == "client_disconnected"
+
+
+def test_cancelling_frees_scheduler_slots_and_skips_queued_work(monkeypatch):
+    scheduler = LLMScheduler(capacity=1)
+    monkeypatch.setattr(llm_client, "get_scheduler", lambda: scheduler)
+    built = []
+
+    async def build_messages():
+        built.append(True)
+        return []
+
+    async def job(model):
+        await asyncio.gather(llm_client.invoke_llm([], model=model), llm_client.invoke_llm(build_messages, model=model))
+
+    async def run():
+        jobs, model = RunningJobs(), _HangingModel()
+        task = asyncio.ensure_future(jobs.run("job", job(model)))
+        await asyncio.wait_for(model.started.wait(), 1)
+        # One call is in flight, the other waits for the slot without having built its messages
+        assert scheduler.in_use == 1
+        jobs.cancel("job")
+        with pytest.raises(JobCancelledError):
+            await task
+        # The freed slot is immediately available to other jobs
+        other = await asyncio.wait_for(scheduler.acquire(JobContext("other")), 1)
+        scheduler.release(other)
+
+    asyncio.run(run())
+
+    assert scheduler.in_use == 0
+    assert built == []
@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.langgraph import model_router
+from app.langgraph.model_router import choose_model, invoke_routed, page_complexity_score
+from app.langgraph.structured_output import JSONItemStream
+from app.services.deadline import job_deadline
+
+
+def _route(monkeypatch, replies: dict, **kwargs):
+    """
+    Run invoke_routed with a small model configured and fake LLM replies per model
+    (exceptions are raised), and return the response and the models called.
+    """
+    monkeypatch.setattr(settings, "LLM_SMALL_MODEL", "small")
+    monkeypatch.setattr(settings, "LLM_MODEL", "large")
+    monkeypatch.setattr(model_router, "get_chat_model", lambda name: name)
+    calls = []
+
+    async def fake_invoke(messages, model, on_chunk=None, **_):
+        calls.append(model)
+        reply = replies[model]
+        if isinstance(reply, Exception):
+            raise reply
+        if on_chunk is not None:
+            on_chunk(reply)
+        return SimpleNamespace(content=reply, usage_metadata={"output_tokens": 1})
+
+    monkeypatch.setattr(model_router, "invoke_llm", fake_invoke)
+    return asyncio.run(invoke_routed([], "topics", **kwargs)), calls
+
+
+def test_visual_pages_score_above_text_pages():
+    text_page = page_complexity_score({"text_chars": 600, "images": 0, "drawings": 0})
+    figure_page = page_complexity_score({"text_chars": 200, "images": 3, "drawings": 0})
+
+    assert 0 < text_page < figure_page <= 1
+    assert page_complexity_score({"text_chars": 10 ** 6, "images": 100, "drawings": 10 ** 4}) == 1.0
+
+
+def test_small_model_is_used_below_the_threshold(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_SMALL_MODEL", None)
+    assert choose_model(0.0) == settings.LLM_MODEL
+
+    monkeypatch.setattr(settings, "LLM_SMALL_MODEL", "small")
+    monkeypatch.setattr(settings, "LLM_ROUTING_THRESHOLD", 0.35)
+    assert choose_model(0.1) == "small"
+    assert choose_model(0.35) == settings.LLM_MODEL
+
+
+def test_invalid_small_model_output_is_escalated(monkeypatch):
+    items = []
+    stream = JSONItemStream(lambda key, item: items.append(item["title"]))
+    replies = {"small": '{"topics": [{"title": "Bad"}]}', "large": '{"topics": [{"title": "Good"}]}'}
+
+    response, calls = _route(monkeypatch, replies, score=0.0, validate=lambda text: "Good" in text, stream=stream)
+
+    assert calls == ["small", "large"]
+    assert response.content == replies["large"]
+    # Items of the rejected reply were held back and dropped
+    assert items == ["Good"]
+
+
+def test_failed_small_model_call_is_escalated(monkeypatch):
+    response, calls = _route(monkeypatch, {"small": RuntimeError("boom"), "large": "ok"}, score=0.0)
+
+    assert calls == ["small", "large"]
+    assert response.content == "ok"
+
+
+def test_valid_small_model_output_releases_held_items(monkeypatch):
+    items = []
+    stream = JSONItemStream(lambda key, item: items.append(item["title"]))
+
+    _, calls = _route(monkeypatch, {"small": '{"topics": [{"title": "A"}]}'}, score=0.0, validate=lambda text: True, stream=stream)
+
+    assert calls == ["small"]
+    assert items == ["A"]
+
+
+def test_escalation_is_skipped_without_time_left(monkeypatch):
+    with job_deadline(0.001) as deadline:
+        response, calls = _route(monkeypatch, {"small": "bad"}, score=0.0, validate=lambda text: False)
+
+    assert calls == ["small"]
+    assert response.content == "bad"
+    assert deadline.applied("skipped_escalation")
@@ -0,0 +1,46 @@
+import fitz
+import pytest
+
+from app.services import preflight as preflight_module
+from app.services.preflight import InvalidPDFError, calibration_percentile, preflight, vision_tokens
+from app.services.shared_store import SharedStore
+
+
+def _pdf(*texts: str) -> bytes:
+    document = fitz.open()
+    for text in texts:
+        page = document.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def test_pages_are_classified_and_repeats_detected():
+    result = preflight(_pdf("Gradient descent", "Gradient  descent", ""))
+
+    analysis = result["analysis"]
+    assert analysis["total_pages"] == 3
+    assert analysis["page_kinds"] == {"text": 2, "image": 0, "mixed": 0, "blank": 1}
+    assert analysis["duplicate_pages"] == [2]
+    assert analysis["vision_tokens"] == 3 * vision_tokens(595, 842)
+    # Page summaries, topic extraction and one graph step
+    assert result["estimate"]["llm_calls"] == 3 + 1 + 1
+    assert result["estimate"]["duration_p90_seconds"] >= result["estimate"]["duration_seconds"] > 0
+
+
+def test_invalid_pdf_is_rejected():
+    with pytest.raises(InvalidPDFError):
+        preflight(b"not a pdf")
+
+
+def test_queue_mode_calibrates_on_shared_samples(tmp_path, monkeypatch):
+    store = SharedStore(str(tmp_path / "shared.sqlite3"))
+    monkeypatch.setattr(preflight_module, "get_shared_store", lambda: store)
+    assert calibration_percentile("llm_call_seconds", 0.5, model="m") is None
+
+    store.add_samples([("llm_call_seconds", {"model": "m"}, float(value)) for value in range(1, 6)])
+
+    assert calibration_percentile("llm_call_seconds", 0.5, model="m") == 3.0
+    assert calibration_percentile("llm_call_seconds", 1.0, model="m") == 5.0
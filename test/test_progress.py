@@ -0,0 +1,84 @@
+import asyncio
+
+from app.services.progress import JobEventBroker, format_sse, graph_delta
+
+
+def _collect(broker: JobEventBroker, job_id: str, last_seq: int = 0, **kwargs) -> list:
+    async def run():
+        return [m for m in [m async for m in broker.subscribe(job_id, last_seq, **kwargs)] if m is not None]
+
+    return asyncio.run(run())
+
+
+def test_late_subscriber_replays_history_until_terminal_event():
+    broker = JobEventBroker()
+    broker.publish("job", "page_summary", {"page_number": 1})
+    broker.publish("job", "completed", {})
+    broker.publish("job", "page_summary", {"page_number": 2})
+
+    messages = _collect(broker, "job")
+
+    assert [(m["seq"], m["event"]) for m in messages] == [(1, "page_summary"), (2, "completed")]
+
+
+def test_resume_from_last_event_id():
+    broker = JobEventBroker()
+    for page in (1, 2, 3):
+        broker.publish("job", "page_summary", {"page_number": page})
+    broker.publish("job", "completed", {})
+
+    messages = _collect(broker, "job", last_seq=2)
+
+    assert [m["seq"] for m in messages] == [3, 4]
+
+
+def test_live_events_reach_subscribers():
+    async def run():
+        broker = JobEventBroker()
+        received = []
+
+        async def listen():
+            async for message in broker.subscribe("job"):
+                received.append(message["event"])
+
+        listener = asyncio.ensure_future(listen())
+        await asyncio.sleep(0)
+        broker.publish("job", "topic", {"topic_title": "A"})
+        broker.publish("job", "failed", {})
+        await asyncio.wait_for(listener, 1)
+        return received
+
+    assert asyncio.run(run()) == ["topic", "failed"]
+
+
+def test_stream_of_unknown_job_ends_and_channel_expires():
+    broker = JobEventBroker()
+
+    assert _collect(broker, "unknown", heartbeat=0.01, start_timeout=0.05) == []
+    assert "unknown" not in broker._channels
+
+
+def test_reused_job_id_does_not_replay_the_previous_job():
+    broker = JobEventBroker()
+    broker.publish("job", "page_summary", {})
+    broker.publish("job", "completed", {})
+
+    broker.reset("job")
+    broker.publish("job", "queued", {})
+    broker.publish("job", "cancelled", {})
+
+    assert [(m["seq"], m["event"]) for m in _collect(broker, "job")] == [(3, "queued"), (4, "cancelled")]
+
+
+def test_graph_delta_and_sse_frame():
+    previous = {"nodes": [{"id": "a", "title": "A"}, {"id": "b", "title": "B"}], "edges": []}
+    current = {"nodes": [{"id": "a", "title": "A2"}], "edges": [{"id": "e", "from": "a", "to": "a"}]}
+
+    delta = graph_delta(previous, current)
+
+    assert delta == {
+        "added_nodes": [{"id": "a", "title": "A2"}], "removed_nodes": ["b"],
+        "added_edges": [{"id": "e", "from": "a", "to": "a"}], "removed_edges": [],
+    }
+    assert format_sse({"seq": 3, "event": "topic", "data": {"t": "é"}}) == 'id: 3\nevent: topic\ndata: {"t": "é"}\n\n'
+    assert format_sse(None) == ": keep-alive\n\n"
@@ -0,0 +1,67 @@
+from app.langgraph.prompt_budget import apply_graph_additions, build_enrichment_prompt, compact_graph
+
+
+def _graph(subnodes: int) -> dict:
+    nodes = [{"id": "root", "title": "Machine Learning", "type": "central"}]
+    edges = []
+    for i in range(subnodes):
+        nodes.append({"id": f"s{i}", "title": f"Subtopic {i} about gradient descent variants", "type": "subnode"})
+        edges.append({"id": f"e{i}", "from": "root", "to": f"s{i}", "label": "includes"})
+    nodes.append({"id": "rl", "title": "Reinforcement Learning Policies", "type": "subnode"})
+    edges.append({"id": "e_rl", "from": "root", "to": "rl", "label": "includes"})
+    return {"nodes": nodes, "edges": edges}
+
+
+SUMMARIES = ["Policies are learned from rewards in reinforcement learning"]
+
+
+def test_compact_graph_uses_short_ids():
+    text, id_map = compact_graph(_graph(1))
+
+    assert text.splitlines()[0] == "n1 [C] Machine Learning -> n2 (includes), n3 (includes)"
+    assert id_map == {"n1": "root", "n2": "s0", "n3": "rl"}
+
+
+def test_small_graph_is_included_whole():
+    graph = _graph(3)
+
+    _, id_map, stats = build_enrichment_prompt("Reinforcement Learning", SUMMARIES, graph, token_budget=10000)
+
+    assert stats["nodes_included"] == stats["nodes_total"] == len(graph["nodes"])
+    assert stats["prompt_tokens"] < stats["full_prompt_tokens"]
+
+
+def test_large_graph_keeps_the_most_relevant_nodes_within_budget():
+    graph = _graph(200)
+    budget = 600
+
+    prompt, id_map, stats = build_enrichment_prompt("Reinforcement Learning", SUMMARIES, graph, token_budget=budget)
+
+    assert stats["prompt_tokens"] <= budget
+    assert 2 <= stats["nodes_included"] < stats["nodes_total"]
+    assert {"root", "rl"} <= set(id_map.values())
+    assert "Reinforcement Learning Policies" in prompt
+
+
+def test_central_nodes_are_kept_over_budget():
+    graph = _graph(20)
+
+    _, id_map, stats = build_enrichment_prompt("Reinforcement Learning", SUMMARIES, graph, token_budget=10)
+
+    assert "root" in id_map.values()
+    assert stats["prompt_tokens"] > 10
+
+
+def test_additions_map_short_ids_back():
+    _, id_map, _ = build_enrichment_prompt("Reinforcement Learning", SUMMARIES, _graph(2), token_budget=10000)
+    additions = {
+        "nodes": [{"id": "new1", "title": "Q-Learning", "type": "subnode"}, {"id": "n2", "title": "Renamed"}],
+        "edges": [{"from": "n4", "to": "new1", "label": "includes"}],
+    }
+
+    graph = apply_graph_additions(_graph(2), additions, id_map)
+
+    new_node = next(n for n in graph["nodes"] if n["title"] == "Q-Learning")
+    assert new_node["id"] not in id_map.values()
+    assert len(graph["nodes"]) == len(_graph(2)["nodes"]) + 1
+    assert {"from": "rl", "to": new_node["id"], "label": "includes"} == {k: v for k, v in graph["edges"][-1].items() if k != "id"}
@@ -0,0 +1,72 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import FastJSONResponse, shape_processing_result
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.models import ResponseView
+
+RESULT = {
+    "metadata": {"thread_id": "t1", "export_file_path": "output/system_output_t1_20240101_000000.mmx"},
+    "graph": {"nodes": [{"id": "n1", "title": "A", "type": "central"}], "edges": []},
+    "topics": [{"topic_title": "A", "slide_numbers": [1], "summaries": ["long summary"]}],
+}
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, path_prefix="/api")
+
+    @app.get("/api/large")
+    async def large():
+        return FastJSONResponse({"nodes": [{"id": f"n{i}", "title": "Node title"} for i in range(200)]})
+
+    @app.get("/api/small")
+    async def small():
+        return FastJSONResponse({"ok": True})
+
+    @app.get("/api/stream")
+    async def stream():
+        return StreamingResponse(iter([b"data: 1\n\n"] * 200), media_type="text/event-stream")
+
+    @app.get("/page")
+    async def page():
+        return PlainTextResponse("x" * 5000)
+
+    return TestClient(app)
+
+
+def test_views_select_sections():
+    assert set(shape_processing_result(RESULT, ResponseView.full)) == {"metadata", "graph", "topics"}
+    assert set(shape_processing_result(RESULT, ResponseView.graph)) == {"metadata", "graph"}
+    assert set(shape_processing_result(RESULT, ResponseView.metadata)) == {"metadata"}
+
+    shaped = shape_processing_result(RESULT, ResponseView.topics, include_summaries=False)
+
+    assert shaped["topics"] == [{"topic_title": "A", "slide_numbers": [1]}]
+    assert shaped["metadata"]["export_file_path"] == "system_output_t1_20240101_000000.mmx"
+    assert RESULT["topics"][0]["summaries"] == ["long summary"]
+
+
+def test_large_api_responses_are_compressed():
+    response = _client().get("/api/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json()["nodes"][199]["id"] == "n199"
+
+
+def test_small_streaming_and_non_api_responses_are_not_compressed():
+    client = _client()
+    headers = {"Accept-Encoding": "gzip"}
+
+    assert "content-encoding" not in client.get("/api/small", headers=headers).headers
+    assert "content-encoding" not in client.get("/api/stream", headers=headers).headers
+    assert "content-encoding" not in client.get("/page", headers=headers).headers
+
+
+def test_encoding_negotiation():
+    assert negotiate_encoding("gzip, deflate", ("br", "gzip")) == "gzip"
+    assert negotiate_encoding("br;q=0, *", ("br", "gzip")) == "gzip"
+    assert negotiate_encoding("identity", ("br", "gzip")) is None
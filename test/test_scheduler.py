@@ -0,0 +1,108 @@
+import asyncio
+
+from app.services.scheduler import JobContext, LLMScheduler, expedite
+
+
+def _run_calls(scheduler: LLMScheduler, calls: list) -> list:
+    """
+    Queue the (job_id, tenant, priority) calls behind a held slot, free it and
+    return the job IDs in the order their calls were granted.
+    """
+    async def run():
+        order = []
+        blocker = await scheduler.acquire(JobContext("blocker"))
+
+        async def call(context):
+            job = await scheduler.acquire(context)
+            order.append(context.job_id)
+            await asyncio.sleep(0)
+            scheduler.release(job)
+
+        tasks = [asyncio.ensure_future(call(JobContext(job_id, tenant, priority))) for job_id, tenant, priority in calls]
+        await asyncio.sleep(0)
+        scheduler.release(blocker)
+        await asyncio.gather(*tasks)
+        return order
+
+    return asyncio.run(run())
+
+
+def test_jobs_share_capacity_in_turn():
+    scheduler = LLMScheduler(capacity=1)
+    calls = [("big", "default", "normal")] * 4 + [("small", "default", "normal")] * 2
+
+    assert _run_calls(scheduler, calls) == ["big", "small", "big", "small", "big", "big"]
+    assert scheduler.in_use == 0
+
+
+def test_tenants_are_served_by_weight():
+    scheduler = LLMScheduler(capacity=1, tenant_weights={"gold": 2.0})
+    calls = [("a", "gold", "normal")] * 6 + [("b", "bronze", "normal")] * 6
+
+    order = _run_calls(scheduler, calls)
+
+    assert order[:6].count("a") == 4
+    assert order[:6].count("b") == 2
+
+
+def test_higher_priority_is_served_first():
+    scheduler = LLMScheduler(capacity=1)
+    calls = [("batch", "default", "low")] * 2 + [("interactive", "default", "high")] * 2
+
+    assert _run_calls(scheduler, calls) == ["interactive", "interactive", "batch", "batch"]
+
+
+def test_job_over_its_share_uses_idle_capacity():
+    async def run():
+        scheduler = LLMScheduler(capacity=4, max_job_share=0.5)
+        jobs = [await scheduler.acquire(JobContext("big")) for _ in range(4)]
+        return scheduler, jobs
+
+    scheduler, jobs = asyncio.run(run())
+
+    assert scheduler.max_job_slots == 2
+    assert scheduler.in_use == 4
+    for job in jobs:
+        scheduler.release(job)
+    assert scheduler.snapshot()["tenants"] == {}
+
+
+def test_cancelled_waiter_does_not_hold_a_slot():
+    async def run():
+        scheduler = LLMScheduler(capacity=1)
+        held = await scheduler.acquire(JobContext("a"))
+        waiter = asyncio.ensure_future(scheduler.acquire(JobContext("b")))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler.release(held)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+
+    assert scheduler.in_use == 0
+    assert scheduler.snapshot()["tenants"] == {}
+
+
+def test_expedited_calls_go_ahead_of_the_job_queued_calls():
+    async def run():
+        scheduler = LLMScheduler(capacity=1)
+        order = []
+        blocker = await scheduler.acquire(JobContext("job"))
+
+        async def call(name, expedited=False):
+            if expedited:
+                with expedite():
+                    job = await scheduler.acquire(JobContext("job"))
+            else:
+                job = await scheduler.acquire(JobContext("job"))
+            order.append(name)
+            scheduler.release(job)
+
+        tasks = [asyncio.ensure_future(call("page")), asyncio.ensure_future(call("page")), asyncio.ensure_future(call("graph", True))]
+        await asyncio.sleep(0)
+        scheduler.release(blocker)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["graph", "page", "page"]
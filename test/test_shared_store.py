@@ -0,0 +1,128 @@
+import time
+
+import pytest
+
+from app.services.jobs import JobAlreadyRunningError
+from app.services.shared_store import SharedCallBudget, SharedStore
+
+LEASE = 30.0
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SharedStore(str(tmp_path / "shared.sqlite3"))
+
+
+def _expire_lease(store: SharedStore, job_id: str) -> None:
+    # Simulates a worker that stopped renewing its lease
+    store._connection().execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def _events(store: SharedStore, job_id: str) -> list:
+    return [event["event"] for event in store.events(job_id)]
+
+
+def test_jobs_are_claimed_oldest_first_and_once(store):
+    store.enqueue("a", {"n": 1})
+    store.enqueue("b", {"n": 2})
+
+    first = store.claim("w1", LEASE, max_attempts=3)
+    second = store.claim("w2", LEASE, max_attempts=3)
+
+    assert (first["id"], first["payload"], first["attempts"]) == ("a", {"n": 1}, 1)
+    assert second["id"] == "b"
+    assert store.claim("w3", LEASE, max_attempts=3) is None
+    with pytest.raises(JobAlreadyRunningError):
+        store.enqueue("a", {})
+
+
+def test_expired_lease_is_retried_then_given_up(store):
+    store.enqueue("a", {})
+    store.claim("w1", LEASE, max_attempts=2)
+    _expire_lease(store, "a")
+
+    retried = store.claim("w2", LEASE, max_attempts=2)
+    assert (retried["id"], retried["attempts"]) == ("a", 2)
+    assert store.heartbeat("a", "w2", LEASE) is None
+
+    _expire_lease(store, "a")
+    assert store.claim("w3", LEASE, max_attempts=2) is None
+    assert store.job("a")["status"] == "failed"
+    assert _events(store, "a") == ["failed"]
+
+
+def test_cancelling_a_queued_job_ends_its_stream(store):
+    store.enqueue("a", {})
+    store.add_event("a", "queued", {})
+
+    assert store.request_cancel("a", "client_disconnected")
+
+    assert store.job("a")["status"] == "cancelled"
+    assert _events(store, "a") == ["queued", "cancelled"]
+    assert store.claim("w1", LEASE, max_attempts=3) is None
+    assert not store.request_cancel("a")
+
+
+def test_cancelling_a_running_job_is_picked_up_at_heartbeat(store):
+    store.enqueue("a", {})
+    store.claim("w1", LEASE, max_attempts=3)
+
+    assert store.request_cancel("a", "file_deleted")
+
+    assert store.heartbeat("a", "w1", LEASE) == "file_deleted"
+    assert store.job("a")["status"] == "running"
+
+
+def test_cancelled_job_of_a_lost_worker_is_not_rerun(store):
+    store.enqueue("a", {})
+    store.claim("w1", LEASE, max_attempts=3)
+    store.request_cancel("a", "requested")
+    _expire_lease(store, "a")
+
+    assert store.claim("w2", LEASE, max_attempts=3) is None
+    assert store.job("a")["status"] == "cancelled"
+    assert _events(store, "a") == ["cancelled"]
+
+
+def test_reused_job_id_starts_a_new_stream(store):
+    store.enqueue("a", {})
+    store.claim("w1", LEASE, max_attempts=3)
+    store.add_events([("a", "page_summary", {}), ("a", "completed", {})])
+    with pytest.raises(JobAlreadyRunningError):
+        store.reset_events("a")
+    store.finish("a", "done", {"ok": True})
+
+    store.reset_events("a")
+    store.add_event("a", "queued", {})
+    store.enqueue("a", {})
+
+    assert store.events("a") == [{"seq": 1, "event": "queued", "data": {}}]
+    assert store.job("a")["status"] == "queued"
+
+
+def test_call_budget_is_shared_and_reclaims_expired_slots(store):
+    first, second = SharedCallBudget(store, capacity=1), SharedCallBudget(store, capacity=1)
+    second.holder = "other"
+
+    assert first.acquire()
+    assert not second.acquire(block=False)
+    assert not second.acquire(timeout=0.05)
+    first.release()
+    assert second.acquire(block=False)
+
+    # A holder that died without releasing its slot loses it when the lease expires
+    store._connection().execute("UPDATE llm_slots SET expires = ?", (time.time() - 1,))
+    assert first.acquire(block=False)
+    assert store.slots_in_use() == 1
+
+
+def test_cached_results_leave_out_job_metadata(store):
+    result = {
+        "graph": {"nodes": [], "edges": []},
+        "metadata": {"thread_id": "job1", "total_pages": 3, "export_file_path": "exports/a.json", "deadline_seconds": 60, "deadline_met": True},
+    }
+
+    store.store_result("key", result)
+
+    assert store.cached_result("key")["metadata"] == {"total_pages": 3, "export_file_path": "exports/a.json"}
+    assert store.cached_result("other") is None
@@ -0,0 +1,62 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.services.static_assets import IMMUTABLE_CACHE, REVALIDATE_CACHE, AssetManifest
+
+BUNDLE = "assets/index-BdLq2Xk9.js"
+
+
+def _client(tmp_path) -> TestClient:
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text("<!doctype html><div id=root></div>")
+    (tmp_path / BUNDLE).write_text("console.log('mind map');\n" * 200)
+    manifest = AssetManifest(tmp_path)
+    manifest.compress()
+    app = FastAPI()
+
+    @app.get("/{path:path}")
+    async def serve(path: str, request: Request):
+        return manifest.response(manifest.get(path), request)
+
+    return TestClient(app)
+
+
+def test_hashed_bundles_are_immutable_and_precompressed(tmp_path):
+    client = _client(tmp_path)
+
+    response = client.get(f"/{BUNDLE}", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == (tmp_path / BUNDLE).read_text()
+
+
+def test_identity_when_compression_is_refused(tmp_path):
+    client = _client(tmp_path)
+
+    response = client.get(f"/{BUNDLE}", headers={"Accept-Encoding": "gzip;q=0"})
+
+    assert "content-encoding" not in response.headers
+    assert response.content == (tmp_path / BUNDLE).read_bytes()
+
+
+def test_index_is_revalidated_with_etags(tmp_path):
+    client = _client(tmp_path)
+
+    response = client.get("/index.html", headers={"Accept-Encoding": "identity"})
+    assert response.headers["cache-control"] == REVALIDATE_CACHE
+
+    revalidated = client.get("/index.html", headers={"If-None-Match": response.headers["etag"], "Accept-Encoding": "identity"})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+def test_etag_depends_on_the_encoding(tmp_path):
+    client = _client(tmp_path)
+
+    gzip_etag = client.get(f"/{BUNDLE}", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    identity_etag = client.get(f"/{BUNDLE}", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    assert gzip_etag != identity_etag
+    assert client.get(f"/{BUNDLE}", headers={"If-None-Match": identity_etag, "Accept-Encoding": "gzip"}).status_code == 200
@@ -0,0 +1,76 @@
+import os
+import time
+
+from app.services.storage import BlobStore, StorageJanitor
+
+PDF = b"%PDF-1.4 same content"
+
+
+def _janitor(tmp_path, **limits) -> StorageJanitor:
+    options = {"upload_ttl": None, "upload_quota": None, "output_ttl": None, "output_quota": None, **limits}
+    return StorageJanitor(BlobStore(tmp_path / "uploads"), tmp_path / "output", **options)
+
+
+def test_identical_uploads_share_one_blob(tmp_path):
+    store = BlobStore(tmp_path)
+
+    first, deduplicated_first = store.put(PDF, "1_deck.pdf")
+    second, deduplicated_second = store.put(PDF, "2_deck.pdf")
+
+    assert first == second
+    assert (deduplicated_first, deduplicated_second) == (False, True)
+    assert store.resolve("2_deck.pdf") == first
+    assert store.reference_count(first.stem) == 2
+
+
+def test_blob_is_deleted_with_its_last_reference_unless_pinned(tmp_path):
+    store = BlobStore(tmp_path)
+    path, _ = store.put(PDF, "1_deck.pdf")
+    store.put(PDF, "2_deck.pdf")
+
+    assert store.delete("1_deck.pdf")
+    assert path.exists()
+    with store.pinned(path):
+        store.delete("2_deck.pdf")
+        assert path.exists()
+    assert store.remove_orphans() == 1
+    assert not path.exists()
+    assert not store.delete("2_deck.pdf")
+
+
+def test_references_are_shared_between_processes(tmp_path):
+    writer, reader = BlobStore(tmp_path), BlobStore(tmp_path)
+
+    writer.put(PDF, "1_deck.pdf")
+
+    assert reader.resolve("1_deck.pdf") is not None
+
+
+def test_legacy_uploads_are_migrated_into_the_blob_store(tmp_path):
+    janitor = _janitor(tmp_path)
+    for name in ("1_deck.pdf", "2_deck.pdf"):
+        (tmp_path / "uploads" / name).write_bytes(PDF)
+
+    assert janitor.migrate_legacy_uploads() == 2
+
+    assert list((tmp_path / "uploads").glob("*.pdf")) == []
+    assert len(list(janitor.blob_store.blob_dir.glob("*.pdf"))) == 1
+    assert set(janitor.blob_store.references()) == {"1_deck.pdf", "2_deck.pdf"}
+
+
+def test_janitor_enforces_ttl_and_quota(tmp_path):
+    janitor = _janitor(tmp_path, upload_ttl=60, output_quota=10)
+    janitor.blob_store.put(b"%PDF old", "old.pdf", created_at=time.time() - 120)
+    janitor.blob_store.put(b"%PDF new", "new.pdf")
+    janitor.output_dir.mkdir()
+    for age, name in ((30, "system_output_a_20240101_000000.mmx"), (10, "system_output_b_20240101_000000.mmx")):
+        path = janitor.output_dir / name
+        path.write_bytes(b"x" * 8)
+        os.utime(path, (time.time() - age, time.time() - age))
+    (janitor.output_dir / "notes.txt").write_bytes(b"x" * 100)
+
+    result = janitor.run_once()
+
+    assert (result["uploads_evicted"], result["outputs_evicted"]) == (1, 1)
+    assert set(janitor.blob_store.references()) == {"new.pdf"}
+    assert sorted(p.name for p in janitor.output_dir.iterdir()) == ["notes.txt", "system_output_b_20240101_000000.mmx"]
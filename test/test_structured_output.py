@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from app.langgraph.structured_output import JSONItemStream
+
+BODY = '{"nodes": [{"id": "1", "title": "A"}, {"id": "2", "title": "B [draft]"}], "edges": [{"from": "1", "to": "2"}]}'
+REPLY = f"```json\n{BODY}\n```"
+
+
+def _stream():
+    reported = []
+    return JSONItemStream(on_item=lambda key, item: reported.append((key, item["id"] if "id" in item else item["to"]))), reported
+
+
+def _feed(stream, text, size=7):
+    for start in range(0, len(text), size):
+        stream.feed(text[start:start + size])
+
+
+def test_items_are_reported_as_soon_as_they_are_complete():
+    stream, reported = _stream()
+
+    stream.feed(REPLY[:REPLY.index('{"id": "2"')])
+    assert reported == [("nodes", "1")]
+
+    stream.feed(REPLY[REPLY.index('{"id": "2"'):])
+    assert reported == [("nodes", "1"), ("nodes", "2"), ("edges", "2")]
+    assert stream.parse(REPLY, "graph") == json.loads(BODY)
+    assert not stream.recovered
+
+
+def test_truncated_reply_keeps_complete_items():
+    stream, _ = _stream()
+    truncated = REPLY[:REPLY.index('"edges"') + 20]
+    _feed(stream, truncated)
+
+    result = stream.parse(truncated, "graph")
+
+    assert stream.recovered
+    assert [node["id"] for node in result["nodes"]] == ["1", "2"]
+    assert "edges" not in result
+
+
+def test_unrecoverable_reply_raises():
+    stream, _ = _stream()
+
+    with pytest.raises(json.JSONDecodeError):
+        stream.parse('{"nodes": [{"id": "1"', "graph")
+
+
+def test_held_items_are_reported_on_release():
+    stream, reported = _stream()
+    stream.hold()
+    _feed(stream, REPLY)
+
+    assert reported == []
+    stream.release()
+    assert reported == [("nodes", "1"), ("nodes", "2"), ("edges", "2")]
+
+
+def test_reset_drops_held_items_and_skips_reported_ones():
+    stream, reported = _stream()
+    stream.hold()
+    _feed(stream, '{"nodes": [{"id": "rejected"}]}')
+    stream.reset()
+    _feed(stream, '{"nodes": [{"id": "1", "title": "A"}')
+    stream.reset()
+    _feed(stream, REPLY)
+
+    assert reported == [("nodes", "1"), ("nodes", "2"), ("edges", "2")]
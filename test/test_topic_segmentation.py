@@ -0,0 +1,84 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.langgraph import topic_segmentation
+from app.langgraph.topic_segmentation import TopicSegmenter, is_valid_segments
+
+
+def _segmenter(monkeypatch, replies: list) -> TopicSegmenter:
+    """
+    A segmenter whose model calls return the given {topic_title: slide_numbers} replies in turn.
+    """
+    replies = iter(replies)
+
+    async def fake_invoke(messages, kind, score, **kwargs):
+        topics = [{"topic_title": title, "slide_numbers": slides} for title, slides in next(replies).items()]
+        return SimpleNamespace(content=json.dumps({"topics": topics}))
+
+    monkeypatch.setattr(topic_segmentation, "invoke_routed", fake_invoke)
+    return TopicSegmenter()
+
+
+def _add_pages(segmenter: TopicSegmenter, pages) -> None:
+    for page in pages:
+        segmenter.add({"page_number": page, "summary": f"Summary {page}"})
+
+
+def test_last_topic_stays_open_until_the_final_call(monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESSIVE_SEGMENT_PAGES", 4)
+    segmenter = _segmenter(monkeypatch, [
+        {"Intro": [1, 2], "Models": [3, 4]},
+        {"Models": [3, 4, 5], "Results": [6, 7, 8]},
+    ])
+
+    _add_pages(segmenter, [1, 2, 3])
+    assert not segmenter.ready()
+    _add_pages(segmenter, [4])
+    assert segmenter.ready()
+    closed = asyncio.run(segmenter.segment())
+
+    assert closed == [{"topic_title": "Intro", "slide_numbers": [1, 2], "summaries": ["Summary 1", "Summary 2"]}]
+    assert segmenter.open_title == "Models"
+    assert [p["page_number"] for p in segmenter.pending] == [3, 4]
+
+    _add_pages(segmenter, [5, 6, 7, 8])
+    closed = asyncio.run(segmenter.segment(final=True))
+
+    assert [(t["topic_title"], t["slide_numbers"]) for t in closed] == [("Models", [3, 4, 5]), ("Results", [6, 7, 8])]
+    assert segmenter.pending == [] and segmenter.calls == 2
+
+
+def test_unassigned_slides_join_the_previous_topic(monkeypatch):
+    segmenter = _segmenter(monkeypatch, [{"Intro": [1], "Outro": [4]}])
+    _add_pages(segmenter, [1, 2, 3, 4])
+
+    closed = asyncio.run(segmenter.segment(final=True))
+
+    assert [(t["topic_title"], t["slide_numbers"]) for t in closed] == [("Intro", [1, 2, 3]), ("Outro", [4])]
+
+
+def test_long_open_topic_is_closed(monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESSIVE_MAX_TOPIC_PAGES", 3)
+    segmenter = _segmenter(monkeypatch, [{"Everything": [1, 2, 3]}])
+    _add_pages(segmenter, [1, 2, 3])
+
+    closed = asyncio.run(segmenter.segment())
+
+    assert [t["slide_numbers"] for t in closed] == [[1, 2, 3]]
+    assert segmenter.open_title is None
+
+
+def test_invalid_reply_keeps_slides_together(monkeypatch):
+    async def fake_invoke(messages, kind, score, **kwargs):
+        return SimpleNamespace(content="not json")
+
+    monkeypatch.setattr(topic_segmentation, "invoke_routed", fake_invoke)
+    segmenter = TopicSegmenter()
+    _add_pages(segmenter, [5, 6])
+
+    closed = asyncio.run(segmenter.segment(final=True))
+
+    assert [(t["topic_title"], t["slide_numbers"]) for t in closed] == [("Slides 5-6", [5, 6])]
+    assert not is_valid_segments('{"topics": [{"topic_title": "A"}]}')